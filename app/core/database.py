@@ -0,0 +1,89 @@
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.config import DB_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+from app.core.metrics import DB_QUERY_SECONDS, STAGE_DB_QUERY, observe_stage
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    """서비스 전체가 공유하는 비동기 엔진 생성"""
+    db_url = make_url(url)
+    if db_url.get_backend_name() == "sqlite":
+        # SQLite(aiosqlite)는 테스트/로컬용. 메모리 DB는 StaticPool을 쓰므로 풀 옵션을 넘기지 않음
+        return create_async_engine(db_url)
+    return create_async_engine(
+        db_url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+engine = _create_engine(DB_URL)
+
+# 프리포크 워커는 부모의 풀 커넥션을 공유하면 안 되므로 자식에서 풀을 비움 (부모 커넥션은 닫지 않음)
+os.register_at_fork(after_in_child=lambda: engine.sync_engine.dispose(close=False))
+
+
+# 쿼리별 왕복 시간 통계 (이름 -> 횟수/누적/최대)
+_query_stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+
+
+def record_query_time(name: str, elapsed: float):
+    stats = _query_stats[name]
+    elapsed_ms = elapsed * 1000
+    stats["count"] += 1
+    stats["total_ms"] += elapsed_ms
+    stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+    DB_QUERY_SECONDS.observe(elapsed, query=name)
+    observe_stage(STAGE_DB_QUERY, elapsed)
+
+
+def get_query_stats() -> Dict[str, Dict[str, float]]:
+    """쿼리별 호출 수, 평균/최대 왕복 시간(ms)"""
+    return {
+        name: {
+            "count": stats["count"],
+            "avg_ms": round(stats["total_ms"] / stats["count"], 3) if stats["count"] else 0.0,
+            "max_ms": round(stats["max_ms"], 3),
+        }
+        for name, stats in _query_stats.items()
+    }
+
+
+async def fetch_one(name: str, query, params: Optional[Mapping[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """쿼리 한 건을 실행하고 첫 행을 dict로 반환 (DataFrame 변환 없음)"""
+    start = time.perf_counter()
+    async with engine.connect() as conn:
+        result = await conn.execute(query, params or {})
+        row = result.mappings().first()
+    record_query_time(name, time.perf_counter() - start)
+    return dict(row) if row is not None else None
+
+
+async def fetch_all(name: str, query, params: Optional[Mapping[str, Any]] = None) -> List[Dict[str, Any]]:
+    """쿼리를 실행하고 모든 행을 dict 리스트로 반환"""
+    start = time.perf_counter()
+    async with engine.connect() as conn:
+        result = await conn.execute(query, params or {})
+        rows = [dict(row) for row in result.mappings()]
+    record_query_time(name, time.perf_counter() - start)
+    return rows
+
+
+async def execute(name: str, *statements) -> None:
+    """(쿼리, 파라미터) 쌍들을 한 트랜잭션에서 실행. 파라미터가 리스트면 executemany"""
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        for query, params in statements:
+            if isinstance(params, list) and not params:
+                continue
+            await conn.execute(query, params or {})
+    record_query_time(name, time.perf_counter() - start)
@@ -0,0 +1,305 @@
+"""
+구조화 로깅.
+
+요청 경로의 print 대신 레벨이 있는 로거를 씁니다. 기록은 QueueHandler로 큐에 넣기만 하고
+실제 stdout 쓰기는 별도 스레드의 QueueListener가 하므로, 요청 처리 코루틴이 파이프 backpressure에 막히지 않습니다.
+
+- LOG_LEVEL (INFO): 이 레벨 미만의 기록은 메시지 포맷 없이 버림 (프롬프트/원문 응답/결과 dict는 DEBUG)
+- LOG_FORMAT (text | json): json이면 한 줄에 기록 하나 (ts, level, logger, request_id, message, exc)
+- LOG_PAYLOAD_LIMIT (500): payload()로 감싼 큰 값은 이 글자 수까지만 출력
+- LOG_PAYLOAD_SAMPLE_RATE (1.0): log_payload로 남기는 큰 값의 기록 비율 (0~1)
+- LOG_QUEUE_SIZE (10000): 큐가 가득 차면 기록을 버리고 dropped만 셈 (요청은 기다리지 않음)
+
+요청 ID: RequestIdMiddleware가 X-Request-ID 헤더(없으면 새로 생성)를 contextvar에 넣어
+해당 요청에서 남긴 모든 기록에 request_id로 붙이고, 응답 헤더로도 돌려줍니다.
+
+print 대비 오버헤드 비교:
+    python -m app.core.log bench [--rounds 5000] [--size 4000]
+"""
+import argparse
+import atexit
+import contextlib
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import reprlib
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+import orjson
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=".env")
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").lower()
+LOG_PAYLOAD_LIMIT = int(os.environ.get("LOG_PAYLOAD_LIMIT", "500"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+ROOT_LOGGER = "app"
+REQUEST_ID_HEADER = b"x-request-id"
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+_EXC_FORMATTER = logging.Formatter()
+_payload_reprs: Dict[int, reprlib.Repr] = {}
+
+
+def _payload_repr(limit: int) -> reprlib.Repr:
+    """큰 dict/list의 전체 repr을 만들지 않도록 원소 수/문자열 길이를 줄이는 repr (limit별로 하나)"""
+    shortener = _payload_reprs.get(limit)
+    if shortener is None:
+        shortener = reprlib.Repr()
+        shortener.maxlevel = 4
+        shortener.maxdict = shortener.maxlist = shortener.maxtuple = shortener.maxset = 20
+        shortener.maxstring = shortener.maxother = limit
+        _payload_reprs[limit] = shortener
+    return shortener
+
+
+class Payload:
+    """로그 메시지 인자용 큰 값 래퍼. 기록이 실제로 남을 때만 문자열로 바꾸고 limit 글자에서 자름"""
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value: Any, limit: Optional[int] = None):
+        self.value = value
+        self.limit = LOG_PAYLOAD_LIMIT if limit is None else limit
+
+    def __str__(self) -> str:
+        text = self.value if isinstance(self.value, str) else _payload_repr(self.limit).repr(self.value)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}...(+{len(text) - self.limit}자)"
+
+
+def payload(value: Any, limit: Optional[int] = None) -> Payload:
+    return Payload(value, limit)
+
+
+def log_payload(logger: logging.Logger, label: str, value: Any, level: int = logging.DEBUG):
+    """프롬프트/응답 원문 같은 큰 값을 샘플링 + 잘라서 기록"""
+    if not logger.isEnabledFor(level):
+        return
+    if LOG_PAYLOAD_SAMPLE_RATE < 1.0 and random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    logger.log(level, "%s: %s", label, Payload(value))
+
+
+class RequestIdFilter(logging.Filter):
+    """기록하는 쪽(요청 코루틴)에서 현재 요청 ID를 기록에 붙임"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_text or record.exc_info:
+            entry["exc"] = record.exc_text or self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode("utf-8")
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 기다리지 않고 기록을 버림"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 기본 구현은 호출 쪽에서 레코드 복사 + 전체 포맷까지 하므로, 메시지 인자만 합치고 포맷은 리스너에 맡김
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _make_formatter(fmt: str) -> logging.Formatter:
+    if fmt == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s")
+
+
+def _build_pipeline(stream, fmt: str, queue_size: int):
+    """큐 핸들러(호출 쪽)와 출력 리스너(별도 스레드) 한 쌍"""
+    handler = _DroppingQueueHandler(queue.Queue(queue_size))
+    handler.addFilter(RequestIdFilter())
+    output = logging.StreamHandler(stream)
+    output.setFormatter(_make_formatter(fmt))
+    listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=False)
+    return handler, listener
+
+
+_setup_lock = threading.Lock()
+_queue_handler: Optional[_DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging():
+    """'app' 로거에 큐 핸들러 연결 (여러 번 호출해도 한 번만 설정)"""
+    global _queue_handler, _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        _queue_handler, _listener = _build_pipeline(sys.stdout, LOG_FORMAT, LOG_QUEUE_SIZE)
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_queue_handler)
+        # uvicorn 등 루트 로거 설정과 중복 출력되지 않도록
+        root.propagate = False
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """큐에 남은 기록을 모두 내보내고 리스너 종료"""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+        logging.getLogger(ROOT_LOGGER).removeHandler(_queue_handler)
+
+
+def _reset_after_fork():
+    """fork된 자식에는 출력 스레드가 없으므로 큐/리스너를 새로 만듦 (부모 큐에 남아 있던 기록은 부모가 출력)"""
+    global _setup_lock, _queue_handler, _listener
+    _setup_lock = threading.Lock()
+    if _listener is None:
+        return
+    logging.getLogger(ROOT_LOGGER).removeHandler(_queue_handler)
+    _queue_handler = _listener = None
+    setup_logging()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def dropped_count() -> int:
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def queue_depth() -> int:
+    """출력 스레드가 아직 내보내지 않은 기록 수"""
+    return _queue_handler.queue.qsize() if _queue_handler is not None else 0
+
+
+def get_logger(name: str) -> logging.Logger:
+    """모듈 로거 (app.* 이름이면 큐 핸들러를 그대로 사용)"""
+    setup_logging()
+    return logging.getLogger(name)
+
+
+class RequestIdMiddleware:
+    """요청마다 request_id를 정해 contextvar에 넣고 X-Request-ID 응답 헤더로 반환 (ASGI 미들웨어)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == REQUEST_ID_HEADER:
+                candidate = value.decode("latin-1")
+                if _REQUEST_ID_PATTERN.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        header = (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + [header]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+
+# --- 벤치마크 ---
+
+def _time(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def run_bench(rounds: int = 5000, size: int = 4000) -> dict:
+    """
+    요청당 로그 한 줄(큰 결과 dict 포함)의 비용(µs): 호출 쪽 시간, 출력 스레드가 큐를 비울 때까지의 총 시간.
+    출력은 /dev/null로 보내므로 파이프 대기는 빠진 값 (print는 실제로는 여기에 대기가 더해짐)
+    """
+    value = {"food_list": ["김밥"] * 4, "raw": "가" * size}
+    results = {}
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            micros = _time(lambda: print(f"[Router] 최종 분석 결과: {value}"), rounds)
+        results["print"] = (micros, micros)
+
+        cases = {
+            "logger.debug (꺼짐)": (logging.INFO, lambda logger: log_payload(logger, "최종 분석 결과", value)),
+            "logger.debug (켜짐, 잘라서)": (logging.DEBUG, lambda logger: log_payload(logger, "최종 분석 결과", value)),
+            "logger.info (짧은 메시지)": (logging.INFO, lambda logger: logger.info("요청 처리 완료 (%d개)", 4)),
+        }
+        for name, (level, call) in cases.items():
+            handler, listener = _build_pipeline(devnull, "text", rounds + 1)
+            bench_logger = logging.Logger(f"{ROOT_LOGGER}.bench", level)
+            bench_logger.addHandler(handler)
+            listener.start()
+            start = time.perf_counter()
+            caller = _time(lambda: call(bench_logger), rounds)
+            listener.stop()
+            total = (time.perf_counter() - start) / rounds * 1e6
+            results[name] = (caller, total)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="구조화 로깅 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bench_parser = subparsers.add_parser("bench", help="print 대비 로거 호출 비용 비교")
+    bench_parser.add_argument("--rounds", type=int, default=5000, help="항목별 반복 횟수")
+    bench_parser.add_argument("--size", type=int, default=4000, help="기록할 결과 값의 글자 수")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        for name, (caller, total) in run_bench(args.rounds, args.size).items():
+            print(f"{name:28s} 호출 {caller:8.2f}µs  출력 포함 {total:8.2f}µs")
+
+
+if __name__ == "__main__":
+    main()
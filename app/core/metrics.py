@@ -0,0 +1,360 @@
+"""
+Prometheus 텍스트 형식(0.0.4) 메트릭.
+
+이 서비스에 필요한 Counter / Gauge / Histogram만 직접 구현합니다 (prometheus_client 미사용).
+- 라벨 값 조합(시계열)은 메트릭마다 METRICS_MAX_SERIES개까지만 만들고, 넘치면 모든 라벨을 "other"로 합침
+- 경로 라벨은 실제 URL이 아니라 라우트 템플릿(/summary/members/{member_id}/refresh), 매칭되지 않은 경로는 "unmatched"
+- stage(STAGE_...): with 블록 시간을 app_stage_duration_seconds{stage=...}에 기록 (음식 추출, 영양 조회, 제안, 비전 호출,
+  이미지 로드, DB 쿼리, 스케일러, 위험 모델별 예측)
+- Server-Timing: ServerTimingMiddleware가 요청마다 단계 시간을 모아 응답 헤더로 반환
+  (stage() 외에 histogram 없이 헤더에만 남기는 구간은 timing(이름))
+
+렌더링은 metrics_registry.render(추가 family 목록) 한 번으로, /metrics가 서비스 통계(LLM 지연, 스케줄러 대기열,
+브레이커 ...)를 family로 만들어 함께 넘깁니다.
+"""
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=".env")
+
+METRICS_MAX_SERIES = int(os.environ.get("METRICS_MAX_SERIES", "200"))
+OVERFLOW_LABEL = "other"
+UNMATCHED_ROUTE = "unmatched"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 요청 내부 단계
+STAGE_FOOD_EXTRACTION = "food_extraction"
+STAGE_NUTRITION_LOOKUP = "nutrition_lookup"
+STAGE_SUGGESTION = "suggestion"
+STAGE_VISION = "vision"
+STAGE_IMAGE_LOAD = "image_load"
+STAGE_DB_QUERY = "db_query"
+STAGE_SCALER = "scaler"
+STAGE_MODEL_DIABETES = "model_diabetes"
+STAGE_MODEL_HYPERTENSION = "model_hypertension"
+STAGE_MODEL_CARDIOVASCULAR = "model_cardiovascular"
+
+# ms 단위 단계(스케일러, DB)와 수십 초 LLM 호출을 함께 담는 버킷(초)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (이름 접미사, 라벨, 값)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class MetricFamily:
+    """렌더링 단위 (HELP/TYPE + 샘플). 레지스트리 메트릭과 수집 시점 통계가 같은 형식으로 렌더링됨"""
+
+    __slots__ = ("name", "kind", "documentation", "samples")
+
+    def __init__(self, name: str, kind: str, documentation: str, samples: Optional[List[Sample]] = None):
+        self.name = name
+        self.kind = kind
+        self.documentation = documentation
+        self.samples = samples if samples is not None else []
+
+    def add(self, value: float, suffix: str = "", **labels):
+        self.samples.append((suffix, {key: str(item) for key, item in labels.items()}, value))
+        return self
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_families(families: Iterable[MetricFamily]) -> str:
+    lines: List[str] = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {family.documentation}")
+        lines.append(f"# TYPE {family.name} {family.kind}")
+        for suffix, labels, value in family.samples:
+            if labels:
+                label_text = ",".join(f'{key}="{_escape(item)}"' for key, item in labels.items())
+                lines.append(f"{family.name}{suffix}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{family.name}{suffix} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 max_series: int = METRICS_MAX_SERIES):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        if key not in self._series and len(self._series) >= self.max_series:
+            return (OVERFLOW_LABEL,) * len(self.labelnames)
+        return key
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> MetricFamily:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def values(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._series)
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, self.kind, self.documentation)
+        for key, value in sorted(self.values().items()):
+            family.samples.append(("", self._labels(key), value))
+        return family
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = float(value)
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "count", "total")
+
+    def __init__(self, size: int):
+        self.bucket_counts = [0] * size
+        self.count = 0
+        self.total = 0.0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, max_series: int = METRICS_MAX_SERIES):
+        super().__init__(name, documentation, labelnames, max_series)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets) + 1)
+            series.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+            series.count += 1
+            series.total += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            series = {key: (list(item.bucket_counts), item.count, item.total) for key, item in self._series.items()}
+        family = MetricFamily(self.name, self.kind, self.documentation)
+        for key, (bucket_counts, count, total) in sorted(series.items()):
+            labels = self._labels(key)
+            running = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                running += bucket_count
+                family.samples.append(("_bucket", {**labels, "le": _format_value(bound)}, running))
+            family.samples.append(("_sum", labels, total))
+            family.samples.append(("_count", labels, count))
+        return family
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"이미 등록된 메트릭: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self, extra: Iterable[MetricFamily] = ()) -> str:
+        return render_families([metric.collect() for metric in self._metrics.values()] + list(extra))
+
+
+metrics_registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = metrics_registry.histogram(
+    "app_http_request_duration_seconds", "라우트별 요청 처리 시간", ["method", "route", "status"]
+)
+STAGE_SECONDS = metrics_registry.histogram(
+    "app_stage_duration_seconds", "요청 내부 단계별 처리 시간", ["stage"]
+)
+DB_QUERY_SECONDS = metrics_registry.histogram(
+    "app_db_query_duration_seconds", "이름 붙은 쿼리별 왕복 시간", ["query"]
+)
+CACHE_REQUESTS = metrics_registry.counter(
+    "app_cache_requests_total", "캐시 조회 수 (result=hit|miss)", ["cache", "result"]
+)
+LLM_BYTES = metrics_registry.counter(
+    "app_llm_bytes_total", "Gemini 요청/응답 본문 바이트 (direction=request|response)", ["prompt_type", "direction"]
+)
+LLM_TOKENS = metrics_registry.counter(
+    "app_llm_tokens_total", "Gemini usageMetadata 토큰 수 (kind=prompt|completion)", ["prompt_type", "kind"]
+)
+
+
+# 현재 요청의 Server-Timing 구간 (이름 -> 누적 초). 요청 밖(백그라운드 작업 등)에서는 None
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def record_timing(name: str, seconds: float):
+    """현재 요청의 Server-Timing에 구간 시간 추가 (같은 이름은 합산)"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def observe_stage(name: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=name)
+    record_timing(name, seconds)
+
+
+@contextmanager
+def timing(name: str) -> Iterator[None]:
+    """Server-Timing에만 남기는 구간"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - start)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """요청 내부 단계 시간 기록 (예외로 끝나도 기록)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - start)
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0):
+    if hits:
+        CACHE_REQUESTS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_REQUESTS.inc(misses, cache=cache, result="miss")
+
+
+def cache_hit_ratios() -> Dict[str, float]:
+    """캐시별 누적 히트 비율"""
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.values().items():
+        counts = totals.setdefault(cache, [0.0, 0.0])
+        counts[0 if result == "hit" else 1] += value
+    return {cache: hits / (hits + misses) for cache, (hits, misses) in totals.items() if hits + misses}
+
+
+def record_llm_usage(prompt_type: str, request_bytes: int, response_bytes: int, usage: Optional[Dict] = None):
+    """Gemini 호출 한 번의 본문 크기와 usageMetadata 토큰 수"""
+    LLM_BYTES.inc(request_bytes, prompt_type=prompt_type, direction="request")
+    LLM_BYTES.inc(response_bytes, prompt_type=prompt_type, direction="response")
+    if usage:
+        LLM_TOKENS.inc(usage.get("promptTokenCount", 0), prompt_type=prompt_type, kind="prompt")
+        LLM_TOKENS.inc(usage.get("candidatesTokenCount", 0), prompt_type=prompt_type, kind="completion")
+
+
+class MetricsMiddleware:
+    """라우트 템플릿별 요청 시간 기록 (ASGI 미들웨어). 상태 코드는 2xx/4xx 같은 클래스로 묶음"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                route=getattr(route, "path", UNMATCHED_ROUTE),
+                status=f"{status[0] // 100}xx",
+            )
+
+
+class ServerTimingMiddleware:
+    """요청 중 기록된 단계 시간을 Server-Timing 응답 헤더로 반환 (ASGI 미들웨어). total은 응답 헤더를 보낼 때까지의 시간"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in list(timings.items())]
+                entries.append(f"total;dur={(time.perf_counter() - start) * 1000:.1f}")
+                header = (b"server-timing", ", ".join(entries).encode("latin-1"))
+                message["headers"] = list(message.get("headers", ())) + [header]
+            await send(message)
+
+        token = _request_timings.set(timings)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
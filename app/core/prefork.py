@@ -0,0 +1,559 @@
+"""
+프리포크 멀티 워커 실행기 (운영용).
+
+main.py의 uvicorn.run(reload=True)는 개발용 단일 프로세스이고, uvicorn --workers N은 워커마다 앱 import와
+모델 3개(.h5) + scaler.pkl, 캐시 파일 로드를 따로 하므로 워커 수만큼 메모리와 시작 시간이 늘어납니다.
+이 실행기는 마스터 프로세스에서 앱(라우터/서비스 모듈, 예측 모델, scaler.pkl, 읽기 전용 캐시)을 한 번 import하고
+gc.freeze()로 GC가 그 객체들을 건드리지 않게 한 뒤 워커를 fork합니다. 워커는 마스터의 메모리 페이지를 copy-on-write로
+공유하고, 마스터가 연 리스닝 소켓 하나에서 함께 요청을 받습니다.
+
+- 예측 모델은 h5py로 읽은 NumPy 가중치로 추론하므로(app/services/dense_model.py) TensorFlow 없이 마스터에서 로드되어
+  공유됨. NumPy로 재현할 수 없는 모델이면 TensorFlow로 워커마다 lifespan 시작 시 로드하고, 이때는 모델 메모리를
+  공유하지 못함 (TensorFlow는 fork에 안전하지 않으므로 마스터에서 import하지 않음)
+- 마스터에서는 요청 처리/추론을 하지 않음 (DB 커넥션, HTTP 클라이언트도 워커에서 처음 만들어짐)
+- Gemini 쿼터(LLM_RATE_PER_MINUTE)는 API 키 단위이므로 워커마다 1/--workers씩 나눠 씀 (llm_scheduler share)
+- 비정상 종료한 워커는 지수 백오프(1초부터 최대 RESPAWN_BACKOFF_MAX초) 뒤 다시 fork하고, 준비되기 전에 죽는 일이
+  --max-startup-failures번 연달아 일어나면 마스터도 종료 (설정/DB 오류로 fork를 무한 반복하지 않도록)
+- 워커 재활용: --max-requests(+ --max-requests-jitter)개 요청 후, 또는 워커 전용 메모리가 --max-worker-memory-mb를
+  넘으면 정상 종료(처리 중인 요청 완료)시키고 새로 fork
+- SIGHUP: 워커를 하나씩 새로 띄우고 준비되면 이전 워커를 정상 종료 (무중단. 마스터에 올라간 코드와 모델은 그대로)
+- SIGUSR2: 워커를 정상 종료한 뒤 같은 리스닝 소켓으로 마스터를 다시 실행 (코드/모델/scaler 변경 반영, 그동안 새 연결은 backlog에서 대기)
+- SIGTERM / SIGINT: 워커 정상 종료 후 마스터 종료
+- SIGUSR1: 프로세스별 메모리(RSS/PSS/전용) 기록
+
+RSS 합계는 공유 페이지를 워커마다 중복으로 세므로, 실제 총 사용량은 PSS 합계로 봅니다.
+
+    python -m app.core.prefork serve [--app main:app] [--host 0.0.0.0] [--port 8000] [--workers 4]
+    python -m app.core.prefork bench [--workers 1,2,4]   # 프리로드 vs 워커별 로드의 시작 시간/총 메모리 비교
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import select
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import uvicorn
+
+from app.core.log import get_logger, shutdown_logging
+
+LISTEN_FD_ENV = "PREFORK_LISTEN_FD"
+MEMORY_CHECK_INTERVAL = 5.0
+RESPAWN_BACKOFF_BASE = 1.0
+RESPAWN_BACKOFF_MAX = 60.0
+_MEMORY_FIELDS = ("Rss", "Pss", "Private_Clean", "Private_Dirty")
+
+logger = get_logger("app.core.prefork")
+
+
+# --- 메모리 측정 (/proc/<pid>/smaps_rollup, kB) ---
+
+def read_memory(pid: int) -> Dict[str, int]:
+    try:
+        text = Path(f"/proc/{pid}/smaps_rollup").read_text()
+    except OSError:
+        return {}
+    values = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        if name in _MEMORY_FIELDS:
+            values[name] = int(rest.split()[0])
+    values["Private"] = values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+    return values
+
+
+def memory_report(master_pid: int, worker_pids: Sequence[int]) -> Dict[str, float]:
+    """마스터 + 워커 메모리 (MB)"""
+    master = read_memory(master_pid)
+    workers = [read_memory(pid) for pid in worker_pids]
+    processes = [master] + workers
+    to_mb = 1 / 1024
+    return {
+        "total_rss_mb": sum(item.get("Rss", 0) for item in processes) * to_mb,
+        "total_pss_mb": sum(item.get("Pss", 0) for item in processes) * to_mb,
+        "master_rss_mb": master.get("Rss", 0) * to_mb,
+        "worker_private_mb": (sum(item.get("Private", 0) for item in workers) / len(workers) * to_mb) if workers else 0.0,
+    }
+
+
+def _format_memory(report: Dict[str, float]) -> str:
+    return (f"RSS 합계 {report['total_rss_mb']:.0f}MB, PSS 합계 {report['total_pss_mb']:.0f}MB, "
+            f"마스터 RSS {report['master_rss_mb']:.0f}MB, 워커 전용 평균 {report['worker_private_mb']:.0f}MB")
+
+
+# --- 워커 ---
+
+class _WorkerServer(uvicorn.Server):
+    """lifespan 시작과 소켓 준비가 끝나면 준비 파이프로 마스터에 알림"""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd: Optional[int] = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if self.started and self.ready_fd is not None:
+            try:
+                os.write(self.ready_fd, b"1")
+                os.close(self.ready_fd)
+            except OSError:
+                pass
+            self.ready_fd = None
+
+
+@dataclass
+class PreforkOptions:
+    app: str = "main:app"
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 2
+    preload: bool = True
+    max_requests: int = 0
+    max_requests_jitter: int = 0
+    max_worker_memory_mb: float = 0.0
+    graceful_timeout: float = 30.0
+    startup_timeout: float = 300.0
+    max_startup_failures: int = 5
+    backlog: int = 2048
+    log_level: str = "warning"
+    ready_file: Optional[str] = None
+
+
+def _run_worker(options: PreforkOptions, sock: socket.socket, ready_fd: int, max_requests: int):
+    # 마스터의 시그널 처리를 물려받지 않도록 (종료 시그널은 uvicorn이 정상 종료로 처리)
+    signal.set_wakeup_fd(-1)
+    for signum in (signal.SIGHUP, signal.SIGUSR1, signal.SIGUSR2, signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    # 워커들이 같은 API 키 쿼터를 나눠 쓰도록 (각자 전체 쿼터를 쓰면 합계가 워커 수만큼 커짐)
+    from app.services.llm_scheduler import llm_scheduler
+
+    llm_scheduler.configure(share=1 / options.workers)
+    config = uvicorn.Config(
+        options.app,
+        lifespan="on",
+        log_level=options.log_level,
+        access_log=False,
+        limit_max_requests=max_requests or None,
+        timeout_graceful_shutdown=options.graceful_timeout,
+    )
+    _WorkerServer(config, ready_fd).run(sockets=[sock])
+
+
+# --- 마스터 ---
+
+class Arbiter:
+    def __init__(self, options: PreforkOptions, exec_args: Optional[List[str]] = None):
+        self.options = options
+        self.exec_args = exec_args
+        self.sock: Optional[socket.socket] = None
+        self.workers: Dict[int, float] = {}
+        # 정상 종료를 요청한 워커 -> 강제 종료 시각
+        self.retiring: Dict[int, float] = {}
+        # 준비 파이프 fd -> 워커 pid (재활용으로 새로 띄운 워커)
+        self.pending_ready: Dict[int, int] = {}
+        # 아직 준비를 알리지 않은 워커 -> 준비 기한
+        self.booting: Dict[int, float] = {}
+        # 연속 비정상 종료 수(백오프), 그중 준비 전에 죽은 연속 횟수, 다음 fork 가능 시각
+        self.failures = 0
+        self.startup_failures = 0
+        self.respawn_at = 0.0
+        self.exit_code = 0
+        self.signals: List[int] = []
+        self.stopping = False
+        self._wakeup_r = self._wakeup_w = -1
+        self._last_memory_check = 0.0
+
+    # 준비
+
+    def _listen(self) -> socket.socket:
+        inherited = os.environ.pop(LISTEN_FD_ENV, None)
+        if inherited:
+            sock = socket.socket(fileno=int(inherited))
+            logger.info("리스닝 소켓 이어받음 (fd %s)", inherited)
+        else:
+            sock = socket.create_server((self.options.host, self.options.port), backlog=self.options.backlog)
+        return sock
+
+    def _preload(self):
+        from uvicorn.importer import import_from_string
+
+        import_from_string(self.options.app)
+        if "tensorflow" in sys.modules:
+            logger.warning("마스터에서 tensorflow가 import됨 - fork 후 워커에서 예측이 멈출 수 있습니다")
+        # import 중 만들어진 객체(모델 가중치, scaler, 캐시)를 GC 대상에서 빼서, 워커의 GC가 공유 페이지에 쓰지 않도록
+        gc.collect()
+        gc.freeze()
+
+    def _install_signals(self):
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        signal.set_wakeup_fd(self._wakeup_w)
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGUSR1, signal.SIGUSR2, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+
+    def _on_signal(self, signum, frame):
+        if signum != signal.SIGCHLD:
+            self.signals.append(signum)
+
+    # 워커 관리
+
+    def active_workers(self) -> List[int]:
+        return [pid for pid in self.workers if pid not in self.retiring]
+
+    def spawn(self) -> Tuple[int, int]:
+        """워커 하나를 fork하고 (pid, 준비 파이프 fd) 반환"""
+        ready_r, ready_w = os.pipe()
+        max_requests = self.options.max_requests
+        if max_requests:
+            # 워커들이 동시에 재활용되지 않도록
+            max_requests += random.randint(0, self.options.max_requests_jitter)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                os.close(ready_r)
+                os.close(self._wakeup_r)
+                os.close(self._wakeup_w)
+                _run_worker(self.options, self.sock, ready_w, max_requests)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        os.close(ready_w)
+        self.workers[pid] = time.monotonic()
+        self.booting[pid] = time.monotonic() + self.options.startup_timeout
+        return pid, ready_r
+
+    def _mark_ready(self, pid: int):
+        self.booting.pop(pid, None)
+        self.failures = 0
+        self.startup_failures = 0
+
+    def wait_ready(self, pending: Dict[int, int], timeout: float) -> List[int]:
+        """준비 파이프(fd -> pid)를 기다려 준비된 워커 pid 목록 반환 (시간 초과/시작 실패는 제외)"""
+        ready = []
+        deadline = time.monotonic() + timeout
+        pending = dict(pending)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select(list(pending), [], [], remaining)
+            for fd in readable:
+                pid = pending.pop(fd)
+                if os.read(fd, 1):
+                    self._mark_ready(pid)
+                    ready.append(pid)
+                os.close(fd)
+        for fd, pid in pending.items():
+            os.close(fd)
+            logger.error("워커 %d가 %.0f초 안에 준비되지 않았습니다", pid, timeout)
+        return ready
+
+    def retire(self, pid: int):
+        """처리 중인 요청을 끝내고 종료하도록 요청"""
+        if pid in self.retiring:
+            return
+        self.retiring[pid] = time.monotonic() + self.options.graceful_timeout + 5
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _respawn(self):
+        if time.monotonic() < self.respawn_at:
+            return
+        while not self.stopping and len(self.active_workers()) < self.options.workers:
+            pid, fd = self.spawn()
+            self.pending_ready[fd] = pid
+
+    def _record_failure(self, pid: int, code: int, booting: bool):
+        """비정상 종료: 다음 fork를 지수 백오프로 미루고, 준비 전 실패가 이어지면 마스터 종료"""
+        self.failures += 1
+        delay = min(RESPAWN_BACKOFF_BASE * 2 ** (self.failures - 1), RESPAWN_BACKOFF_MAX)
+        self.respawn_at = time.monotonic() + delay
+        if not booting:
+            logger.warning("워커 %d 비정상 종료 (%d) - %.0f초 후 새로 시작", pid, code, delay)
+            return
+        self.startup_failures += 1
+        limit = self.options.max_startup_failures
+        if limit and self.startup_failures >= limit:
+            logger.error("워커가 준비 전에 %d번 연속 종료 (%d) - 마스터 종료", self.startup_failures, code)
+            self.stopping = True
+            self.exit_code = 1
+            return
+        logger.warning("워커 %d가 준비 전에 종료 (%d, 연속 %d번) - %.0f초 후 새로 시작", pid, code,
+                       self.startup_failures, delay)
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            self._worker_exited(pid, os.waitstatus_to_exitcode(status))
+        self._respawn()
+
+    def _worker_exited(self, pid: int, code: int):
+        started = self.workers.pop(pid, None)
+        retired = self.retiring.pop(pid, None) is not None
+        booting = self.booting.pop(pid, None) is not None
+        if started is None:
+            return
+        if retired or self.stopping:
+            logger.info("워커 %d 종료 (%d)", pid, code)
+        elif booting:
+            # lifespan 실패는 종료 코드 0으로 끝나므로 코드와 관계없이 시작 실패
+            self._record_failure(pid, code, booting=True)
+        elif code == 0:
+            logger.info("워커 %d 재활용 (요청 %d개 처리, %.0f초 실행)", pid, self.options.max_requests,
+                        time.monotonic() - started)
+        else:
+            self._record_failure(pid, code, booting=False)
+
+    def _check_pending_ready(self, timeout: float):
+        readable, _, _ = select.select([self._wakeup_r, *self.pending_ready], [], [], timeout)
+        for fd in readable:
+            if fd == self._wakeup_r:
+                try:
+                    while os.read(self._wakeup_r, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+                continue
+            pid = self.pending_ready.pop(fd)
+            if os.read(fd, 1):
+                self._mark_ready(pid)
+                logger.info("워커 %d 준비", pid)
+            os.close(fd)
+        # 준비 기한을 넘긴 워커는 강제 종료 (회수될 때 시작 실패로 셈)
+        now = time.monotonic()
+        for pid, deadline in list(self.booting.items()):
+            if now > deadline and pid not in self.retiring:
+                logger.error("워커 %d가 %.0f초 안에 준비되지 않아 강제 종료", pid, self.options.startup_timeout)
+                self.booting[pid] = float("inf")
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def _check_memory(self):
+        limit = self.options.max_worker_memory_mb
+        now = time.monotonic()
+        if not limit or now - self._last_memory_check < MEMORY_CHECK_INTERVAL:
+            return
+        self._last_memory_check = now
+        for pid in self.active_workers():
+            private_mb = read_memory(pid).get("Private", 0) / 1024
+            if private_mb > limit:
+                logger.warning("워커 %d 전용 메모리 %.0fMB > %.0fMB - 재활용", pid, private_mb, limit)
+                self.retire(pid)
+        self._respawn()
+
+    def _kill_overdue(self):
+        now = time.monotonic()
+        for pid, deadline in list(self.retiring.items()):
+            if now > deadline:
+                logger.warning("워커 %d가 정상 종료 시간을 넘겨 강제 종료", pid)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    # 시그널 처리
+
+    def rolling_restart(self):
+        """워커를 하나씩 교체 (새 워커가 준비된 뒤 이전 워커 종료)"""
+        logger.info("워커 %d개 순차 재시작", len(self.active_workers()))
+        for old_pid in self.active_workers():
+            pid, fd = self.spawn()
+            if not self.wait_ready({fd: pid}, self.options.startup_timeout):
+                logger.error("새 워커가 준비되지 않아 재시작 중단 (기존 워커 유지)")
+                self.retire(pid)
+                return
+            self.retire(old_pid)
+        logger.info("순차 재시작 완료: %s", _format_memory(memory_report(os.getpid(), self.active_workers())))
+
+    def stop_workers(self):
+        for pid in list(self.workers):
+            self.retire(pid)
+        while self.workers:
+            self._reap()
+            self._kill_overdue()
+            time.sleep(0.1)
+        for fd in self.pending_ready:
+            os.close(fd)
+        self.pending_ready.clear()
+
+    def reexec(self):
+        """워커를 정상 종료하고 같은 리스닝 소켓으로 마스터를 새로 실행"""
+        logger.info("마스터 재실행 (리스닝 소켓 유지)")
+        self.stopping = True
+        self.stop_workers()
+        fd = self.sock.fileno()
+        os.set_inheritable(fd, True)
+        os.environ[LISTEN_FD_ENV] = str(fd)
+        signal.set_wakeup_fd(-1)
+        shutdown_logging()
+        os.execv(sys.executable, self.exec_args)
+
+    def _handle_signals(self):
+        while self.signals:
+            signum = self.signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                logger.info("종료 시그널 - 워커 정상 종료")
+                self.stopping = True
+            elif signum == signal.SIGHUP:
+                self.rolling_restart()
+            elif signum == signal.SIGUSR1:
+                for pid in [os.getpid(), *self.workers]:
+                    logger.warning("pid %d 메모리(kB): %s", pid, read_memory(pid))
+            elif signum == signal.SIGUSR2 and self.exec_args:
+                self.reexec()
+
+    # 실행
+
+    def run(self) -> int:
+        start = time.perf_counter()
+        self.sock = self._listen()
+        if self.options.preload:
+            self._preload()
+        self._install_signals()
+
+        pending = {}
+        for _ in range(self.options.workers):
+            pid, fd = self.spawn()
+            pending[fd] = pid
+        ready = self.wait_ready(pending, self.options.startup_timeout)
+        if not ready:
+            logger.error("준비된 워커가 없어 종료합니다")
+            self.stopping = True
+            self.stop_workers()
+            return 1
+
+        startup_seconds = time.perf_counter() - start
+        report = memory_report(os.getpid(), ready)
+        logger.warning("워커 %d개 준비 (%s, %.2f초, %s)", len(ready), "프리로드" if self.options.preload else "워커별 로드",
+                       startup_seconds, _format_memory(report))
+        if self.options.ready_file:
+            Path(self.options.ready_file).write_text(json.dumps(
+                {"startup_seconds": startup_seconds, "master": os.getpid(), "workers": ready, **report}
+            ))
+
+        while not self.stopping:
+            self._handle_signals()
+            self._reap()
+            self._check_memory()
+            self._kill_overdue()
+            if not self.stopping:
+                self._check_pending_ready(1.0)
+        self.stop_workers()
+        self.sock.close()
+        return self.exit_code
+
+
+# --- 벤치마크 ---
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_bench(app: str, worker_counts: Sequence[int], startup_timeout: float = 300.0) -> List[Dict[str, float]]:
+    """프리로드/워커별 로드 각각 워커 수별로 실행해 시작 시간과 총 메모리 측정"""
+    results = []
+    for preload in (True, False):
+        for workers in worker_counts:
+            with tempfile.TemporaryDirectory() as tmp:
+                ready_file = Path(tmp) / "ready.json"
+                command = [sys.executable, "-m", "app.core.prefork", "serve", "--app", app, "--host", "127.0.0.1",
+                           "--port", str(_free_port()), "--workers", str(workers), "--ready-file", str(ready_file)]
+                if not preload:
+                    command.append("--no-preload")
+                process = subprocess.Popen(command)
+                try:
+                    deadline = time.monotonic() + startup_timeout
+                    while not ready_file.exists():
+                        if process.poll() is not None or time.monotonic() > deadline:
+                            raise RuntimeError(f"실행기가 준비되지 않았습니다: {' '.join(command)}")
+                        time.sleep(0.1)
+                    info = json.loads(ready_file.read_text())
+                    report = memory_report(info["master"], info["workers"])
+                finally:
+                    process.send_signal(signal.SIGTERM)
+                    process.wait(timeout=60)
+            results.append({"mode": "preload" if preload else "per-worker", "workers": workers,
+                            "startup_seconds": info["startup_seconds"], **report})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프리포크 멀티 워커 실행기")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="마스터에서 앱을 로드하고 워커를 fork해 서비스")
+    serve_parser.add_argument("--app", default="main:app", help="ASGI 앱 (모듈:변수)")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--workers", type=int, default=2)
+    serve_parser.add_argument("--no-preload", dest="preload", action="store_false",
+                              help="마스터에서 앱을 로드하지 않고 워커마다 로드 (uvicorn --workers와 같은 방식)")
+    serve_parser.add_argument("--max-requests", type=int, default=0, help="워커당 처리 요청 수 후 재활용 (0: 사용 안 함)")
+    serve_parser.add_argument("--max-requests-jitter", type=int, default=0, help="max-requests에 더할 무작위 범위")
+    serve_parser.add_argument("--max-worker-memory-mb", type=float, default=0.0,
+                              help="워커 전용 메모리가 이 값을 넘으면 재활용 (0: 사용 안 함)")
+    serve_parser.add_argument("--graceful-timeout", type=float, default=30.0, help="정상 종료 시 요청 완료 대기 시간 (초)")
+    serve_parser.add_argument("--startup-timeout", type=float, default=300.0, help="워커 준비 대기 시간 (초)")
+    serve_parser.add_argument("--max-startup-failures", type=int, default=5,
+                              help="워커가 준비 전에 연달아 이만큼 죽으면 마스터 종료 (0: 계속 재시도)")
+    serve_parser.add_argument("--backlog", type=int, default=2048)
+    serve_parser.add_argument("--log-level", default="warning", help="uvicorn 로그 레벨")
+    serve_parser.add_argument("--ready-file", help="워커가 모두 준비되면 시작 시간/PID/메모리를 JSON으로 기록")
+
+    bench_parser = subparsers.add_parser("bench", help="프리로드 vs 워커별 로드의 시작 시간과 총 메모리 비교")
+    bench_parser.add_argument("--app", default="main:app")
+    bench_parser.add_argument("--workers", default="1,2,4", help="워커 수 목록 (쉼표 구분)")
+    bench_parser.add_argument("--startup-timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        options = PreforkOptions(
+            app=args.app, host=args.host, port=args.port, workers=args.workers, preload=args.preload,
+            max_requests=args.max_requests, max_requests_jitter=args.max_requests_jitter,
+            max_worker_memory_mb=args.max_worker_memory_mb, graceful_timeout=args.graceful_timeout,
+            startup_timeout=args.startup_timeout, max_startup_failures=args.max_startup_failures, backlog=args.backlog, log_level=args.log_level,
+            ready_file=args.ready_file,
+        )
+        exec_args = [sys.executable, "-m", "app.core.prefork", *sys.argv[1:]]
+        sys.exit(Arbiter(options, exec_args).run())
+
+    elif args.command == "bench":
+        counts = [int(value) for value in args.workers.split(",") if value.strip()]
+        print(f"{'mode':12s} {'workers':>7s} {'startup(s)':>10s} {'RSS합(MB)':>10s} {'PSS합(MB)':>10s} "
+              f"{'워커전용(MB)':>12s}")
+        for row in run_bench(args.app, counts, args.startup_timeout):
+            print(f"{row['mode']:12s} {row['workers']:7d} {row['startup_seconds']:10.2f} {row['total_rss_mb']:10.0f} "
+                  f"{row['total_pss_mb']:10.0f} {row['worker_private_mb']:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
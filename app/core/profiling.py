@@ -0,0 +1,243 @@
+"""
+요청 단위 샘플링 프로파일러.
+
+특정 요청이 느릴 때 Gemini 대기인지, DB인지, PIL/Keras 연산인지 보기 위한 선택적 프로파일링입니다.
+프로파일링하는 요청 동안만 샘플러 스레드가 PROFILE_INTERVAL_MS마다 스레드별 호출 스택을 모아
+접힌 스택(folded, "스레드;함수;함수 샘플수") 형식으로 PROFILE_DIR에 저장합니다. (speedscope, flamegraph.pl로 열 수 있음)
+
+- PROFILE_TOKEN: 설정하지 않으면 프로파일링 전체 비활성 (미들웨어는 바로 다음 앱을 호출)
+- 요청 헤더 X-Profile: <PROFILE_TOKEN> 인 요청, 또는 관리 API로 예약한 다음 N개 요청을 프로파일링
+  (예약은 path 접두사로 대상을 좁힐 수 있고, /metrics 스크레이프와 관리 API 자신은 예약 횟수를 쓰지 않음)
+- 동시에 하나의 요청만 프로파일링 (샘플러는 프로세스 전체 스택을 보므로, 다른 요청은 그대로 통과)
+- PROFILE_INTERVAL_MS (5): 샘플 간격, PROFILE_KEEP (50): 보관할 프로파일 수
+
+이벤트 루프 스레드의 샘플에는 같은 시간에 처리된 다른 요청의 코루틴도 섞입니다.
+select 대기(외부 I/O)와 루프/스레드 풀의 CPU 시간을 나누는 용도로 보고, 단계별 시간은 Server-Timing 헤더로 확인합니다.
+"""
+import asyncio
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import orjson
+from dotenv import load_dotenv
+
+from app.core.log import get_logger, request_id_var
+
+load_dotenv(dotenv_path=".env")
+
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN", "")
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", "profiles"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+MAX_STACK_DEPTH = 128
+_PROFILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,80}$")
+# 예약한 프로파일링에서 제외하는 경로 (주기적으로 들어오는 스크레이프, 프로파일 조회 자체)
+ARM_EXCLUDED_PATHS = ("/metrics", "/admin/profiling")
+# 루프 스레드가 아닌 스레드에서 이 파일의 함수가 맨 위면 대기 중(스레드 풀 유휴, 로그 큐 대기)으로 보고 제외
+_IDLE_FILES = ("threading.py", "queue.py")
+
+logger = get_logger(__name__)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """별도 스레드에서 주기적으로 sys._current_frames()를 읽어 접힌 스택별 샘플 수를 셈"""
+
+    def __init__(self, interval: float, loop_thread: int):
+        self.interval = interval
+        self.loop_thread = loop_thread
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if ident != self.loop_thread and os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                stack: List[str] = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+def folded(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class ProfileStore:
+    """프로파일 JSON 파일 저장/조회 (PROFILE_KEEP개 초과분은 오래된 것부터 삭제)"""
+
+    def __init__(self, directory: Path, keep: int):
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, profile_id: str) -> Optional[Path]:
+        if not _PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        return self.directory / f"{profile_id}.json"
+
+    def save(self, profile: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path(profile["id"]).write_bytes(orjson.dumps(profile))
+        files = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in files[:max(0, len(files) - self.keep)]:
+            path.unlink(missing_ok=True)
+
+    def load(self, profile_id: str) -> Optional[dict]:
+        path = self._path(profile_id)
+        if path is None or not path.is_file():
+            return None
+        return orjson.loads(path.read_bytes())
+
+    def list(self) -> List[dict]:
+        """최근 순 요약 (스택 제외)"""
+        if not self.directory.is_dir():
+            return []
+        summaries = []
+        for path in sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True):
+            profile = orjson.loads(path.read_bytes())
+            profile.pop("folded", None)
+            summaries.append(profile)
+        return summaries
+
+
+profile_store = ProfileStore(PROFILE_DIR, PROFILE_KEEP)
+
+
+class ProfilingState:
+    """관리 API로 예약한 남은 프로파일링 횟수와, 현재 프로파일링 중인지 여부"""
+
+    def __init__(self):
+        self.remaining = 0
+        self.path_prefix: Optional[str] = None
+        self._lock = threading.Lock()
+        self._active = threading.Lock()
+
+    def arm(self, count: int, path_prefix: Optional[str] = None):
+        with self._lock:
+            self.remaining = max(0, count)
+            self.path_prefix = path_prefix or None
+
+    @staticmethod
+    def _matches(path: str, prefix: str) -> bool:
+        return path == prefix or path.startswith(prefix.rstrip("/") + "/")
+
+    def take_armed(self, path: str) -> bool:
+        # 예약이 없을 때(대부분의 요청)는 잠금 없이 바로 반환
+        if self.remaining <= 0:
+            return False
+        if any(self._matches(path, excluded) for excluded in ARM_EXCLUDED_PATHS):
+            return False
+        with self._lock:
+            if self.remaining <= 0 or (self.path_prefix and not self._matches(path, self.path_prefix)):
+                return False
+            self.remaining -= 1
+            return True
+
+    def try_begin(self) -> bool:
+        return self._active.acquire(blocking=False)
+
+    def end(self):
+        self._active.release()
+
+
+profiling_state = ProfilingState()
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN)
+
+
+def check_token(token: Optional[str]) -> bool:
+    return profiling_enabled() and token is not None and secrets.compare_digest(token, PROFILE_TOKEN)
+
+
+class ProfilingMiddleware:
+    """X-Profile 헤더 또는 예약된 요청에 한해 샘플러를 붙여 실행 (ASGI 미들웨어). 응답 헤더 X-Profile-Id로 결과 ID 반환"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER:
+                return check_token(value.decode("latin-1"))
+        return profiling_state.take_armed(scope.get("path", ""))
+
+    async def __call__(self, scope, receive, send):
+        if not PROFILE_TOKEN or scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        if not profiling_state.try_begin():
+            logger.info("다른 요청을 프로파일링 중 - 프로파일 없이 처리: %s", scope.get("path"))
+            await self.app(scope, receive, send)
+            return
+
+        request_id = request_id_var.get()
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}_{request_id if request_id != '-' else uuid.uuid4().hex[:16]}"
+        status = [500]
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message["headers"] = list(message.get("headers", ())) + [(PROFILE_ID_HEADER, profile_id.encode("latin-1"))]
+            await send(message)
+
+        sampler = StackSampler(PROFILE_INTERVAL_MS / 1000, threading.get_ident())
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            stacks = sampler.stop()
+            duration = time.perf_counter() - start
+            profiling_state.end()
+            profile: Dict = {
+                "id": profile_id,
+                "method": scope.get("method", ""),
+                "path": scope.get("path", ""),
+                "status": status[0],
+                "created": time.time(),
+                "duration_ms": round(duration * 1000, 1),
+                "interval_ms": PROFILE_INTERVAL_MS,
+                "samples": sampler.samples,
+                "folded": folded(stacks),
+            }
+            try:
+                await asyncio.to_thread(profile_store.save, profile)
+                logger.info("프로파일 저장: %s (%s %s, %.1fms, 샘플 %d)", profile_id, profile["method"],
+                            profile["path"], profile["duration_ms"], sampler.samples)
+            except OSError as e:
+                logger.error("프로파일 저장 실패: %s", e)
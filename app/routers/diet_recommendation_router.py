@@ -1,14 +1,16 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from datetime import date
+from app.core.log import get_logger, log_payload
 from app.services.food_consult_service import process_question, process_goal
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 router = APIRouter(
     prefix="/diet",
     tags=["diet"],
     responses={404: {"description": "Not found"}},
 )
+logger = get_logger(__name__)
 
 class DietRecommendationRequest(BaseModel):
     id: float
@@ -18,14 +20,17 @@ class GoalRequest(BaseModel):
     target_weight: float
     end_date: date
 
+def _pop_degraded(result) -> bool:
+    """LLM 장애로 로컬/이전 결과를 대신 쓴 응답인지 여부 (data에서는 제거)"""
+    return bool(isinstance(result, dict) and result.pop("degraded", False))
+
 @router.post("/recommendation", summary="개인 맞춤형 식단 추천", description="사용자의 건강 데이터를 기반으로 맞춤형 식단을 추천합니다.")
 async def get_diet_recommendation(request: DietRecommendationRequest):
     try:
-        recommendation = process_question(request.id)
-        return JSONResponse(content={"data": recommendation})
+        recommendation = await process_question(request.id)
+        return ORJSONResponse(content={"data": recommendation, "degraded": _pop_degraded(recommendation)})
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("식단 추천 생성 중 오류: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"식단 추천 생성 중 오류가 발생했습니다: {str(e)}"
@@ -34,16 +39,15 @@ async def get_diet_recommendation(request: DietRecommendationRequest):
 @router.post("/goal-nutrition", summary="개인 맞춤형 영양소 추천", description="사용자의 목표를 기반으로 맞춤형 영양소를 추천합니다.")
 async def get_goal_nutrition(request: GoalRequest):
     try:
-        recommendation = process_goal(
+        recommendation = await process_goal(
             id=request.id,
             target_weight=request.target_weight,
             end_date=request.end_date
         )
-        print(f"Recommendation result: {recommendation}")
-        return JSONResponse(content={"data": recommendation})
+        log_payload(logger, "Recommendation result", recommendation)
+        return ORJSONResponse(content={"data": recommendation, "degraded": _pop_degraded(recommendation)})
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("영양소 추천 생성 중 오류: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"영양소 추천 생성 중 오류가 발생했습니다: {str(e)}"
@@ -1,18 +1,52 @@
 # app/routers/hPrediction_router.py
+import os
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 import numpy as np
 import joblib
-from tensorflow.keras.models import load_model
+from app.core.log import get_logger
+from app.services.dense_model import UnsupportedModelError, load_dense_model
+from app.core.metrics import (
+    STAGE_MODEL_CARDIOVASCULAR, STAGE_MODEL_DIABETES, STAGE_MODEL_HYPERTENSION, STAGE_SCALER, stage,
+)
 
 router = APIRouter(prefix="/predict", tags=["predict"])  # router 객체 정의
+logger = get_logger(__name__)
 
-# 모델 로드
-dia_model = load_model("app/model/diabetes_predict.h5")
-hpt_model = load_model("app/model/hypertension_predict.h5")
-cdv_model = load_model("app/model/cardiovascular_predict.h5")
+# 스케일러는 import 시 로드 (프리포크 마스터에서 한 번 읽어 워커들과 공유)
 scaler = joblib.load("app/model/scaler.pkl")
 
+MODEL_FILES = {
+    "diabetes": "app/model/diabetes_predict.h5",
+    "hypertension": "app/model/hypertension_predict.h5",
+    "cardiovascular": "app/model/cardiovascular_predict.h5",
+}
+
+# 예측 모델(Dense만으로 된 MLP)도 import 시 NumPy 가중치로 로드 (app/services/dense_model.py).
+# TensorFlow 없이 추론하므로 프리포크 마스터(app/core/prefork.py)가 한 번 읽고 워커들이 copy-on-write로 공유.
+# NumPy로 재현할 수 없는 모델이면 None으로 두고 워커 시작(lifespan) 시 TensorFlow로 로드
+# (TensorFlow 런타임은 fork 후 자식에서 쓸 수 없으므로 마스터에서는 import하지 않음)
+try:
+    dia_model = load_dense_model(MODEL_FILES["diabetes"])
+    hpt_model = load_dense_model(MODEL_FILES["hypertension"])
+    cdv_model = load_dense_model(MODEL_FILES["cardiovascular"])
+except UnsupportedModelError as e:
+    logger.warning("NumPy 추론을 쓸 수 없어 워커에서 TensorFlow로 로드: %s", e)
+    dia_model = hpt_model = cdv_model = None
+
+
+def load_prediction_models():
+    """예측 모델 3개 로드 (import 시 NumPy로 로드했으면 그대로)"""
+    global dia_model, hpt_model, cdv_model
+    if dia_model is not None:
+        return
+    from tensorflow.keras.models import load_model
+
+    dia_model = load_model(MODEL_FILES["diabetes"])
+    hpt_model = load_model(MODEL_FILES["hypertension"])
+    cdv_model = load_model(MODEL_FILES["cardiovascular"])
+    logger.info("예측 모델 TensorFlow 로드 완료 (pid %d)", os.getpid())
+
 # 입력 데이터 검증을 위한 Pydantic 모델
 class PredictRequest(BaseModel):
     memberId:float
@@ -58,15 +92,19 @@ async def predict_health(request: PredictRequest):
             bmi
         ]])
         
-        print(PredictRequest)
+        logger.debug("예측 요청: %s", request)
 
         # 데이터 스케일링
-        input_data_scaled = scaler.transform(input_data)
+        with stage(STAGE_SCALER):
+            input_data_scaled = scaler.transform(input_data)
 
         # 예측
-        dia_proba = dia_model.predict(input_data_scaled, verbose=0)[0][0]
-        hpt_proba = hpt_model.predict(input_data_scaled, verbose=0)[0][0]
-        cdv_proba = cdv_model.predict(input_data_scaled, verbose=0)[0][0]
+        with stage(STAGE_MODEL_DIABETES):
+            dia_proba = dia_model.predict(input_data_scaled, verbose=0)[0][0]
+        with stage(STAGE_MODEL_HYPERTENSION):
+            hpt_proba = hpt_model.predict(input_data_scaled, verbose=0)[0][0]
+        with stage(STAGE_MODEL_CARDIOVASCULAR):
+            cdv_proba = cdv_model.predict(input_data_scaled, verbose=0)[0][0]
 
         return {
             "diabetes": float(dia_proba),
@@ -75,5 +113,5 @@ async def predict_health(request: PredictRequest):
         }
 
     except Exception as e:
-        print("예측 중 예외 발생:", e)
+        logger.exception("예측 중 예외 발생: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
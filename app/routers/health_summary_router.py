@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+from app.services.health_summary_service import record_food, record_prediction, refresh_member
+from app.services.nutrition_aggregate_service import invalidate_member_days
+
+router = APIRouter(prefix="/summary", tags=["summary"])
+
+class FoodRecordEvent(BaseModel):
+    memberId: float
+    consumedDate: datetime
+    foodName: Optional[str] = None
+    mealTime: Optional[str] = None
+    calories: float = 0
+    protein: float = 0
+    carbohydrates: float = 0
+    fat: float = 0
+    fiber: float = 0
+    sugar: float = 0
+    water: float = 0
+    sodium: float = 0
+
+class PredictRecordEvent(BaseModel):
+    memberId: float
+    diabetes: float
+    hypertension: float
+    cardiovascular: float
+    regDate: Optional[datetime] = None
+
+@router.post("/food-record", summary="음식 기록 추가 반영", description="tb_food_record에 기록이 추가되면 호출하여 회원 요약의 일별 버킷을 갱신합니다.")
+async def on_food_record(event: FoodRecordEvent):
+    try:
+        await record_food(
+            event.memberId,
+            event.consumedDate,
+            {
+                "calories": event.calories,
+                "protein": event.protein,
+                "carbohydrates": event.carbohydrates,
+                "fat": event.fat,
+                "fiber": event.fiber,
+                "sugar": event.sugar,
+                "water": event.water,
+                "sodium": event.sodium,
+            },
+            food_name=event.foodName,
+            meal_time=event.mealTime,
+        )
+        invalidate_member_days(event.memberId, event.consumedDate)
+        return {"status": "ok"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"요약 갱신 중 오류가 발생했습니다: {str(e)}")
+
+@router.post("/predict-record", summary="예측 기록 반영", description="tb_predict_record에 예측 결과가 저장되면 호출하여 회원 요약의 최신 예측을 갱신합니다.")
+async def on_predict_record(event: PredictRecordEvent):
+    try:
+        await record_prediction(event.memberId, event.diabetes, event.hypertension, event.cardiovascular, event.regDate)
+        return {"status": "ok"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"요약 갱신 중 오류가 발생했습니다: {str(e)}")
+
+@router.post("/members/{member_id}/refresh", summary="회원 요약 재계산", description="음식 기록 수정/삭제 후 호출하여 해당 회원의 요약을 원본 테이블에서 다시 계산합니다.")
+async def refresh_member_summary(member_id: int):
+    try:
+        await refresh_member(member_id)
+        invalidate_member_days(member_id)
+        return {"status": "ok"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"요약 재계산 중 오류가 발생했습니다: {str(e)}")
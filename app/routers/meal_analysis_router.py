@@ -1,20 +1,91 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from app.services.meal_service import analyze_meal
+import asyncio
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from app.services.meal_service import analyze_meal, analyze_meals
+from app.services.analysis_job_service import get_job_queue
+from app.services.circuit_breaker import CircuitOpenError
 
 router = APIRouter()
 
 class ImagePath(BaseModel):
     file_path: str
 
+class ImagePaths(BaseModel):
+    file_paths: List[str] = Field(..., min_length=1, max_length=10)
+
 @router.post("/analyze/image")
 async def analyze_meal_endpoint(image_path: ImagePath):
     try:
-        result = analyze_meal(image_path.file_path)
+        result = await analyze_meal(image_path.file_path)
         return result
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="이미지 파일을 찾을 수 없습니다.")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except CircuitOpenError as e:
+        # 로컬 대체 수단이 없으므로 타임아웃까지 기다리지 않고 바로 503
+        raise HTTPException(status_code=503, detail=f"이미지 분석을 일시적으로 사용할 수 없습니다: {str(e)}",
+                            headers={"Retry-After": str(max(int(e.retry_in), 1))})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"분석 중 오류 발생: {str(e)}")
+
+@router.post("/analyze/images",
+             summary="여러 식단 이미지 일괄 분석",
+             description="아침/점심/저녁/간식 등 여러 이미지를 동시에 분석하고 이미지별 결과와 하루 총 영양소를 반환합니다.")
+async def analyze_meals_endpoint(image_paths: ImagePaths):
+    try:
+        return await analyze_meals(image_paths.file_paths)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"분석 중 오류 발생: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"분석 중 오류 발생: {str(e)}")
+
+
+def _job_response(job: dict) -> dict:
+    """작업 레코드를 API 응답 형식으로 변환"""
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "submitted_at": job["submitted_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": {"status_code": job["error_status"], "detail": job["error"]} if job["error"] else None,
+    }
+
+@router.post("/analyze/image/jobs", status_code=202,
+             summary="이미지 분석 작업 제출",
+             description="이미지 분석을 비동기 작업으로 등록하고 작업 ID를 즉시 반환합니다.")
+async def submit_analysis_job(image_path: ImagePath):
+    try:
+        job = await get_job_queue().submit(image_path.file_path)
+        return _job_response(job)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="이미지 파일을 찾을 수 없습니다.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/analyze/image/jobs/{job_id}",
+            summary="이미지 분석 작업 조회",
+            description="작업 상태와 결과를 조회합니다. wait(초)를 지정하면 완료될 때까지 최대 그 시간만큼 대기합니다.")
+async def get_analysis_job(job_id: str, wait: float = Query(0, ge=0, le=30)):
+    job = await get_job_queue().get(job_id, wait=wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return _job_response(job)
+
+@router.get("/analyze/image/jobs",
+            summary="이미지 분석 작업 일괄 조회",
+            description="여러 작업 ID의 상태를 한 번에 조회하거나, status로 대기/진행 중인 작업 목록을 조회합니다.")
+async def list_analysis_jobs(ids: Optional[List[str]] = Query(None),
+                             status: Optional[str] = Query(None),
+                             limit: int = Query(100, ge=1, le=500)):
+    queue = get_job_queue()
+    if ids:
+        if len(ids) > 100:
+            raise HTTPException(status_code=400, detail="한 번에 최대 100개의 작업만 조회할 수 있습니다.")
+        jobs = await queue.get_many(ids)
+    elif status:
+        jobs = await asyncio.to_thread(queue.store.list_by_status, status, limit)
+    else:
+        return {"counts": await asyncio.to_thread(queue.store.count_by_status)}
+    return {"jobs": [_job_response(job) for job in jobs]}
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import CONTENT_TYPE
+from app.services.metrics_service import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus 스크레이프용 텍스트 형식 메트릭"""
+    return PlainTextResponse(await render_metrics(), media_type=CONTENT_TYPE)
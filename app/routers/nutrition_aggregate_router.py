@@ -0,0 +1,62 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.core.log import get_logger
+from app.services.llm_json import dumps
+from app.services.nutrition_aggregate_service import (
+    AggregateRangeError, get_daily_nutrition, iter_daily_nutrition, validate_range,
+)
+
+router = APIRouter(prefix="/nutrition", tags=["nutrition"])
+logger = get_logger(__name__)
+
+
+@router.get("/daily", summary="일별 섭취 영양소 집계", description="저장된 음식 기록(tb_food_record)에서 회원의 날짜별/끼니별 영양소 합계를 계산합니다. (LLM 미사용)")
+async def get_daily_nutrition_summary(
+    memberId: float,
+    start: date,
+    end: Optional[date] = None,
+    includeEmpty: bool = Query(False, description="기록이 없는 날짜도 0으로 포함"),
+    stream: bool = Query(False, description="날짜별 결과를 NDJSON(한 줄에 하루)으로 스트리밍"),
+):
+    """
+    회원의 기간별 섭취 영양소를 집계합니다.
+
+    - memberId : 회원 id
+    - start, end : 조회 구간 (YYYY-MM-DD, end 포함, 생략 시 start 하루)
+    - stream : true면 구간 합계 없이 날짜별 결과를 application/x-ndjson으로 바로 내보냄
+      (첫 날짜 전 오류는 500, 스트리밍 도중 오류는 마지막 줄 {"error": ...}로 알림)
+
+    Returns:
+        날짜별 {"date", "total", "meals"} + 구간 합계(total), 기록일 수, 기록일 평균
+    """
+    end = end or start
+    try:
+        validate_range(start, end)
+    except AggregateRangeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        if stream:
+            days = iter_daily_nutrition(memberId, start, end, includeEmpty)
+            # 첫 날짜까지는 응답 전에 읽어서, 시작부터 실패하면 200 대신 500으로 응답
+            first = await anext(days, None)
+
+            async def ndjson_lines():
+                if first is None:
+                    return
+                yield dumps(first) + b"\n"
+                try:
+                    async for day in days:
+                        yield dumps(day) + b"\n"
+                except Exception as e:
+                    # 상태 코드는 이미 나갔으므로 잘린 응답과 구분되도록 오류 줄로 끝냄
+                    logger.exception("영양소 집계 스트리밍 중 오류: %s", e)
+                    yield dumps({"error": f"영양소 집계 중 오류가 발생했습니다: {str(e)}"}) + b"\n"
+
+            return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+        return {"data": await get_daily_nutrition(memberId, start, end, includeEmpty)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"영양소 집계 중 오류가 발생했습니다: {str(e)}")
@@ -4,6 +4,7 @@ import traceback # 예외 추적을 위해 추가
 from typing import List
 from fastapi.responses import JSONResponse
 from app.services.nutrition_calculate_service import process_question
+from app.services.circuit_breaker import CircuitOpenError
 
 router = APIRouter(prefix="/nutrition", tags=["nutrition"])
 
@@ -33,9 +34,17 @@ async def get_diet_recommendation(request: NutritionRequest):
     """
     try:
         
-        result = process_question(request.foodList)
+        result = await process_question(request.foodList)
+        # 미확인 음식이 남은 부분 결과인지 여부 (LLM 장애 등)
+        degraded = bool(isinstance(result, dict) and result.pop("degraded", False))
         
-        return {"data":result}
+        return {"data":result, "degraded": degraded}
+    except CircuitOpenError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"영양소 계산을 일시적으로 사용할 수 없습니다: {str(e)}",
+            headers={"Retry-After": str(max(int(e.retry_in), 1))}
+        )
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(
@@ -0,0 +1,41 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from app.core.profiling import check_token, profile_store, profiling_enabled, profiling_state
+
+router = APIRouter(prefix="/admin/profiling", tags=["admin"])
+
+class ArmRequest(BaseModel):
+    count: int = 1
+    path: Optional[str] = None  # 이 경로(또는 하위 경로)의 요청만 프로파일링 (예: /diet/analysis)
+
+def _authorize(token: Optional[str]):
+    # PROFILE_TOKEN이 없으면 관리 API도 없는 것처럼 응답
+    if not profiling_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not check_token(token):
+        raise HTTPException(status_code=403, detail="프로파일링 토큰이 올바르지 않습니다.")
+
+@router.post("", summary="다음 요청 프로파일링 예약", description="이후 들어오는 요청 count개를 샘플링 프로파일러로 실행합니다. (0이면 예약 해제, path로 대상 경로 지정, /metrics와 관리 API는 제외)", include_in_schema=False)
+async def arm_profiling(request: ArmRequest, x_profile_token: Optional[str] = Header(None)):
+    _authorize(x_profile_token)
+    profiling_state.arm(request.count, request.path)
+    return {"remaining": profiling_state.remaining, "path": profiling_state.path_prefix}
+
+@router.get("/profiles", summary="저장된 프로파일 목록", include_in_schema=False)
+async def list_profiles(x_profile_token: Optional[str] = Header(None)):
+    _authorize(x_profile_token)
+    return {"remaining": profiling_state.remaining, "path": profiling_state.path_prefix, "profiles": await asyncio.to_thread(profile_store.list)}
+
+@router.get("/profiles/{profile_id}", summary="프로파일 조회", description="format=folded면 flamegraph 도구용 접힌 스택 텍스트를 반환합니다.", include_in_schema=False)
+async def get_profile(profile_id: str, format: str = Query("json", pattern="^(json|folded)$"),
+                      x_profile_token: Optional[str] = Header(None)):
+    _authorize(x_profile_token)
+    profile = await asyncio.to_thread(profile_store.load, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="프로파일을 찾을 수 없습니다.")
+    if format == "folded":
+        return PlainTextResponse(profile["folded"])
+    return profile
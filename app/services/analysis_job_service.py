@@ -0,0 +1,353 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.core.log import get_logger, request_id_var
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.meal_service import analyze_meal, validate_file_path
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# 작업 저장소 및 워커 설정
+JOB_DB_PATH = os.getenv("ANALYSIS_JOB_DB", "analysis_jobs.db")
+JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "4"))
+JOB_RETENTION_SECONDS = int(os.getenv("ANALYSIS_JOB_RETENTION_SECONDS", str(24 * 60 * 60)))
+JOB_POLL_INTERVAL = 0.5
+# running 작업의 소유 기간(초). 소유 프로세스가 주기적으로 연장하고, 연장이 끊긴 작업은 다른 워커가 다시 가져감
+JOB_LEASE_SECONDS = float(os.getenv("ANALYSIS_JOB_LEASE_SECONDS", "60"))
+MAX_LONG_POLL_SECONDS = 30.0
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+TERMINAL_STATUSES = {STATUS_DONE, STATUS_FAILED}
+
+
+class AnalysisJobStore:
+    """SQLite 기반 이미지 분석 작업 저장소 (프로세스 재시작 후에도 유지)"""
+
+    def __init__(self, db_path: str = JOB_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS analysis_job (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                submitted_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT,
+                error_status INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS ix_analysis_job_status_submitted
+                ON analysis_job (status, submitted_at);
+        """)
+        # 처리 중인 큐의 부팅 ID와 소유 기한 (PID는 컨테이너 재시작 후 재사용되므로 쓰지 않음)
+        # 프리포크 워커들이 동시에 열어도 한 곳만 컬럼을 추가하도록 쓰기 잠금 안에서 확인
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(analysis_job)")}
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE analysis_job ADD COLUMN owner TEXT")
+            if "lease_until" not in columns:
+                self._conn.execute("ALTER TABLE analysis_job ADD COLUMN lease_until REAL")
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, file_path: str) -> Dict[str, Any]:
+        """새 작업을 pending 상태로 등록"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO analysis_job (job_id, status, file_path, submitted_at) VALUES (?, ?, ?, ?)",
+                (job_id, STATUS_PENDING, file_path, time.time()),
+            )
+        return self.get(job_id)
+
+    def claim_next(self, owner: str, lease_seconds: float = JOB_LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """가장 먼저 제출된 pending 작업을 owner 소유의 running으로 바꾸고 반환 (여러 프로세스에서도 원자적)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT job_id FROM analysis_job WHERE status = ? ORDER BY submitted_at, rowid LIMIT 1",
+                    (STATUS_PENDING,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                now = time.time()
+                self._conn.execute(
+                    "UPDATE analysis_job SET status = ?, started_at = ?, owner = ?, lease_until = ? WHERE job_id = ?",
+                    (STATUS_RUNNING, now, owner, now + lease_seconds, row["job_id"]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row["job_id"])
+
+    def complete(self, job_id: str, result: Any):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE analysis_job SET status = ?, finished_at = ?, result = ? WHERE job_id = ?",
+                (STATUS_DONE, time.time(), json.dumps(result, ensure_ascii=False), job_id),
+            )
+
+    def save_partial(self, job_id: str, partial: Any):
+        """실행 중 작업의 중간 결과 저장 (이미 끝난 작업은 덮어쓰지 않음)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE analysis_job SET result = ? WHERE job_id = ? AND status = ?",
+                (json.dumps(partial, ensure_ascii=False), job_id, STATUS_RUNNING),
+            )
+
+    def fail(self, job_id: str, error: str, error_status: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE analysis_job SET status = ?, finished_at = ?, error = ?, error_status = ? WHERE job_id = ?",
+                (STATUS_FAILED, time.time(), error, error_status, job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM analysis_job WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def get_many(self, job_ids: List[str]) -> List[Dict[str, Any]]:
+        """여러 작업 상태를 한 번에 조회 (요청 순서 유지, 없는 id는 제외)"""
+        if not job_ids:
+            return []
+        placeholders = ",".join("?" * len(job_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM analysis_job WHERE job_id IN ({placeholders})", list(job_ids)
+            ).fetchall()
+        jobs = {row["job_id"]: self._to_dict(row) for row in rows}
+        return [jobs[job_id] for job_id in job_ids if job_id in jobs]
+
+    def list_by_status(self, status: str, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM analysis_job WHERE status = ? ORDER BY submitted_at LIMIT ?", (status, limit)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM analysis_job GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def renew_leases(self, owner: str, lease_seconds: float = JOB_LEASE_SECONDS) -> int:
+        """owner가 처리 중인 작업의 소유 기한 연장"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE analysis_job SET lease_until = ? WHERE status = ? AND owner = ?",
+                (time.time() + lease_seconds, STATUS_RUNNING, owner),
+            )
+        return cursor.rowcount
+
+    def requeue_expired(self) -> int:
+        """
+        소유 기한이 지난 running 작업(처리하던 프로세스가 죽었거나 멈춤)을 다시 pending으로 되돌림.
+        살아 있는 워커는 기한을 계속 연장하므로 다른 프로세스가 처리 중인 작업은 그대로 둠
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE analysis_job SET status = ?, started_at = NULL, owner = NULL, lease_until = NULL "
+                "WHERE status = ? AND (lease_until IS NULL OR lease_until < ?)",
+                (STATUS_PENDING, STATUS_RUNNING, time.time()),
+            )
+        return cursor.rowcount
+
+    def release(self, job_id: str):
+        """종료 중인 워커가 끝내지 못한 작업을 다른 워커가 가져가도록 pending으로 되돌림"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE analysis_job SET status = ?, started_at = NULL, owner = NULL, lease_until = NULL "
+                "WHERE job_id = ? AND status = ?",
+                (STATUS_PENDING, job_id, STATUS_RUNNING),
+            )
+
+    def purge_finished(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM analysis_job WHERE status IN (?, ?) AND finished_at < ?",
+                (STATUS_DONE, STATUS_FAILED, older_than),
+            )
+        return cursor.rowcount
+
+
+class AnalysisJobQueue:
+    """고정 크기 워커 풀로 analyze_meal 작업을 제출 순서대로 처리"""
+
+    def __init__(self, store: AnalysisJobStore, workers: int = JOB_WORKERS, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.store = store
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        # 프로세스(큐) 실행마다 새로 만드는 부팅 ID. 작업 소유자 표시용
+        self.owner = uuid.uuid4().hex
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._last_purge = 0.0
+        self._last_requeue = 0.0
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        await self._requeue_if_due()
+        await self._purge_if_due()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._renew_leases()))
+        logger.info("워커 %d개 시작", self.workers)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, file_path: str) -> Dict[str, Any]:
+        """경로를 먼저 검증한 뒤 작업 등록 (잘못된 경로는 즉시 ValueError)"""
+        validated_path = validate_file_path(file_path)
+        job = await asyncio.to_thread(self.store.submit, validated_path)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str, wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        """작업 조회. wait > 0이면 완료되거나 시간이 다 될 때까지 대기 (long-poll)"""
+        deadline = time.monotonic() + min(max(wait, 0.0), MAX_LONG_POLL_SECONDS)
+        while True:
+            job = await asyncio.to_thread(self.store.get, job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                self._finished.pop(job_id, None)
+                return job
+            if remaining <= 0:
+                return job
+            # 다른 프로세스의 워커가 처리할 수도 있으므로 이벤트 대기와 주기적 확인을 함께 사용
+            event = self._finished.setdefault(job_id, asyncio.Event())
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(JOB_POLL_INTERVAL, remaining))
+            except asyncio.TimeoutError:
+                pass
+
+    async def get_many(self, job_ids: List[str]) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get_many, job_ids)
+
+    async def _requeue_if_due(self):
+        """소유 기한이 지난 작업 재등록 (소유 기한의 절반마다)"""
+        now = time.monotonic()
+        if self._last_requeue and now - self._last_requeue < self.lease_seconds / 2:
+            return
+        self._last_requeue = now
+        requeued = await asyncio.to_thread(self.store.requeue_expired)
+        if requeued:
+            logger.info("처리가 끊긴 작업 %d건 재등록", requeued)
+
+    async def _renew_leases(self):
+        """처리 중인 작업의 소유 기한을 기한의 1/3마다 연장"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.store.renew_leases, self.owner, self.lease_seconds)
+            except sqlite3.Error as e:
+                logger.warning("작업 소유 기한 연장 실패: %s", e)
+
+    async def _purge_if_due(self):
+        now = time.time()
+        if now - self._last_purge < 60 * 60:
+            return
+        self._last_purge = now
+        purged = await asyncio.to_thread(self.store.purge_finished, now - JOB_RETENTION_SECONDS)
+        if purged:
+            logger.info("보관 기간이 지난 작업 %d건 삭제", purged)
+
+    async def _worker(self, worker_id: int):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim_next, self.owner, self.lease_seconds)
+            except sqlite3.Error as e:
+                logger.warning("worker-%d 작업 가져오기 실패: %s", worker_id, e)
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL * 4)
+                except asyncio.TimeoutError:
+                    await self._requeue_if_due()
+                    await self._purge_if_due()
+                continue
+
+            job_id = job["job_id"]
+            # 작업 중 남긴 로그는 작업 ID로 묶어 볼 수 있도록
+            request_id_var.set(job_id)
+            received = []
+
+            def on_item(item, job_id=job_id, received=received):
+                # 스트리밍 중 음식 하나가 완성될 때마다 running 작업의 result에 중간 결과로 기록
+                received.append(item)
+                asyncio.get_running_loop().run_in_executor(
+                    None, self.store.save_partial, job_id, {"nutrition_data": list(received), "partial": True}
+                )
+
+            try:
+                result = await analyze_meal(job["file_path"], on_item=on_item)
+                await asyncio.to_thread(self.store.complete, job_id, result)
+            except asyncio.CancelledError:
+                # 워커 종료(재시작/리로드) 중이면 작업을 되돌려 다른 워커가 처리
+                self.store.release(job_id)
+                raise
+            except FileNotFoundError:
+                await asyncio.to_thread(self.store.fail, job_id, "이미지 파일을 찾을 수 없습니다.", 404)
+            except ValueError as e:
+                await asyncio.to_thread(self.store.fail, job_id, str(e), 400)
+            except CircuitOpenError as e:
+                await asyncio.to_thread(self.store.fail, job_id, f"이미지 분석을 일시적으로 사용할 수 없습니다: {str(e)}", 503)
+            except Exception as e:
+                logger.error("worker-%d 작업 %s 실패: %s", worker_id, job_id, e)
+                await asyncio.to_thread(self.store.fail, job_id, f"분석 중 오류 발생: {str(e)}", 500)
+            finally:
+                event = self._finished.pop(job_id, None)
+                if event is not None:
+                    event.set()
+
+
+# 싱글톤 작업 큐
+job_queue_instance: Optional[AnalysisJobQueue] = None
+
+
+def get_job_queue() -> AnalysisJobQueue:
+    """AnalysisJobQueue 싱글톤 제공"""
+    global job_queue_instance
+    if job_queue_instance is None:
+        job_queue_instance = AnalysisJobQueue(AnalysisJobStore())
+    return job_queue_instance
@@ -0,0 +1,366 @@
+"""
+Parquet / Arrow IPC 파일 일괄 위험도 예측.
+
+분석팀이 내보낸 코호트 파일(수백만 행)을 /predict/health로 한 건씩 보내지 않고 파일 단위로 당뇨/고혈압/심혈관 위험도를 계산합니다.
+
+- 입력을 record batch 단위로 스트리밍해 읽고(파일 전체를 메모리에 올리지 않음) 컬럼을 PredictRequest 필드에 매핑
+- 배치마다 컬럼을 NumPy로 가져와(null 없는 float64 컬럼은 Arrow 버퍼를 복사 없이 그대로) 특성 행렬을 채우고,
+  BMI 계산과 표준화(scaler.pkl)를 행렬 안에서 바로 수행
+- 예측은 프로세스 풀 워커가 모델 3개를 한 번씩 로드해 배치 단위로 수행
+- 처리 중인 배치 수를 --max-inflight로 제한하고 결과를 입력 순서대로 Parquet에 이어 씀 (메모리 사용량은 입력 크기와 무관)
+
+컬럼 매핑: 기본은 PredictRequest 필드 이름(memberId, age, dailySodium, ...) 또는 snake_case 이름(member_id, daily_sodium, ...).
+다르면 --map 필드=컬럼 으로 지정합니다. 특성 값이 null/NaN이거나 키가 0 이하인 행은 확률을 null로 씁니다.
+
+    python -m app.services.bulk_risk_scoring score cohort.parquet risk.parquet [--workers 4] [--batch-size 65536]
+        [--map age=age_years] [--keep memberId] [--keep-all] [--format parquet|ipc|stream]
+"""
+import argparse
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+MODEL_DIR = "app/model"
+SCALER_FILE = "scaler.pkl"
+# 출력 컬럼 이름 -> 모델 파일 (/predict/health 응답 키와 같음)
+MODEL_FILES = {
+    "diabetes": "diabetes_predict.h5",
+    "hypertension": "hypertension_predict.h5",
+    "cardiovascular": "cardiovascular_predict.h5",
+}
+OUTPUT_COLUMNS = list(MODEL_FILES)
+
+ID_FIELD = "memberId"
+# /predict/health 입력 행렬의 열 순서 (마지막 열 BMI는 height/weight로 계산)
+FEATURE_FIELDS = [
+    "age", "gender", "historyDiabetes", "historyHypertension", "historyCardiovascular",
+    "smokeDaily", "drinkWeekly", "exerciseWeekly", "dailyCarbohydrate", "dailySugar",
+    "dailyFat", "dailySodium", "dailyFibrin", "dailyWater",
+]
+INPUT_FIELDS = FEATURE_FIELDS + ["height", "weight"]
+N_FEATURES = len(FEATURE_FIELDS) + 1
+
+PROGRESS_INTERVAL = 10.0
+
+
+# --- 컬럼 매핑 ---
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def parse_mapping(values: List[str]) -> Dict[str, str]:
+    """["age=age_years", ...] -> {"age": "age_years"}"""
+    mapping = {}
+    for value in values:
+        name, _, column = value.partition("=")
+        if not column:
+            raise ValueError(f"--map 형식은 필드=컬럼 입니다: {value}")
+        if name not in INPUT_FIELDS and name != ID_FIELD:
+            raise ValueError(f"알 수 없는 필드: {name} (가능: {', '.join([ID_FIELD] + INPUT_FIELDS)})")
+        mapping[name] = column
+    return mapping
+
+
+def resolve_columns(column_names: List[str], overrides: Dict[str, str]) -> Dict[str, str]:
+    """필드 -> 입력 컬럼. memberId는 없어도 되고, 나머지 필드가 없으면 ValueError"""
+    names = set(column_names)
+    mapping, missing = {}, []
+    for name in [ID_FIELD] + INPUT_FIELDS:
+        candidates = [overrides[name]] if name in overrides else list(dict.fromkeys([name, _snake_case(name)]))
+        column = next((candidate for candidate in candidates if candidate in names), None)
+        if column is not None:
+            mapping[name] = column
+        elif name != ID_FIELD:
+            missing.append(f"{name}({'/'.join(candidates)})")
+    if missing:
+        raise ValueError(f"입력에 없는 컬럼: {', '.join(missing)} (--map 필드=컬럼 으로 지정)")
+    return mapping
+
+
+# --- 특성 행렬 ---
+
+def _column_values(array: pa.Array) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """(float64 값, 유효 여부 또는 None). null 없는 float64 컬럼은 복사 없이 Arrow 버퍼를 그대로 봄 (읽기 전용)"""
+    valid = None
+    if array.null_count:
+        valid = array.is_valid().to_numpy(zero_copy_only=False)
+        array = pc.fill_null(array, 0)
+    if array.type != pa.float64():
+        array = pc.cast(array, pa.float64())
+    return array.to_numpy(zero_copy_only=True), valid
+
+
+def scale_in_place(features: np.ndarray, scaler: Any) -> np.ndarray:
+    """StandardScaler면 새 배열을 만들지 않고 행렬 안에서 표준화, 그 외 scaler는 transform 결과 반환"""
+    if hasattr(scaler, "mean_") and hasattr(scaler, "scale_"):
+        if getattr(scaler, "with_mean", True):
+            features -= scaler.mean_
+        if getattr(scaler, "with_std", True):
+            features /= scaler.scale_
+        return features
+    return np.asarray(scaler.transform(features), dtype=np.float64)
+
+
+def build_features(batch: pa.RecordBatch, mapping: Dict[str, str], scaler: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """(표준화된 float32 특성 행렬 (n, N_FEATURES), 유효 행 마스크)"""
+    n = batch.num_rows
+    # 열 단위로 채우므로 열 우선 배열 (열 하나 복사가 연속 메모리 복사)
+    features = np.empty((n, N_FEATURES), dtype=np.float64, order="F")
+    valid = np.ones(n, dtype=bool)
+    for index, name in enumerate(FEATURE_FIELDS):
+        values, column_valid = _column_values(batch.column(mapping[name]))
+        features[:, index] = values
+        if column_valid is not None:
+            valid &= column_valid
+
+    height, height_valid = _column_values(batch.column(mapping["height"]))
+    weight, weight_valid = _column_values(batch.column(mapping["weight"]))
+    for column_valid in (height_valid, weight_valid):
+        if column_valid is not None:
+            valid &= column_valid
+    valid &= height > 0
+
+    # BMI = weight / (height / 100)^2 를 마지막 열에 바로 계산
+    bmi = features[:, -1]
+    np.divide(height, 100, out=bmi)
+    np.square(bmi, out=bmi)
+    np.divide(weight, bmi, out=bmi, where=valid)
+
+    valid &= np.isfinite(features).all(axis=1)
+    if not valid.all():
+        # 무효 행은 0으로 채워 예측만 하고 결과는 null로 씀
+        features[~valid] = 0
+    features = scale_in_place(features, scaler)
+    return np.ascontiguousarray(features, dtype=np.float32), valid
+
+
+# --- 예측 (프로세스 풀 워커) ---
+
+_models: Dict[str, Any] = {}
+
+
+def load_scaler(model_dir: str = MODEL_DIR):
+    import joblib
+
+    scaler = joblib.load(os.path.join(model_dir, SCALER_FILE))
+    n_features = getattr(scaler, "n_features_in_", N_FEATURES)
+    if n_features != N_FEATURES:
+        raise ValueError(f"scaler 입력 특성 수 {n_features} != {N_FEATURES}")
+    return scaler
+
+
+def init_worker(model_dir: str = MODEL_DIR, threads: int = 0):
+    """워커 프로세스마다 한 번 모델 로드 (threads: 워커당 TensorFlow 연산 스레드 수, 0이면 기본값)"""
+    import tensorflow as tf
+    from tensorflow.keras.models import load_model
+
+    if threads:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    for name, file_name in MODEL_FILES.items():
+        _models[name] = load_model(os.path.join(model_dir, file_name))
+
+
+def predict_batch(features: np.ndarray, predict_batch_size: int = 8192) -> np.ndarray:
+    """(모델 수, n) float32 확률 (모델별 행이 연속이라 Arrow 배열로 복사 없이 변환)"""
+    probabilities = np.empty((len(MODEL_FILES), len(features)), dtype=np.float32)
+    if len(features):
+        for index, name in enumerate(OUTPUT_COLUMNS):
+            output = _models[name].predict(features, batch_size=predict_batch_size, verbose=0)
+            probabilities[index] = np.asarray(output).reshape(-1)
+    return probabilities
+
+
+# --- 입출력 ---
+
+def detect_format(path: str) -> str:
+    suffix = os.path.splitext(path.rstrip("/"))[1].lower()
+    if suffix in (".arrow", ".feather", ".ipc"):
+        return "ipc"
+    if suffix == ".arrows":
+        return "stream"
+    return "parquet"
+
+
+def _rebatch(batches: Iterator[pa.RecordBatch], batch_size: int) -> Iterator[pa.RecordBatch]:
+    """batch_size보다 큰 배치를 잘라서 반환 (slice는 복사 없음)"""
+    for batch in batches:
+        for offset in range(0, batch.num_rows, batch_size):
+            yield batch.slice(offset, batch_size)
+
+
+def open_batches(path: str, input_format: str, batch_size: int,
+                 readahead: int) -> Tuple[pa.Schema, Any]:
+    """(입력 스키마, columns -> record batch 이터레이터 함수). Parquet/IPC 파일은 디렉터리(여러 파일)도 가능"""
+    if input_format == "stream":
+        source = pa.memory_map(path)
+        reader = pa.ipc.open_stream(source)
+
+        def read_stream(columns: List[str]) -> Iterator[pa.RecordBatch]:
+            with source:
+                yield from _rebatch((batch.select(columns) for batch in reader), batch_size)
+
+        return reader.schema, read_stream
+
+    dataset = ds.dataset(path, format=input_format)
+
+    def read_dataset(columns: List[str]) -> Iterator[pa.RecordBatch]:
+        scanner = dataset.scanner(columns=columns, batch_size=batch_size, batch_readahead=readahead,
+                                  fragment_readahead=1)
+        return _rebatch(scanner.to_batches(), batch_size)
+
+    return dataset.schema, read_dataset
+
+
+@dataclass
+class ScoringOptions:
+    batch_size: int = 65536
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    threads_per_worker: int = 0
+    max_inflight: int = 0
+    predict_batch_size: int = 8192
+    model_dir: str = MODEL_DIR
+    mapping: Dict[str, str] = field(default_factory=dict)
+    keep: Optional[List[str]] = None
+    keep_all: bool = False
+    input_format: Optional[str] = None
+    compression: str = "zstd"
+
+
+def score_file(input_path: str, output_path: str, options: ScoringOptions) -> Dict[str, float]:
+    """입력 파일 전체를 예측해 output_path(Parquet)에 쓰고 통계 반환. 끝까지 성공해야 output_path가 만들어짐"""
+    input_format = options.input_format or detect_format(input_path)
+    max_inflight = options.max_inflight or max(2, options.workers * 2)
+    schema, read_batches = open_batches(input_path, input_format, options.batch_size, readahead=max_inflight)
+    mapping = resolve_columns(schema.names, options.mapping)
+
+    if options.keep_all:
+        keep = list(schema.names)
+    elif options.keep is not None:
+        keep = options.keep
+    else:
+        keep = [mapping[ID_FIELD]] if ID_FIELD in mapping else []
+    unknown = [name for name in keep if name not in schema.names]
+    if unknown:
+        raise ValueError(f"입력에 없는 --keep 컬럼: {', '.join(unknown)}")
+    conflicts = [name for name in keep if name in OUTPUT_COLUMNS]
+    if conflicts:
+        raise ValueError(f"출력 컬럼과 이름이 겹칩니다: {', '.join(conflicts)}")
+    columns = list(dict.fromkeys(keep + [mapping[name] for name in INPUT_FIELDS]))
+    output_schema = pa.schema([schema.field(name) for name in keep]
+                              + [pa.field(name, pa.float32()) for name in OUTPUT_COLUMNS])
+
+    scaler = load_scaler(options.model_dir)
+    threads = options.threads_per_worker or max(1, (os.cpu_count() or 1) // max(options.workers, 1))
+    stats = {"rows": 0, "invalid_rows": 0, "batches": 0}
+    start = last_progress = time.perf_counter()
+    temp_path = f"{output_path}.tmp"
+    writer = pq.ParquetWriter(temp_path, output_schema, compression=options.compression)
+
+    def write(passthrough: pa.RecordBatch, valid: np.ndarray, probabilities: np.ndarray):
+        mask = None if valid.all() else ~valid
+        arrays = list(passthrough.columns) + [pa.array(row, mask=mask) for row in probabilities]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=output_schema))
+        stats["rows"] += passthrough.num_rows
+        stats["invalid_rows"] += int(passthrough.num_rows - valid.sum())
+        stats["batches"] += 1
+
+    # (통과 컬럼, 유효 마스크, 예측 future) - 입력 순서대로 완료를 기다려 씀
+    pending = deque()
+    executor = None
+    try:
+        if options.workers > 0:
+            # 부모는 TensorFlow를 import하지 않고, 워커는 spawn으로 새로 시작해 모델을 각자 로드
+            executor = ProcessPoolExecutor(options.workers, mp_context=get_context("spawn"), initializer=init_worker,
+                                           initargs=(options.model_dir, threads))
+        else:
+            init_worker(options.model_dir, threads)
+        for batch in read_batches(columns):
+            features, valid = build_features(batch, mapping, scaler)
+            passthrough = batch.select(keep)
+            if executor is None:
+                write(passthrough, valid, predict_batch(features, options.predict_batch_size))
+            else:
+                pending.append((passthrough, valid, executor.submit(predict_batch, features,
+                                                                    options.predict_batch_size)))
+                while len(pending) >= max_inflight:
+                    passthrough, valid, future = pending.popleft()
+                    write(passthrough, valid, future.result())
+
+            now = time.perf_counter()
+            if now - last_progress >= PROGRESS_INTERVAL:
+                last_progress = now
+                logger.info("%d행 처리 (%.0f행/초)", stats["rows"], stats["rows"] / (now - start))
+        while pending:
+            passthrough, valid, future = pending.popleft()
+            write(passthrough, valid, future.result())
+        writer.close()
+        os.replace(temp_path, output_path)
+    except BaseException:
+        writer.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet/Arrow 파일 일괄 건강 위험도 예측")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    score_parser = subparsers.add_parser("score", help="입력 파일의 모든 행을 예측해 Parquet으로 저장")
+    score_parser.add_argument("input", help="입력 Parquet / Arrow IPC 파일 (Parquet/IPC는 디렉터리도 가능)")
+    score_parser.add_argument("output", help="출력 Parquet 파일")
+    score_parser.add_argument("--format", dest="input_format", choices=["parquet", "ipc", "stream"],
+                              help="입력 형식 (기본: 확장자로 판단, .arrow/.feather/.ipc=ipc, .arrows=stream)")
+    score_parser.add_argument("--map", action="append", default=[], metavar="FIELD=COLUMN",
+                              help="PredictRequest 필드와 입력 컬럼 이름이 다를 때 지정. 여러 번 지정 가능")
+    score_parser.add_argument("--keep", action="append", metavar="COLUMN",
+                              help="출력에 그대로 옮길 입력 컬럼 (기본: memberId 컬럼). 여러 번 지정 가능")
+    score_parser.add_argument("--keep-all", action="store_true", help="입력 컬럼을 모두 출력에 옮김")
+    score_parser.add_argument("--batch-size", type=int, default=65536, help="배치당 행 수")
+    score_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                              help="예측 프로세스 수 (0: 현재 프로세스에서 예측)")
+    score_parser.add_argument("--threads-per-worker", type=int, default=0,
+                              help="워커당 TensorFlow 연산 스레드 수 (기본: CPU 수 / 워커 수)")
+    score_parser.add_argument("--max-inflight", type=int, default=0, help="동시에 처리 중인 배치 수 상한 (기본: 워커 수 x 2)")
+    score_parser.add_argument("--predict-batch-size", type=int, default=8192, help="모델 predict의 batch_size")
+    score_parser.add_argument("--model-dir", default=MODEL_DIR)
+    score_parser.add_argument("--compression", default="zstd", help="출력 Parquet 압축 방식")
+    args = parser.parse_args()
+
+    if args.command == "score":
+        options = ScoringOptions(
+            batch_size=args.batch_size, workers=args.workers, threads_per_worker=args.threads_per_worker,
+            max_inflight=args.max_inflight, predict_batch_size=args.predict_batch_size, model_dir=args.model_dir,
+            mapping=parse_mapping(args.map), keep=args.keep, keep_all=args.keep_all,
+            input_format=args.input_format, compression=args.compression,
+        )
+        stats = score_file(args.input, args.output, options)
+        print(f"[BulkRiskScoring] {stats['rows']}행 (무효 {stats['invalid_rows']}행), {stats['seconds']:.1f}초, "
+              f"{stats['rows_per_second']:.0f}행/초 -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+엔드포인트별 LLM 서킷 브레이커.
+
+연속 실패(오류, 타임아웃, 느린 응답)가 임계치를 넘으면 일정 시간 동안 열려서 Gemini를 호출하지 않고
+즉시 CircuitOpenError를 던집니다. 서비스는 이 예외를 받아 로컬 데이터로 degraded 응답을 만듭니다.
+열린 시간이 지나면 반열림(half-open) 상태에서 요청 하나만 시험 삼아 통과시킵니다.
+
+호출 시간 제한과 느린 응답 기준은 호출자(gemini_gateway)가 프롬프트 유형별 적응형 타임아웃과
+재시도 횟수로 호출마다 정하고, 시간은 LLM 쿼터 슬롯을 처음 받은 시점(mark_call_started)부터 잽니다.
+쿼터 대기열에서 기다린 시간은 상류 장애가 아니므로 실패로 세지 않습니다.
+"""
+import asyncio
+import contextvars
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.log import get_logger
+
+logger = get_logger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", "30"))
+
+BREAKER_DIET_ANALYSIS = "diet_analysis"
+BREAKER_MEAL_IMAGE = "meal_image"
+BREAKER_DIET_RECOMMENDATION = "diet_recommendation"
+BREAKER_GOAL_NUTRITION = "goal_nutrition"
+BREAKER_NUTRITION_CALCULATE = "nutrition_calculate"
+
+
+class CircuitOpenError(Exception):
+    """브레이커가 열려 있어 LLM을 호출하지 않음"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"LLM 서킷 브레이커 '{name}' 열림 ({retry_in:.0f}초 후 재시도)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class _CallClock:
+    """브레이커 호출 하나의 시간 측정 시작 시점 (쿼터 슬롯을 처음 받은 때)"""
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.started = asyncio.Event()
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+            self.started.set()
+
+
+_call_clock: contextvars.ContextVar[Optional[_CallClock]] = contextvars.ContextVar("breaker_call_clock", default=None)
+
+
+def mark_call_started():
+    """LLM 쿼터 슬롯을 받은 직후 호출. 브레이커 안에서 실행 중이면 이때부터 시간 제한을 적용"""
+    clock = _call_clock.get()
+    if clock is not None:
+        clock.start()
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 open_seconds: float = BREAKER_OPEN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+
+    def _before_call(self):
+        if self.state == STATE_OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.open_seconds:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.open_seconds - elapsed)
+            self.state = STATE_HALF_OPEN
+        if self.state == STATE_HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 0)
+            self._probe_in_flight = True
+
+    def _on_success(self):
+        self._probe_in_flight = False
+        if self.state != STATE_CLOSED:
+            logger.info("'%s' 닫힘 (LLM 응답 회복)", self.name)
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+
+    def _on_failure(self, reason: str):
+        self._probe_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != STATE_OPEN:
+                logger.warning("'%s' 열림: %s (연속 실패 %d회)", self.name, reason, self.consecutive_failures)
+            self.state = STATE_OPEN
+            self.opened_at = time.monotonic()
+
+    async def call(self, func: Callable[[], Awaitable[Any]], call_timeout: float, slow_call_seconds: float) -> Any:
+        """
+        func를 브레이커 보호 아래 실행. 열려 있으면 CircuitOpenError
+        func 안에서 mark_call_started()를 호출한 시점부터 call_timeout을 넘기면 asyncio.TimeoutError,
+        slow_call_seconds보다 오래 걸린 성공 호출도 실패로 셈. (시작 표시 전 대기 시간은 제외)
+        """
+        self._before_call()
+        clock = _CallClock()
+
+        async def run():
+            _call_clock.set(clock)
+            return await func()
+
+        task = asyncio.ensure_future(run())
+        try:
+            result = await self._wait(task, clock, call_timeout)
+        except asyncio.TimeoutError:
+            self._on_failure(f"{call_timeout:.0f}초 초과")
+            raise
+        except asyncio.CancelledError:
+            task.cancel()
+            self._probe_in_flight = False
+            raise
+        except Exception as e:
+            self._on_failure(f"{type(e).__name__}: {e}")
+            raise
+        elapsed = time.monotonic() - clock.started_at if clock.started_at is not None else 0.0
+        if elapsed > slow_call_seconds:
+            self._on_failure(f"느린 응답 {elapsed:.1f}초")
+        else:
+            self._on_success()
+        return result
+
+    @staticmethod
+    async def _wait(task: asyncio.Future, clock: _CallClock, call_timeout: float) -> Any:
+        """시작 표시가 될 때까지는 제한 없이 기다리고, 그 뒤 남은 시간만큼 기다림"""
+        started = asyncio.ensure_future(clock.started.wait())
+        try:
+            await asyncio.wait({task, started}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            started.cancel()
+        if task.done():
+            return task.result()
+        remaining = call_timeout - (time.monotonic() - clock.started_at)
+        return await asyncio.wait_for(task, timeout=max(remaining, 0.0))
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == STATE_OPEN and time.monotonic() - self.opened_at < self.open_seconds
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """이름별 브레이커 싱글톤"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def get_breaker_states() -> Dict[str, str]:
+    return {name: breaker.state for name, breaker in _breakers.items()}
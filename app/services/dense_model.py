@@ -0,0 +1,99 @@
+"""
+Keras .h5 (Sequential, Dense/Dropout) 모델을 TensorFlow 없이 NumPy로 추론.
+
+/predict/health의 모델 3개는 Dense 3층짜리 작은 MLP라서, 가중치만 h5py로 읽어 행렬 곱으로 계산합니다.
+- TensorFlow를 import하지 않으므로 프리포크 마스터에서 로드해 워커들이 copy-on-write로 공유 가능 (app/core/prefork.py)
+- 가중치 배열은 로드 후 읽기 전용으로 두어 워커에서 공유 페이지에 쓰지 않음
+- 추론 시 Dropout은 항등 함수 (Keras와 같음)
+- 지원하지 않는 층/활성 함수가 있으면 UnsupportedModelError (호출자가 TensorFlow로 로드)
+
+model.predict(x, verbose=0) 모양은 Keras와 같게 (n, units) 배열을 반환합니다.
+"""
+import json
+from typing import Callable, Dict, List, Tuple
+
+import h5py
+import numpy as np
+
+
+class UnsupportedModelError(ValueError):
+    """NumPy 추론으로 재현할 수 없는 모델 구성"""
+
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0, out=x)
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # 1 / (1 + exp(-x))와 같고 큰 음수에서도 overflow 경고가 없음
+    return np.multiply(np.tanh(x * 0.5) + 1, 0.5, dtype=x.dtype)
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    exp = np.exp(x - x.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "linear": lambda x: x,
+    "relu": _relu,
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+    "softmax": _softmax,
+}
+# 추론 시 아무 일도 하지 않는 층
+PASSTHROUGH_LAYERS = {"InputLayer", "Dropout"}
+
+
+class DenseModel:
+    """(kernel, bias, 활성 함수) 층 목록으로 순전파"""
+
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray, str]]):
+        if not layers:
+            raise UnsupportedModelError("Dense 층이 없습니다")
+        for kernel, bias, _ in layers:
+            kernel.setflags(write=False)
+            bias.setflags(write=False)
+        self.layers = layers
+        self.input_dim = layers[0][0].shape[0]
+
+    def predict(self, x, verbose: int = 0, batch_size: int = None) -> np.ndarray:
+        """Keras Model.predict와 같은 모양의 float32 출력 (verbose, batch_size는 호환용)"""
+        output = np.asarray(x, dtype=np.float32)
+        if output.ndim != 2 or output.shape[1] != self.input_dim:
+            raise ValueError(f"입력 모양 {output.shape} != (n, {self.input_dim})")
+        for kernel, bias, activation in self.layers:
+            output = output @ kernel
+            output += bias
+            output = ACTIVATIONS[activation](output)
+        return output
+
+
+def _layer_weights(weights_group: h5py.Group, layer_name: str) -> List[np.ndarray]:
+    group = weights_group[layer_name]
+    names = [name.decode() if isinstance(name, bytes) else name for name in group.attrs.get("weight_names", [])]
+    return [np.asarray(group[name], dtype=np.float32) for name in names]
+
+
+def load_dense_model(path: str) -> DenseModel:
+    """Keras가 저장한 .h5(model_config + model_weights)에서 Dense 층 가중치 로드"""
+    with h5py.File(path, "r") as f:
+        config = json.loads(f.attrs["model_config"])
+        if config.get("class_name") != "Sequential":
+            raise UnsupportedModelError(f"Sequential 모델만 지원합니다: {config.get('class_name')}")
+        weights_group = f["model_weights"]
+        layers = []
+        for layer in config["config"]["layers"]:
+            class_name, layer_config = layer["class_name"], layer["config"]
+            if class_name in PASSTHROUGH_LAYERS:
+                continue
+            if class_name != "Dense":
+                raise UnsupportedModelError(f"지원하지 않는 층: {class_name} ({layer_config.get('name')})")
+            activation = layer_config.get("activation", "linear")
+            if activation not in ACTIVATIONS:
+                raise UnsupportedModelError(f"지원하지 않는 활성 함수: {activation} ({layer_config['name']})")
+            weights = _layer_weights(weights_group, layer_config["name"])
+            kernel = weights[0]
+            bias = weights[1] if layer_config.get("use_bias", True) else np.zeros(kernel.shape[1], dtype=np.float32)
+            layers.append((kernel, bias, activation))
+    return DenseModel(layers)
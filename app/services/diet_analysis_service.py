@@ -1,49 +1,66 @@
-from dotenv import load_dotenv
-import google.generativeai as genai
+import asyncio
 import os
-import json
-import traceback
 import pickle
 import hashlib
+import re
+from app.core.log import get_logger, log_payload, payload
+from app.core.metrics import STAGE_FOOD_EXTRACTION, STAGE_NUTRITION_LOOKUP, STAGE_SUGGESTION, record_cache, stage
+from app.services.circuit_breaker import CircuitOpenError, BREAKER_DIET_ANALYSIS
+from app.services.gemini_gateway import gemini_gateway
+from app.services.json_stream import JsonArrayStream
+from app.services.llm_json import FoodNutrition, LLMJsonError, SuggestionResponse, parse_model
+from app.services.llm_latency import PROMPT_EXTRACTION, PROMPT_NUTRITION, PROMPT_SUGGESTION
+from app.services.nutrient_vector import NutrientVector, SCHEMA_DIET_ANALYSIS
+
+logger = get_logger(__name__)
+
+# 새로 배운 음식이 있을 때 캐시 파일 저장을 미루는 시간(초). 그 사이 배운 음식은 한 번에 저장
+NUTRITION_CACHE_SAVE_DELAY = float(os.environ.get("NUTRITION_CACHE_SAVE_DELAY", "5"))
+
+# suggestion_prompt의 균형 잡힌 한 끼 기준 (LLM 장애 시 로컬 판단에 사용)
+BALANCED_MEAL_BASELINE = {"protein": 25, "carbohydrate": 100, "water": 500, "fiber": 10, "fat": 25}
+BALANCED_MEAL_VECTOR = NutrientVector.from_mapping(BALANCED_MEAL_BASELINE, SCHEMA_DIET_ANALYSIS)
+NUTRIENT_LABELS = {"protein": "단백질", "carbohydrates": "탄수화물", "water": "수분", "fiber": "식이섬유", "fat": "지방"}
+# 가장 많이 부족한 영양소별 대체 제안 요리
+LOCAL_MEAL_SUGGESTIONS = {
+    "protein": "두부 스테이크",
+    "carbohydrates": "잡곡밥 정식",
+    "water": "미역국",
+    "fiber": "나물 비빔밥",
+    "fat": "연어 구이",
+}
+# 로컬 음식 이름 추출 시 떼어내는 조사/접속 표현
+FOOD_NAME_SUFFIXES = ("이랑", "하고", "으로", "이나", "랑", "과", "와", "을", "를", "로", "도", "나")
 
 class DietAnalysisService:
     def __init__(self, model_name="gemini-1.5-flash", cache_file="nutrition_cache.pkl"):
         """
-        DietAnalysisService 초기화. 환경 변수 로드 및 Gemini 모델 설정.
+        DietAnalysisService 초기화. Gemini 게이트웨이 설정 확인 및 캐시 로드.
         """
-        print("\n--- [DietAnalysisService] 초기화 시작 ---")
+        logger.debug("초기화 시작")
         try:
-            load_dotenv()
-            gemini_api_key = os.getenv('GEMINI_API_KEY')
-            if not gemini_api_key:
-                print("[DietAnalysisService] 오류: 환경 변수 'GEMINI_API_KEY'를 찾을 수 없습니다.")
+            if not gemini_gateway.api_key:
+                logger.error("환경 변수 'GEMINI_API_KEY'를 찾을 수 없습니다.")
                 raise ValueError("환경 변수에서 GEMINI_API_KEY를 찾을 수 없습니다.")
-            print("[DietAnalysisService] GEMINI_API_KEY 로드 완료.")
-
-            genai.configure(api_key=gemini_api_key)
-            print("[DietAnalysisService] Gemini API 설정 완료.")
+            logger.debug("GEMINI_API_KEY 로드 완료")
 
             self.model_name = model_name
-            print(f"[DietAnalysisService] '{self.model_name}' 모델 초기화 시도...")
-            self.model = genai.GenerativeModel(self.model_name)
-            print(f"[DietAnalysisService] '{self.model_name}' 모델 초기화 완료.")
+            logger.info("'%s' 모델 사용 (공용 Gemini 게이트웨이)", self.model_name)
 
             # 캐시 초기화
             self.cache_file = cache_file
             self.nutrition_cache = self.load_cache()
-            print("[DietAnalysisService] 캐시 로드 완료.")
+            self._save_task = None
+            logger.info("캐시 로드 완료 (%d개)", len(self.nutrition_cache))
 
         except ValueError as ve:
-            print(f"[DietAnalysisService] 초기화 중 설정 오류: {ve}")
+            logger.error("초기화 중 설정 오류: %s", ve)
             raise ve
         except Exception as e:
-            print(f"[DietAnalysisService] 초기화 중 예상치 못한 오류 발생: {type(e).__name__} - {e}")
-            print(f"--- Traceback ---")
-            traceback.print_exc()
-            print(f"--- Traceback 끝 ---")
+            logger.exception("초기화 중 예상치 못한 오류 발생: %s - %s", type(e).__name__, e)
             raise RuntimeError(f"Gemini 모델 초기화 실패: {e}")
         finally:
-            print("--- [DietAnalysisService] 초기화 종료 ---")
+            logger.debug("초기화 종료")
 
         self.food_name_prompt = """다음 문장에서 음식 이름만 정확히 추출하는데 큰분류 이름으로 추출해주고(ex: '참치김밥'이 들어오면 '김밥'만 추출) 콤마(,)로 구분된 리스트 형태로 반환해줘. 음식 이름 외 다른 단어는 절대 포함하지 마. 음식 이름이 없다면 빈 리스트를 반환해.
         문장: "{message}"
@@ -107,93 +124,140 @@ class DietAnalysisService:
         """
 
     def load_cache(self):
-        """캐시 파일 로드"""
+        """캐시 파일 로드 (이전 형식의 dict 항목은 NutrientVector로 변환)"""
         try:
             if os.path.exists(self.cache_file):
                 with open(self.cache_file, 'rb') as f:
-                    return pickle.load(f)
+                    cache = pickle.load(f)
+                return {key: value if isinstance(value, NutrientVector)
+                        else NutrientVector.from_mapping(value, SCHEMA_DIET_ANALYSIS)
+                        for key, value in cache.items()}
             return {}
         except Exception as e:
-            print(f"[DietAnalysisService] 캐시 로드 오류: {e}")
+            logger.warning("캐시 로드 오류: %s", e)
             return {}
 
-    def save_cache(self):
-        """캐시 파일 저장"""
+    def save_cache(self, cache=None):
+        """
+        캐시 파일 저장 (임시 파일에 쓴 뒤 교체). 같은 파일을 쓰는 다른 워커 프로세스가 먼저 저장한 항목은
+        합쳐서 유지합니다. 이벤트 루프 밖(스레드)에서 호출하므로 cache에는 루프에서 뜬 스냅샷을 넘깁니다.
+        """
         try:
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(self.nutrition_cache, f)
+            data = self.load_cache()
+            data.update(self.nutrition_cache if cache is None else cache)
+            tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(data, f)
+            os.replace(tmp_path, self.cache_file)
         except Exception as e:
-            print(f"[DietAnalysisService] 캐시 저장 오류: {e}")
+            logger.warning("캐시 저장 오류: %s", e)
+
+    def schedule_save(self):
+        """NUTRITION_CACHE_SAVE_DELAY초 뒤 한 번 저장 (이미 예약돼 있으면 그 저장에 포함)"""
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(NUTRITION_CACHE_SAVE_DELAY)
+        await self.flush_cache()
+
+    async def flush_cache(self):
+        """예약된 저장을 바로 수행 (종료 시). 예약된 저장이 없으면 아무것도 하지 않음"""
+        task, self._save_task = self._save_task, None
+        if task is None:
+            return
+        if task is not asyncio.current_task():
+            task.cancel()
+        await asyncio.to_thread(self.save_cache, dict(self.nutrition_cache))
 
     def get_cache_key(self, food):
         """음식 이름을 기반으로 캐시 키 생성"""
         return hashlib.md5(food.encode('utf-8')).hexdigest()
 
-    def extract_food_name(self, message):
+    async def extract_food_name(self, message):
         """
         주어진 메시지에서 음식 이름 리스트를 추출합니다.
         """
-        print(f"\n--- [DietAnalysisService] 음식 이름 추출 시작 ---")
-        print(f"입력 메시지: \"{message}\"")
+        logger.debug("음식 이름 추출 시작: %s", payload(message))
         if not message:
-            print("[DietAnalysisService] 입력 메시지가 비어있어 빈 리스트 반환.")
-            print("--- [DietAnalysisService] 음식 이름 추출 종료 ---")
+            logger.debug("입력 메시지가 비어있어 빈 리스트 반환")
             return []
 
         prompt = self.food_name_prompt.format(message=message)
 
         try:
-            response = self.model.generate_content(prompt)
-            extracted_text = response.text.strip()
-            print(f"[DietAnalysisService] Gemini 음식 이름 추출 응답 원문: \"{extracted_text}\"")
+            with stage(STAGE_FOOD_EXTRACTION):
+                extracted_text = (await gemini_gateway.generate_text(prompt, model=self.model_name,
+                                                                     prompt_type=PROMPT_EXTRACTION,
+                                                                     breaker=BREAKER_DIET_ANALYSIS,
+                                                                     validate=lambda text: bool(text.strip()))).strip()
+            log_payload(logger, "Gemini 음식 이름 추출 응답 원문", extracted_text)
 
             if not extracted_text:
-                print("[DietAnalysisService] 모델이 빈 응답을 반환했습니다.")
+                logger.warning("모델이 빈 응답을 반환했습니다.")
                 food_list = []
             else:
                 food_list = [food.strip() for food in extracted_text.split(',') if food.strip()]
 
-            print(f"[DietAnalysisService] 최종 추출된 음식 리스트: {food_list}")
-            print("--- [DietAnalysisService] 음식 이름 추출 정상 종료 ---")
+            logger.debug("추출된 음식 리스트: %s", food_list)
             return food_list
 
+        except CircuitOpenError as e:
+            logger.warning("%s - 캐시된 음식 이름으로 로컬 추출", e)
+            return self.extract_food_name_local(message)
         except Exception as e:
-            print(f"[DietAnalysisService] 음식 이름 추출 중 오류 발생: {type(e).__name__} - {e}")
-            print(f"--- Traceback ---")
-            traceback.print_exc()
-            print(f"--- Traceback 끝 ---")
-            print("[DietAnalysisService] 오류로 인해 빈 리스트를 반환합니다.")
-            print("--- [DietAnalysisService] 음식 이름 추출 오류 종료 ---")
-            return []
+            logger.exception("음식 이름 추출 중 오류 발생: %s - %s - 캐시된 음식 이름으로 로컬 추출", type(e).__name__, e)
+            return self.extract_food_name_local(message)
+
+    def extract_food_name_local(self, message):
+        """
+        LLM 없이 메시지를 어절 단위로 나누고 조사를 떼어 영양 캐시에 있는 음식 이름만 추출합니다.
+        """
+        food_list = []
+        for word in re.split(r"[\s,.!?~]+", message):
+            candidates = [word] + [word[:-len(suffix)] for suffix in FOOD_NAME_SUFFIXES
+                                   if word.endswith(suffix) and len(word) > len(suffix)]
+            for candidate in candidates:
+                if candidate and self.get_cache_key(candidate) in self.nutrition_cache:
+                    if candidate not in food_list:
+                        food_list.append(candidate)
+                    break
+        logger.debug("로컬 추출된 음식 리스트: %s", food_list)
+        return food_list
 
-    def analyze_nutrition_and_suggest(self, food_list):
+    def suggest_locally(self, total_nutrition):
+        """
+        LLM 없이 균형 식단 기준 대비 부족한 영양소를 판단하고, 가장 많이 부족한 영양소로 다음 끼니를 제안합니다.
+        """
+        total = NutrientVector.from_mapping(total_nutrition, SCHEMA_DIET_ANALYSIS)
+        shortfall = total.shortfall(BALANCED_MEAL_VECTOR)
+        ordered = sorted(shortfall, key=shortfall.get, reverse=True)
+        return {
+            "deficient_nutrients": [NUTRIENT_LABELS[key] for key in ordered],
+            "next_meal_suggestion": [LOCAL_MEAL_SUGGESTIONS[ordered[0]]] if ordered else [],
+        }
+
+    async def analyze_nutrition_and_suggest(self, food_list):
         """
         음식 리스트를 기반으로 각 음식별 영양 분석 및 전체 기반 다음 식사 제안을 수행합니다.
         """
-        print(f"\n--- [DietAnalysisService] 영양 분석 및 제안 시작 ---")
-        print(f"입력 음식 리스트: {food_list}")
+        logger.debug("영양 분석 및 제안 시작: %s", food_list)
 
         if not food_list:
-            print("[DietAnalysisService] 음식 리스트가 비어 있어 기본 응답 반환.")
-            print("--- [DietAnalysisService] 영양 분석 및 제안 종료 (입력 없음) ---")
+            logger.debug("음식 리스트가 비어 있어 기본 응답 반환")
             return {
                 "food_list": [],
                 "nutrition_per_food": [],
-                "total_nutrition": {"protein": 0, "carbohydrate": 0, "water": 0, "sugar": 0, "fat": 0, "fiber": 0, "sodium": 0},
+                "total_nutrition": NutrientVector().to_dict(SCHEMA_DIET_ANALYSIS),
                 "deficient_nutrients": [],
-                "next_meal_suggestion": []
+                "next_meal_suggestion": [],
+                "degraded": False
             }
 
         nutrition_per_food = []
-        total_nutrition = {
-            "protein": 0,
-            "carbohydrate": 0,
-            "water": 0,
-            "sugar": 0,
-            "fat": 0,
-            "fiber": 0,
-            "sodium": 0
-        }
+
+        # LLM 장애 시 캐시된 영양 정보와 로컬 제안만으로 응답 (degraded)
+        degraded = False
 
         # 캐시에서 음식 확인 및 Gemini 요청 최소화
         foods_to_query = []
@@ -202,137 +266,104 @@ class DietAnalysisService:
         for food in food_list:
             cache_key = self.get_cache_key(food)
             if cache_key in self.nutrition_cache:
-                print(f"[DietAnalysisService] '{food}' 캐시 히트")
+                logger.debug("'%s' 캐시 히트", food)
                 cached_nutrition.append({"food": food, "nutrition": self.nutrition_cache[cache_key]})
             else:
                 foods_to_query.append(food)
+        record_cache("nutrition_analysis", hits=len(cached_nutrition), misses=len(foods_to_query))
 
         # 일괄 영양소 분석
         if foods_to_query:
-            print(f"[DietAnalysisService] Gemini에 '{foods_to_query}' 영양 분석 요청...")
+            logger.info("Gemini에 %s 영양 분석 요청", foods_to_query)
             prompt = self.nutrition_prompt.format(food_list=", ".join(foods_to_query))
+            learned = []
+
+            def on_food(item):
+                """스트리밍 중 음식 하나의 영양 정보가 완성되면 바로 캐시에 반영"""
+                try:
+                    parsed = parse_model(item, FoodNutrition)
+                except LLMJsonError:
+                    return
+                food = parsed.food
+                if not food:
+                    return
+                nutrition = NutrientVector.from_mapping(parsed.nutrition.model_dump(), SCHEMA_DIET_ANALYSIS)
+                self.nutrition_cache[self.get_cache_key(food)] = nutrition
+                cached_nutrition.append({"food": food, "nutrition": nutrition})
+                learned.append(food)
+                logger.debug("'%s' 영양 정보 수신", food)
+
+            stream = JsonArrayStream("nutrition_per_food", on_item=on_food)
             try:
-                response = self.model.generate_content(prompt)
-                raw_response = response.text.strip()
-                print(f"[DietAnalysisService] Gemini 응답 원문: {raw_response}")
-
-                # JSON 정리
-                cleaned_response = raw_response
-                if cleaned_response.startswith("```json"):
-                    cleaned_response = cleaned_response[len("```json"):].strip()
-                if cleaned_response.startswith("```"):
-                    cleaned_response = cleaned_response[len("```"):].strip()
-                if cleaned_response.endswith("```"):
-                    cleaned_response = cleaned_response[:-len("```")].strip()
-
-                json_start = cleaned_response.find('{')
-                json_end = cleaned_response.rfind('}')
-                if json_start == -1 or json_end == -1 or json_start >= json_end:
-                    print(f"[DietAnalysisService] 오류: 응답에서 유효한 JSON 구조를 찾을 수 없습니다.")
-                    return {
-                        "food_list": food_list,
-                        "nutrition_per_food": [],
-                        "total_nutrition": total_nutrition,
-                        "deficient_nutrients": [],
-                        "next_meal_suggestion": []
-                    }
-
-                json_string = cleaned_response[json_start:json_end+1]
-                print(f"[DietAnalysisService] 추출된 JSON: {json_string}")
-
-                response_data = json.loads(json_string)
-                queried_nutrition = response_data.get("nutrition_per_food", [])
-
-                # 캐시 업데이트 및 결과 처리
-                for item in queried_nutrition:
-                    food = item.get("food")
-                    nutrition = item.get("nutrition", {})
-                    nutrition_entry = {
-                        "food": food,
-                        "nutrition": {
-                            "protein": float(nutrition.get("protein", 0)),
-                            "carbohydrate": float(nutrition.get("carbohydrate", 0)),
-                            "water": float(nutrition.get("water", 0)),
-                            "sugar": float(nutrition.get("sugar", 0)),
-                            "fat": float(nutrition.get("fat", 0)),
-                            "fiber": float(nutrition.get("fiber", 0)),
-                            "sodium": float(nutrition.get("sodium", 0))
-                        }
-                    }
-                    cache_key = self.get_cache_key(food)
-                    self.nutrition_cache[cache_key] = nutrition_entry["nutrition"]
-                    cached_nutrition.append(nutrition_entry)
-
-                self.save_cache()
-                print("[DietAnalysisService] 캐시 업데이트 완료")
-
+                with stage(STAGE_NUTRITION_LOOKUP):
+                    raw_response = await gemini_gateway.stream_text(prompt, on_text=stream.feed, model=self.model_name,
+                                                                    prompt_type=PROMPT_NUTRITION,
+                                                                    breaker=BREAKER_DIET_ANALYSIS,
+                                                                    validate=lambda text: stream.completed)
+                log_payload(logger, "Gemini 응답 원문", raw_response)
+                if not stream.completed:
+                    logger.warning("응답의 nutrition_per_food가 완결되지 않음 - 받은 %d개만 사용", len(learned))
+            except CircuitOpenError as e:
+                logger.warning("%s - 캐시된 영양 정보만 사용", e)
+                degraded = True
             except Exception as e:
-                print(f"[DietAnalysisService] 영양 분석 중 오류: {type(e).__name__} - {e}")
-                traceback.print_exc()
-                return {
-                    "food_list": food_list,
-                    "nutrition_per_food": [],
-                    "total_nutrition": total_nutrition,
-                    "deficient_nutrients": [],
-                    "next_meal_suggestion": []
-                }
-
-        # 캐시된 결과와 쿼리 결과 합치기
+                logger.exception("영양 분석 중 오류: %s - %s - 캐시된 영양 정보만 사용", type(e).__name__, e)
+                degraded = True
+            finally:
+                if learned:
+                    self.schedule_save()
+                    logger.info("캐시 업데이트 완료 (%d개)", len(learned))
+
+        # 캐시된 결과와 쿼리 결과 합치기 (합계는 벡터 한 번에 합산)
+        matched = []
         for food in food_list:
             for item in cached_nutrition:
                 if item["food"] == food:
-                    nutrition_per_food.append(item)
-                    for key in total_nutrition:
-                        total_nutrition[key] += item["nutrition"][key]
+                    matched.append(item["nutrition"])
+                    nutrition_per_food.append({"food": food, "nutrition": item["nutrition"].to_dict(SCHEMA_DIET_ANALYSIS)})
                     break
+        total_nutrition = NutrientVector.sum(matched).to_dict(SCHEMA_DIET_ANALYSIS)
 
         # 다음 식사 제안
-        print("[DietAnalysisService] 다음 식사 제안 시작...")
+        logger.debug("다음 식사 제안 시작")
         prompt = self.suggestion_prompt.format(**total_nutrition)
         try:
-            response = self.model.generate_content(prompt)
-            raw_response = response.text.strip()
-            print(f"[DietAnalysisService] 제안 Gemini 응답 원문: {raw_response}")
-
-            cleaned_response = raw_response
-            if cleaned_response.startswith("```json"):
-                cleaned_response = cleaned_response[len("```json"):].strip()
-            if cleaned_response.startswith("```"):
-                cleaned_response = cleaned_response[len("```"):].strip()
-            if cleaned_response.endswith("```"):
-                cleaned_response = cleaned_response[:-len("```")].strip()
-
-            json_start = cleaned_response.find('{')
-            json_end = cleaned_response.rfind('}')
-            if json_start == -1 or json_end == -1 or json_start >= json_end:
-                print("[DietAnalysisService] 오류: 제안 응답에서 유효한 JSON 구조를 찾을 수 없습니다.")
-                suggestion_result = {"deficient_nutrients": [], "next_meal_suggestion": []}
-            else:
-                json_string = cleaned_response[json_start:json_end+1]
-                print(f"[DietAnalysisService] 제안 추출된 JSON: {json_string}")
-                suggestion_result = json.loads(json_string)
+            if degraded:
+                # 이미 LLM 장애가 확인된 요청은 제안도 로컬에서 바로 계산
+                raise CircuitOpenError(BREAKER_DIET_ANALYSIS, 0)
+            with stage(STAGE_SUGGESTION):
+                raw_response = (await gemini_gateway.generate_text(prompt, model=self.model_name,
+                                                                   prompt_type=PROMPT_SUGGESTION,
+                                                                   breaker=BREAKER_DIET_ANALYSIS,
+                                                                   validate=lambda text: parse_model(text, SuggestionResponse))).strip()
+            log_payload(logger, "제안 Gemini 응답 원문", raw_response)
 
-                # next_meal_suggestion을 리스트로 보장
-                if isinstance(suggestion_result.get("next_meal_suggestion"), str):
-                    suggestion_result["next_meal_suggestion"] = [suggestion_result["next_meal_suggestion"]]
-                elif not isinstance(suggestion_result.get("next_meal_suggestion"), list):
-                    suggestion_result["next_meal_suggestion"] = []
+            try:
+                suggestion_result = parse_model(raw_response, SuggestionResponse).model_dump()
+            except LLMJsonError as e:
+                logger.warning("제안 응답에서 유효한 JSON을 찾을 수 없습니다: %s", e)
+                suggestion_result = {"deficient_nutrients": [], "next_meal_suggestion": []}
 
-            print(f"[DietAnalysisService] 제안 결과: {suggestion_result}")
+            logger.debug("제안 결과: %s", suggestion_result)
 
+        except CircuitOpenError:
+            logger.warning("LLM 사용 불가 - 로컬 기준으로 다음 식사 제안")
+            suggestion_result = self.suggest_locally(total_nutrition)
+            degraded = True
         except Exception as e:
-            print(f"[DietAnalysisService] 제안 중 오류: {type(e).__name__} - {e}")
-            traceback.print_exc()
-            suggestion_result = {"deficient_nutrients": [], "next_meal_suggestion": []}
+            logger.exception("제안 중 오류: %s - %s - 로컬 기준으로 다음 식사 제안", type(e).__name__, e)
+            suggestion_result = self.suggest_locally(total_nutrition)
+            degraded = True
 
         result = {
             "food_list": food_list,
             "nutrition_per_food": nutrition_per_food,
             "total_nutrition": total_nutrition,
             "deficient_nutrients": suggestion_result.get("deficient_nutrients", []),
-            "next_meal_suggestion": suggestion_result.get("next_meal_suggestion", [])
+            "next_meal_suggestion": suggestion_result.get("next_meal_suggestion", []),
+            "degraded": degraded
         }
 
-        print(f"[DietAnalysisService] 최종 결과: {result}")
-        print("--- [DietAnalysisService] 영양 분석 및 제안 종료 ---")
+        log_payload(logger, "최종 결과", result)
+        logger.debug("영양 분석 및 제안 종료")
         return result
\ No newline at end of file
@@ -0,0 +1,477 @@
+"""
+Gemini REST API 공용 게이트웨이.
+
+모든 서비스(식단 분석, 이미지 분석, 식단 추천, 영양소 계산)가 이 모듈 하나로 Gemini를 호출합니다.
+- keep-alive 커넥션 풀을 재사용하는 비동기 httpx 클라이언트 (h2 설치 시 HTTP/2)
+- 연결/읽기 타임아웃 분리
+- 429, 5xx, 네트워크 오류에 대한 지터 포함 지수 백오프 재시도
+- 프로세스 전체 동시 호출 수 제한
+- 우선순위 레인 토큰 버킷 스케줄러(llm_scheduler)를 거쳐 쿼터 배분
+- 프롬프트 유형별 적응형 타임아웃과 꼬리 지연 헤징(llm_latency)
+- breaker 이름을 주면 엔드포인트별 서킷 브레이커(circuit_breaker)로 보호
+- 같은 요청의 응답은 디스크 저장소(llm_response_store)에서 재사용, replay 모드에서는 네트워크 없이 재생
+  (호출자가 validate로 검증한 완결 응답만 저장, 재시도는 refresh=True로 저장소를 건너뜀)
+- stream_text: streamGenerateContent(SSE)로 받은 텍스트 조각을 바로 콜백에 전달 (json_stream과 함께 사용)
+
+GEMINI_API_BASE 환경 변수로 로컬 스텁 서버를 가리킬 수 있습니다.
+"""
+import asyncio
+import base64
+import json
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+from dotenv import load_dotenv
+
+from app.core.log import get_logger, log_payload
+from app.core.metrics import record_llm_usage, timing
+from app.services.circuit_breaker import get_breaker, mark_call_started
+from app.services.llm_json import LLMJsonError, extract_json, loads
+from app.services.llm_latency import latency_tracker, PROMPT_DEFAULT
+from app.services.llm_response_store import llm_response_store, compute_store_key
+from app.services.llm_scheduler import llm_scheduler
+
+load_dotenv(dotenv_path=".env")
+
+logger = get_logger(__name__)
+
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+GEMINI_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+GEMINI_DEFAULT_MODEL = os.environ.get("GEMINI_DEFAULT_MODEL", "gemini-2.0-flash")
+
+GEMINI_CONNECT_TIMEOUT = float(os.environ.get("GEMINI_CONNECT_TIMEOUT", "5"))
+GEMINI_READ_TIMEOUT = float(os.environ.get("GEMINI_READ_TIMEOUT", "60"))
+GEMINI_MAX_RETRIES = int(os.environ.get("GEMINI_MAX_RETRIES", "3"))
+GEMINI_BACKOFF_BASE = float(os.environ.get("GEMINI_BACKOFF_BASE", "0.5"))
+GEMINI_BACKOFF_MAX = float(os.environ.get("GEMINI_BACKOFF_MAX", "8"))
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", "16"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# 이 사유로 끝난 응답만 완결된 것으로 보고 저장 (MAX_TOKENS, SAFETY 등은 잘렸거나 비정상)
+FINISH_COMPLETE = "STOP"
+
+try:
+    import h2  # noqa: F401  HTTP/2 지원 여부 확인용
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class GeminiError(Exception):
+    """Gemini 호출 실패 (재시도 후에도 실패했거나 응답 형식이 잘못된 경우)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+Part = Dict[str, Any]
+
+
+def text_part(text: str) -> Part:
+    return {"text": text}
+
+
+def image_part(data: bytes, mime_type: str) -> Part:
+    """이미지 바이트를 inline_data 파트로 변환"""
+    return {"inline_data": {"mime_type": mime_type, "data": base64.b64encode(data).decode("ascii")}}
+
+
+def extract_text(response: Dict[str, Any]) -> str:
+    """generateContent 응답에서 첫 후보의 텍스트 추출"""
+    try:
+        parts = response["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError, TypeError):
+        raise GeminiError("Gemini 응답 파싱 중 문제가 발생했습니다.")
+    return "".join(part.get("text", "") for part in parts)
+
+
+def _chunk_text(payload: Dict[str, Any]) -> str:
+    """스트리밍 조각에서 텍스트 추출 (finishReason만 있는 마지막 조각 등은 빈 문자열)"""
+    try:
+        parts = payload["candidates"][0]["content"]["parts"]
+    except (KeyError, IndexError, TypeError):
+        return ""
+    return "".join(part.get("text", "") for part in parts)
+
+
+def _finish_reason(payload: Dict[str, Any]) -> Optional[str]:
+    try:
+        return payload["candidates"][0].get("finishReason")
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+def _text_response(text: str) -> Dict[str, Any]:
+    """스트리밍으로 받은 전체 텍스트를 generateContent 응답 형식으로 (저장소 기록용)"""
+    return {"candidates": [{"content": {"parts": [{"text": text}]}, "finishReason": FINISH_COMPLETE}]}
+
+
+def _passes(validate: Optional[Callable[[Any], bool]], value: Any) -> bool:
+    """호출자 검증 통과 여부. 검증 함수가 없거나 예외를 던지면 통과하지 못한 것으로 봄"""
+    if validate is None:
+        return False
+    try:
+        return bool(validate(value))
+    except Exception as e:
+        logger.debug("응답 검증 실패: %s: %s", type(e).__name__, e)
+        return False
+
+
+class GeminiGateway:
+    """프로세스 전역에서 공유하는 Gemini 호출 게이트웨이"""
+
+    def __init__(self, api_key: Optional[str] = GEMINI_API_KEY, api_base: str = GEMINI_API_BASE,
+                 max_concurrency: int = GEMINI_MAX_CONCURRENCY, max_retries: int = GEMINI_MAX_RETRIES):
+        self.api_key = api_key
+        self.api_base = api_base
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(GEMINI_READ_TIMEOUT, connect=GEMINI_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency * 2,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=60,
+                ),
+                headers={"Content-Type": "application/json", "x-goog-api-key": self.api_key or ""},
+            )
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Retry-After가 있으면 따르고, 없으면 full jitter 지수 백오프"""
+        if retry_after:
+            try:
+                return min(float(retry_after), GEMINI_BACKOFF_MAX)
+            except ValueError:
+                pass
+        return random.uniform(0, min(GEMINI_BACKOFF_MAX, GEMINI_BACKOFF_BASE * (2 ** attempt)))
+
+    async def _post(self, client: httpx.AsyncClient, url: str, body: Dict[str, Any],
+                    prompt_type: str, timeout: float) -> httpx.Response:
+        """쿼터 슬롯을 얻어 한 번 호출하고, 성공/타임아웃 지연을 유형별로 기록"""
+        async with llm_scheduler.slot(), self._get_semaphore():
+            mark_call_started()
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    url, json=body, timeout=httpx.Timeout(timeout, connect=GEMINI_CONNECT_TIMEOUT)
+                )
+            except httpx.TimeoutException:
+                # 타임아웃도 지연 분포에 반영해야 다음 타임아웃이 늘어남
+                latency_tracker.record(prompt_type, timeout)
+                raise
+        if response.status_code < 400:
+            latency_tracker.record(prompt_type, time.perf_counter() - start)
+        return response
+
+    async def _post_hedged(self, client: httpx.AsyncClient, url: str, body: Dict[str, Any],
+                           prompt_type: str) -> httpx.Response:
+        """
+        최근 지연 분위수를 넘겨도 응답이 없으면 같은 요청을 한 번 더 보내고 먼저 성공한 응답을 사용.
+        헤지 요청 수는 예산(전체 호출의 LLM_HEDGE_BUDGET 비율) 안으로 제한.
+        """
+        timeout = latency_tracker.timeout_for(prompt_type)
+        latency_tracker.on_call()
+        hedge_delay = latency_tracker.hedge_delay(prompt_type)
+        if hedge_delay is None or hedge_delay >= timeout:
+            return await self._post(client, url, body, prompt_type, timeout)
+
+        primary = asyncio.create_task(self._post(client, url, body, prompt_type, timeout))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done and latency_tracker.try_consume_hedge():
+                logger.info("'%s' 응답 지연(%.2f초 초과) - 헤지 요청 전송", prompt_type, hedge_delay)
+                hedge = asyncio.create_task(self._post(client, url, body, prompt_type, timeout))
+                pending.add(hedge)
+
+            last_failure: Optional[asyncio.Task] = None
+            while True:
+                for task in done:
+                    if task.exception() is None and task.result().status_code < 400:
+                        if task is not primary:
+                            latency_tracker.record_hedge_win()
+                        return task.result()
+                    last_failure = task
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # 모두 실패하면 마지막 실패를 그대로 전달 (재시도 판단은 호출자)
+            return last_failure.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate_content(self, parts: List[Part], model: str = GEMINI_DEFAULT_MODEL,
+                               generation_config: Optional[Dict[str, Any]] = None,
+                               prompt_type: str = PROMPT_DEFAULT, breaker: Optional[str] = None,
+                               validate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                               refresh: bool = False) -> Dict[str, Any]:
+        """
+        generateContent 호출 후 응답 JSON(dict) 반환. 실패 시 GeminiError.
+        breaker를 지정하면 해당 브레이커가 열려 있을 때 호출 없이 CircuitOpenError를 던지고,
+        쿼터 슬롯을 받은 뒤 재시도를 포함한 전체 호출 시간도 제한됩니다. (_breaker_limits)
+        저장소에 같은 요청의 응답이 있으면 브레이커 상태와 무관하게 바로 반환합니다.
+        새로 받은 응답은 완결(finishReason STOP)되고 validate(응답)가 참일 때만 저장합니다.
+        refresh=True면 저장된 응답을 읽지 않고 다시 호출합니다. (앞선 응답을 파싱하지 못해 다시 묻는 경우)
+        """
+        store_key, response, stored = await self._fetch(parts, model, generation_config, prompt_type, breaker, refresh)
+        if not stored:
+            await self._commit(store_key, model, response, _passes(validate, response))
+        return response
+
+    async def _fetch(self, parts: List[Part], model: str, generation_config: Optional[Dict[str, Any]],
+                     prompt_type: str, breaker: Optional[str],
+                     refresh: bool) -> Tuple[Optional[str], Dict[str, Any], bool]:
+        """(저장소 키, 응답, 저장소에서 읽었는지)"""
+        store_key, stored = await self._load_stored(model, generation_config, parts, refresh)
+        if stored is not None:
+            return store_key, stored, True
+
+        with timing(f"gemini_{prompt_type}"):
+            response = await self._call_with_breaker(
+                breaker, prompt_type, lambda: self._generate_content(parts, model, generation_config, prompt_type)
+            )
+        return store_key, response, False
+
+    async def _commit(self, store_key: Optional[str], model: str, response: Dict[str, Any], validated: bool):
+        """호출자가 검증한 완결 응답만 저장소에 기록"""
+        if store_key is None or not validated:
+            return
+        finish = _finish_reason(response)
+        if finish != FINISH_COMPLETE:
+            logger.debug("완결되지 않은 응답(finishReason=%s)은 저장하지 않음", finish)
+            return
+        await llm_response_store.put(store_key, model, response)
+
+    async def stream_text(self, prompt: Union[str, List[Part]], on_text: Callable[[str], None],
+                          model: str = GEMINI_DEFAULT_MODEL, generation_config: Optional[Dict[str, Any]] = None,
+                          prompt_type: str = PROMPT_DEFAULT, breaker: Optional[str] = None,
+                          validate: Optional[Callable[[str], bool]] = None, refresh: bool = False) -> str:
+        """
+        streamGenerateContent(SSE)로 호출해 텍스트 조각이 도착할 때마다 on_text(조각)을 호출하고 전체 텍스트 반환.
+        저장소에 같은 요청의 응답이 있으면 저장된 텍스트를 한 번에 전달합니다. (generate_content와 같은 저장소 키)
+        첫 조각을 받기 전의 실패만 재시도하고, 받는 도중 끊기면 GeminiError (이미 전달한 조각은 유지)
+        마지막 조각의 finishReason이 STOP이고 validate(전체 텍스트)가 참일 때만 저장합니다.
+        """
+        parts = [text_part(prompt)] if isinstance(prompt, str) else prompt
+        store_key, stored = await self._load_stored(model, generation_config, parts, refresh)
+        if stored is not None:
+            text = extract_text(stored)
+            on_text(text)
+            return text
+
+        with timing(f"gemini_{prompt_type}"):
+            text, finish = await self._call_with_breaker(
+                breaker, prompt_type, lambda: self._stream_content(parts, model, generation_config, prompt_type, on_text)
+            )
+
+        if finish == FINISH_COMPLETE:
+            await self._commit(store_key, model, _text_response(text), _passes(validate, text))
+        else:
+            logger.warning("스트리밍 응답이 완결되지 않음 (finishReason=%s, %d자)", finish, len(text))
+        return text
+
+    async def _load_stored(self, model: str, generation_config: Optional[Dict[str, Any]], parts: List[Part],
+                           refresh: bool = False) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        (저장소 키, 저장된 응답). 저장소를 쓰지 않으면 (None, None). replay 모드에서 없으면 GeminiError
+        refresh=True면 읽지 않고 키만 반환 (replay 모드는 재생할 응답밖에 없으므로 그대로 읽음)
+        """
+        if not llm_response_store.enabled:
+            return None, None
+        store_key = compute_store_key(model, generation_config, parts)
+        if refresh and not llm_response_store.replay_only:
+            return store_key, None
+        stored = await llm_response_store.get(store_key)
+        if stored is None and llm_response_store.replay_only:
+            raise GeminiError(f"Gemini 응답 재생 실패: 저장된 응답 없음 ({store_key[:12]})")
+        return store_key, stored
+
+    def _breaker_limits(self, prompt_type: str) -> Tuple[float, float]:
+        """
+        (브레이커 호출 시간 제한, 느린 응답 기준). 프롬프트 유형별 적응형 타임아웃에서 계산
+        제한은 모든 시도가 타임아웃(헤지 포함)까지 가고 시도 사이 백오프 상한만큼 기다리는 경우를 허용하고,
+        느린 응답은 한 번의 타임아웃보다 오래 걸린 성공 호출
+        """
+        timeout = latency_tracker.timeout_for(prompt_type)
+        hedge_delay = latency_tracker.hedge_delay(prompt_type)
+        attempt = timeout + GEMINI_CONNECT_TIMEOUT
+        if hedge_delay is not None and hedge_delay < timeout:
+            attempt += hedge_delay
+        call_timeout = attempt * (self.max_retries + 1) + GEMINI_BACKOFF_MAX * self.max_retries
+        return call_timeout, timeout
+
+    async def _call_with_breaker(self, breaker: Optional[str], prompt_type: str, func: Callable[[], Any]) -> Any:
+        if breaker is None:
+            return await func()
+        call_timeout, slow_call_seconds = self._breaker_limits(prompt_type)
+        try:
+            return await get_breaker(breaker).call(func, call_timeout, slow_call_seconds)
+        except asyncio.TimeoutError:
+            raise GeminiError(f"Gemini API 호출 오류: '{breaker}' 호출 시간 초과")
+
+    async def _stream_content(self, parts: List[Part], model: str, generation_config: Optional[Dict[str, Any]],
+                              prompt_type: str, on_text: Callable[[str], None]) -> Tuple[str, Optional[str]]:
+        """(전체 텍스트, 마지막 finishReason). finishReason 없이 끝났으면 잘린 응답"""
+        if not self.api_key:
+            raise ValueError("❌ Gemini API 키가 설정되지 않았습니다.")
+
+        url = f"{self.api_base}/models/{model}:streamGenerateContent?alt=sse"
+        body: Dict[str, Any] = {"contents": [{"parts": parts}]}
+        if generation_config:
+            body["generationConfig"] = generation_config
+
+        client = self._get_client()
+        # 스트리밍은 조각 사이 대기 시간에 읽기 타임아웃이 적용됨
+        timeout = latency_tracker.timeout_for(prompt_type)
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            chunks: List[str] = []
+            received = 0
+            usage = None
+            finish = None
+            try:
+                async with llm_scheduler.slot(), self._get_semaphore():
+                    mark_call_started()
+                    start = time.perf_counter()
+                    async with client.stream("POST", url, json=body,
+                                             timeout=httpx.Timeout(timeout, connect=GEMINI_CONNECT_TIMEOUT)) as response:
+                        if response.status_code < 400:
+                            async for line in response.aiter_lines():
+                                received += len(line) + 1
+                                if not line.startswith("data:"):
+                                    continue
+                                chunk = loads(line[len("data:"):])
+                                # 토큰 수는 마지막 조각의 usageMetadata가 누적값
+                                usage = chunk.get("usageMetadata", usage)
+                                finish = _finish_reason(chunk) or finish
+                                text = _chunk_text(chunk)
+                                if text:
+                                    chunks.append(text)
+                                    on_text(text)
+                            latency_tracker.record(prompt_type, time.perf_counter() - start)
+                            record_llm_usage(prompt_type, len(response.request.content), received, usage)
+                            return "".join(chunks), finish
+                        error_body = (await response.aread()).decode("utf-8", errors="replace")
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise GeminiError(
+                        f"Gemini API 호출 오류: HTTP {response.status_code} {error_body[:200]}",
+                        status_code=response.status_code,
+                    )
+                retry_after = response.headers.get("Retry-After")
+                if response.status_code == 429:
+                    llm_scheduler.penalize()
+                last_error = GeminiError(f"Gemini API 호출 오류: HTTP {response.status_code}", status_code=response.status_code)
+            except (httpx.TimeoutException, httpx.TransportError, json.JSONDecodeError) as e:
+                if chunks:
+                    raise GeminiError(f"Gemini 스트리밍 중단 ({len(''.join(chunks))}자 수신 후): {type(e).__name__} {e}")
+                last_error = GeminiError(f"Gemini API 호출 오류 (네트워크): {type(e).__name__} {e}")
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.warning("%s - %.2f초 후 재시도 (%d/%d)", last_error, delay, attempt + 1, self.max_retries)
+                await asyncio.sleep(delay)
+
+        raise last_error
+
+    async def _generate_content(self, parts: List[Part], model: str,
+                                generation_config: Optional[Dict[str, Any]], prompt_type: str) -> Dict[str, Any]:
+        if not self.api_key:
+            raise ValueError("❌ Gemini API 키가 설정되지 않았습니다.")
+
+        url = f"{self.api_base}/models/{model}:generateContent"
+        body: Dict[str, Any] = {"contents": [{"parts": parts}]}
+        if generation_config:
+            body["generationConfig"] = generation_config
+
+        client = self._get_client()
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = await self._post_hedged(client, url, body, prompt_type)
+                if response.status_code < 400:
+                    data = response.json()
+                    record_llm_usage(prompt_type, len(response.request.content), len(response.content),
+                                     data.get("usageMetadata"))
+                    return data
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise GeminiError(
+                        f"Gemini API 호출 오류: HTTP {response.status_code} {response.text[:200]}",
+                        status_code=response.status_code,
+                    )
+                retry_after = response.headers.get("Retry-After")
+                if response.status_code == 429:
+                    llm_scheduler.penalize()
+                last_error = GeminiError(f"Gemini API 호출 오류: HTTP {response.status_code}", status_code=response.status_code)
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error = GeminiError(f"Gemini API 호출 오류 (네트워크): {type(e).__name__} {e}")
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.warning("%s - %.2f초 후 재시도 (%d/%d)", last_error, delay, attempt + 1, self.max_retries)
+                await asyncio.sleep(delay)
+
+        raise last_error
+
+    async def generate_text(self, prompt: Union[str, List[Part]], model: str = GEMINI_DEFAULT_MODEL,
+                            generation_config: Optional[Dict[str, Any]] = None,
+                            prompt_type: str = PROMPT_DEFAULT, breaker: Optional[str] = None,
+                            validate: Optional[Callable[[str], bool]] = None, refresh: bool = False) -> str:
+        """프롬프트(문자열 또는 파트 리스트)를 보내고 응답 텍스트 반환. validate(텍스트)가 참인 응답만 저장"""
+        parts = [text_part(prompt)] if isinstance(prompt, str) else prompt
+        store_key, response, stored = await self._fetch(parts, model, generation_config, prompt_type, breaker, refresh)
+        text = extract_text(response)
+        if not stored:
+            await self._commit(store_key, model, response, _passes(validate, text))
+        return text
+
+    async def generate_json(self, prompt: str, model: str = GEMINI_DEFAULT_MODEL,
+                            generation_config: Optional[Dict[str, Any]] = None,
+                            prompt_type: str = PROMPT_DEFAULT, breaker: Optional[str] = None,
+                            validate: Optional[Callable[[Any], bool]] = None, refresh: bool = False) -> dict:
+        """
+        응답을 JSON으로 파싱해 dict로 반환. 실패 시 {"error": ...} 반환.
+        JSON으로 파싱되고 validate(파싱 결과)가 참인 응답만 저장 (validate를 생략하면 파싱 성공만 확인)
+        브레이커가 열려 있으면 CircuitOpenError는 그대로 전달 (호출자가 대체 응답 결정)
+        """
+        try:
+            store_key, response, stored = await self._fetch([text_part(prompt)], model, generation_config,
+                                                            prompt_type, breaker, refresh)
+            raw_text = extract_text(response)
+            log_payload(logger, "Gemini 응답 텍스트", raw_text)
+            answer = extract_json(raw_text)
+        except LLMJsonError as e:
+            logger.warning("JSON 디코딩 오류: %s", e)
+            return {"error": str(e)}
+        except GeminiError as e:
+            logger.error("%s", e)
+            return {"error": str(e)}
+        if not stored:
+            await self._commit(store_key, model, response, validate is None or _passes(validate, answer))
+        return answer
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+gemini_gateway = GeminiGateway()
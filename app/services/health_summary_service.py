@@ -0,0 +1,433 @@
+"""
+회원별 건강 요약 저장소.
+
+get_user_health_data가 매 요청마다 tb_predict_record 전체를 스캔하고 tb_food_record 7일치를
+집계하던 것을, 기록이 쓰일 때마다 갱신되는 요약 테이블 조회로 대체합니다.
+
+- tb_member_health_summary: 회원당 1행 (최신 예측 결과, 데이터 버전)
+- tb_member_daily_nutrition: (회원, 날짜)당 1행의 일별 영양소 버킷 (최근 SUMMARY_WINDOW_DAYS일만 유지)
+
+조회는 회원 PK 한 건 + 같은 회원의 버킷 PK 범위를 한 번의 쿼리로 읽습니다.
+
+전체 재구축:
+    python -m app.services.health_summary_service rebuild [--member-id ID]
+"""
+import argparse
+import asyncio
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, text
+
+from app.core.database import engine, execute, fetch_all, fetch_one
+from app.services.nutrient_vector import NutrientVector, SCHEMA_RECORD
+
+SUMMARY_WINDOW_DAYS = int(os.environ.get("SUMMARY_WINDOW_DAYS", "7"))
+
+NUTRIENT_COLUMNS = ["calories", "protein", "carbohydrates", "fat", "fiber", "sugar", "water", "sodium"]
+
+# get_user_health_data 반환 형식의 평균 키 (기존 프롬프트와 동일한 이름)
+AVG_KEYS = {
+    "calories": "avg_calories",
+    "protein": "avg_protein",
+    "carbohydrates": "avg_carbo",
+    "fat": "avg_fat",
+    "fiber": "avg_fibrin",
+    "sugar": "avg_sugar",
+    "water": "avg_water",
+    "sodium": "avg_sodium",
+}
+
+CREATE_SUMMARY_TABLES = [
+    text("""
+        CREATE TABLE IF NOT EXISTS tb_member_health_summary (
+            member_id BIGINT NOT NULL PRIMARY KEY,
+            diabetes_proba DOUBLE,
+            hypertension_proba DOUBLE,
+            cvd_proba DOUBLE,
+            predict_reg_date DATETIME,
+            version BIGINT NOT NULL DEFAULT 0,
+            updated_at DATETIME
+        )
+    """),
+    text("""
+        CREATE TABLE IF NOT EXISTS tb_member_daily_nutrition (
+            member_id BIGINT NOT NULL,
+            day DATE NOT NULL,
+            calories DOUBLE NOT NULL DEFAULT 0,
+            protein DOUBLE NOT NULL DEFAULT 0,
+            carbohydrates DOUBLE NOT NULL DEFAULT 0,
+            fat DOUBLE NOT NULL DEFAULT 0,
+            fiber DOUBLE NOT NULL DEFAULT 0,
+            sugar DOUBLE NOT NULL DEFAULT 0,
+            water DOUBLE NOT NULL DEFAULT 0,
+            sodium DOUBLE NOT NULL DEFAULT 0,
+            food_names TEXT,
+            meal_times TEXT,
+            record_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (member_id, day)
+        )
+    """),
+]
+
+# 회원 정보 + 요약 + 진행 중 챌린지 + 최근 버킷을 한 번에 조회 (모두 PK/회원 id 기준)
+# 진행 중 챌린지가 여럿이면 종료일이 가장 늦은 하나만 (여러 개를 조인하면 버킷 행이 중복돼 음식 횟수가 부풀려짐)
+MEMBER_SUMMARY_SQL = """
+    SELECT
+        m.id, m.age, m.activity_level, m.gender, m.height, m.weight,
+        s.member_id AS summary_member_id,
+        COALESCE(s.diabetes_proba, 0) AS diabetes_proba,
+        COALESCE(s.hypertension_proba, 0) AS hypertension_proba,
+        COALESCE(s.cvd_proba, 0) AS cvd_proba,
+        s.version AS summary_version,
+        c.end_date AS end_date,
+        c.goal AS goal,
+        c.target_weight AS target_weight,
+        b.day, b.calories, b.protein, b.carbohydrates, b.fat, b.fiber, b.sugar, b.water, b.sodium,
+        b.food_names, b.meal_times, b.record_count
+    FROM tb_members m
+    LEFT JOIN tb_member_health_summary s ON s.member_id = m.id
+    LEFT JOIN challenge c ON c.id = (
+        SELECT oc.id FROM challenge oc
+        WHERE oc.member_id = m.id AND oc.status = 'ONGOING'
+        ORDER BY oc.end_date DESC, oc.id DESC
+        LIMIT 1
+    )
+    LEFT JOIN tb_member_daily_nutrition b ON b.member_id = m.id AND b.day >= :since_day
+    {where}
+"""
+MEMBER_SUMMARY_QUERY = text(MEMBER_SUMMARY_SQL.format(where="WHERE m.id = :id ORDER BY b.day"))
+
+# 여러 회원을 한 번에 조회 (야간 사전 계산용). 회원별 행 순서는 단건 조회와 동일
+MEMBER_SUMMARY_BULK_QUERY = text(
+    MEMBER_SUMMARY_SQL.format(where="WHERE m.id IN :ids ORDER BY m.id, b.day")
+).bindparams(bindparam("ids", expanding=True))
+MEMBER_SUMMARY_BULK_CHUNK = 500
+
+# --- 재구축용 원본 집계 쿼리 (회원 지정 시 해당 회원만) ---
+LATEST_PREDICTION_QUERY = """
+    SELECT p.member_id, p.diabetes_proba, p.hypertension_proba, p.cvd_proba, p.reg_date
+    FROM tb_predict_record p
+    JOIN (
+        SELECT member_id, MAX(reg_date) AS reg_date
+        FROM tb_predict_record
+        {where}
+        GROUP BY member_id
+    ) latest ON latest.member_id = p.member_id AND latest.reg_date = p.reg_date
+"""
+
+DAILY_BUCKET_QUERY = """
+    SELECT
+        member_id,
+        DATE(consumed_date) AS day,
+        SUM(calories) AS calories, SUM(protein) AS protein, SUM(carbohydrates) AS carbohydrates,
+        SUM(fat) AS fat, SUM(fiber) AS fiber, SUM(sugar) AS sugar, SUM(water) AS water, SUM(sodium) AS sodium,
+        GROUP_CONCAT(food_name) AS food_names,
+        GROUP_CONCAT(meal_time) AS meal_times,
+        COUNT(*) AS record_count
+    FROM tb_food_record
+    WHERE consumed_date >= :since {member_filter}
+    GROUP BY member_id, DATE(consumed_date)
+"""
+
+MEMBER_IDS_QUERY = text("SELECT id FROM tb_members")
+
+SUMMARY_EXISTS_QUERY = text("SELECT member_id FROM tb_member_health_summary WHERE member_id = :member_id")
+BUMP_SUMMARY_VERSION_QUERY = text("""
+    UPDATE tb_member_health_summary SET version = version + 1, updated_at = :updated_at
+    WHERE member_id = :member_id
+""")
+
+
+def _dialect() -> str:
+    return engine.dialect.name
+
+
+def _window_start(today: Optional[date] = None) -> date:
+    """버킷 유지 구간의 첫 날 (오늘 포함 SUMMARY_WINDOW_DAYS일)"""
+    today = today or date.today()
+    return today - timedelta(days=SUMMARY_WINDOW_DAYS - 1)
+
+
+def _upsert_bucket_query():
+    """일별 버킷에 값을 더하는 upsert (MySQL / SQLite)"""
+    columns = ", ".join(NUTRIENT_COLUMNS)
+    values = ", ".join(f":{col}" for col in NUTRIENT_COLUMNS)
+    insert = f"""
+        INSERT INTO tb_member_daily_nutrition
+            (member_id, day, {columns}, food_names, meal_times, record_count)
+        VALUES (:member_id, :day, {values}, :food_names, :meal_times, :record_count)
+    """
+    if _dialect() == "mysql":
+        updates = ", ".join(f"{col} = {col} + VALUES({col})" for col in NUTRIENT_COLUMNS)
+        return text(insert + f"""
+            ON DUPLICATE KEY UPDATE {updates},
+                food_names = CONCAT_WS(',', NULLIF(food_names, ''), VALUES(food_names)),
+                meal_times = CONCAT_WS(',', NULLIF(meal_times, ''), VALUES(meal_times)),
+                record_count = record_count + VALUES(record_count)
+        """)
+    updates = ", ".join(f"{col} = {col} + excluded.{col}" for col in NUTRIENT_COLUMNS)
+    return text(insert + f"""
+        ON CONFLICT (member_id, day) DO UPDATE SET {updates},
+            food_names = COALESCE(NULLIF(food_names, '') || ',', '') || excluded.food_names,
+            meal_times = COALESCE(NULLIF(meal_times, '') || ',', '') || excluded.meal_times,
+            record_count = record_count + excluded.record_count
+    """)
+
+
+def _upsert_summary_query(with_prediction: bool):
+    """요약 행 upsert. 예측 결과는 더 최신일 때만 교체하고, 버전은 항상 1 증가"""
+    insert = """
+        INSERT INTO tb_member_health_summary
+            (member_id, diabetes_proba, hypertension_proba, cvd_proba, predict_reg_date, version, updated_at)
+        VALUES (:member_id, :diabetes_proba, :hypertension_proba, :cvd_proba, :predict_reg_date, 1, :updated_at)
+    """
+    if _dialect() == "mysql":
+        newer = "(predict_reg_date IS NULL OR VALUES(predict_reg_date) >= predict_reg_date)"
+        prediction_updates = "".join(
+            f"{col} = IF({newer}, VALUES({col}), {col}), "
+            for col in ["diabetes_proba", "hypertension_proba", "cvd_proba"]
+        ) + f"predict_reg_date = IF({newer}, VALUES(predict_reg_date), predict_reg_date), "
+        return text(insert + f"""
+            ON DUPLICATE KEY UPDATE {prediction_updates if with_prediction else ''}
+                version = version + 1, updated_at = VALUES(updated_at)
+        """)
+    newer = "(predict_reg_date IS NULL OR excluded.predict_reg_date >= predict_reg_date)"
+    prediction_updates = "".join(
+        f"{col} = CASE WHEN {newer} THEN excluded.{col} ELSE {col} END, "
+        for col in ["diabetes_proba", "hypertension_proba", "cvd_proba", "predict_reg_date"]
+    )
+    return text(insert + f"""
+        ON CONFLICT (member_id) DO UPDATE SET {prediction_updates if with_prediction else ''}
+            version = version + 1, updated_at = excluded.updated_at
+    """)
+
+
+def _as_float(value) -> float:
+    if value is None:
+        return 0.0
+    return float(value)
+
+
+def _split_csv(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+async def _summary_exists(member_id: float) -> bool:
+    return await fetch_one("summary_exists", SUMMARY_EXISTS_QUERY, {"member_id": member_id}) is not None
+
+
+async def ensure_summary_tables():
+    """요약 테이블 생성 (이미 있으면 무시)"""
+    await execute("summary_ddl", *[(ddl, None) for ddl in CREATE_SUMMARY_TABLES])
+
+
+async def record_food(member_id: float, consumed_date, nutrients: Dict[str, Any],
+                      food_name: Optional[str] = None, meal_time: Optional[str] = None):
+    """
+    tb_food_record에 음식 기록이 추가될 때 호출. 해당 날짜 버킷에 영양소를 더하고 요약 버전을 올립니다.
+    요약이 아직 없는 회원은 원본(이 기록 포함)에서 구축합니다. 기록 수정/삭제는 refresh_member로 원본에서 다시 계산합니다.
+    """
+    if not await _summary_exists(member_id):
+        await refresh_member(member_id)
+        return
+
+    consumed_day = consumed_date.date() if isinstance(consumed_date, datetime) else consumed_date
+    bucket = {
+        "member_id": member_id,
+        "day": consumed_day,
+        "food_names": food_name or "",
+        "meal_times": meal_time or "",
+        "record_count": 1,
+    }
+    for col in NUTRIENT_COLUMNS:
+        bucket[col] = _as_float(nutrients.get(col))
+
+    await execute(
+        "summary_record_food",
+        (_upsert_bucket_query(), bucket),
+        (BUMP_SUMMARY_VERSION_QUERY, {"member_id": member_id, "updated_at": datetime.now()}),
+        (text("DELETE FROM tb_member_daily_nutrition WHERE member_id = :member_id AND day < :cutoff"),
+         {"member_id": member_id, "cutoff": _window_start()}),
+    )
+
+
+async def record_prediction(member_id: float, diabetes_proba: float, hypertension_proba: float,
+                            cvd_proba: float, reg_date: Optional[datetime] = None):
+    """
+    tb_predict_record에 예측 결과가 저장될 때 호출. 더 최신 결과일 때만 요약의 예측 값을 교체합니다.
+    요약이 아직 없는 회원은 먼저 원본에서 구축해 일별 버킷까지 채운 뒤 반영합니다.
+    """
+    if not await _summary_exists(member_id):
+        await refresh_member(member_id)
+    summary = {
+        "member_id": member_id,
+        "diabetes_proba": float(diabetes_proba),
+        "hypertension_proba": float(hypertension_proba),
+        "cvd_proba": float(cvd_proba),
+        "predict_reg_date": reg_date or datetime.now(),
+        "updated_at": datetime.now(),
+    }
+    await execute("summary_record_prediction", (_upsert_summary_query(with_prediction=True), summary))
+
+
+async def rebuild(member_id: Optional[float] = None) -> int:
+    """
+    원본 테이블에서 요약을 다시 계산합니다. member_id가 없으면 전체 회원을 재구축합니다.
+    재구축된 회원 수를 반환합니다.
+    """
+    params: Dict[str, Any] = {"since": datetime.combine(_window_start(), datetime.min.time())}
+    if member_id is not None:
+        params["member_id"] = member_id
+        prediction_query = text(LATEST_PREDICTION_QUERY.format(where="WHERE member_id = :member_id"))
+        bucket_query = text(DAILY_BUCKET_QUERY.format(member_filter="AND member_id = :member_id"))
+        member_ids = [member_id]
+    else:
+        prediction_query = text(LATEST_PREDICTION_QUERY.format(where=""))
+        bucket_query = text(DAILY_BUCKET_QUERY.format(member_filter=""))
+        member_ids = [row["id"] for row in await fetch_all("summary_member_ids", MEMBER_IDS_QUERY)]
+
+    predictions = {row["member_id"]: row for row in await fetch_all("summary_rebuild_predictions", prediction_query, params)}
+    buckets = await fetch_all("summary_rebuild_buckets", bucket_query, params)
+
+    now = datetime.now()
+    summaries = []
+    for mid in member_ids:
+        prediction = predictions.get(mid)
+        summaries.append({
+            "member_id": mid,
+            "diabetes_proba": _as_float(prediction["diabetes_proba"]) if prediction else None,
+            "hypertension_proba": _as_float(prediction["hypertension_proba"]) if prediction else None,
+            "cvd_proba": _as_float(prediction["cvd_proba"]) if prediction else None,
+            "predict_reg_date": prediction["reg_date"] if prediction else None,
+            "updated_at": now,
+        })
+    bucket_rows = []
+    for row in buckets:
+        bucket = {"member_id": row["member_id"], "day": row["day"],
+                  "food_names": row["food_names"] or "", "meal_times": row["meal_times"] or "",
+                  "record_count": int(row["record_count"])}
+        for col in NUTRIENT_COLUMNS:
+            bucket[col] = _as_float(row[col])
+        bucket_rows.append(bucket)
+
+    # 요약 행은 upsert로 버전을 이어가고, 버킷만 지운 뒤 다시 채움
+    if member_id is not None:
+        delete_buckets = text("DELETE FROM tb_member_daily_nutrition WHERE member_id = :member_id")
+        delete_params = {"member_id": member_id}
+    else:
+        delete_buckets = text("DELETE FROM tb_member_daily_nutrition")
+        delete_params = None
+
+    await execute(
+        "summary_rebuild",
+        (delete_buckets, delete_params),
+        (_upsert_summary_query(with_prediction=True), summaries),
+        (_upsert_bucket_query(), bucket_rows),
+    )
+    return len(summaries)
+
+
+async def refresh_member(member_id: float):
+    """한 회원의 요약을 원본에서 다시 계산 (음식 기록 수정/삭제 시)"""
+    await rebuild(member_id)
+
+
+async def get_member_health_summary(member_id: float) -> Optional[Dict[str, Any]]:
+    """
+    get_user_health_data와 같은 형식으로 회원 건강 데이터를 반환합니다.
+    회원이 없으면 None. 요약이 아직 없는 회원은 원본에서 한 번 구축한 뒤 다시 읽습니다.
+    """
+    params = {"id": member_id, "since_day": _window_start()}
+    rows = await fetch_all("user_health_summary", MEMBER_SUMMARY_QUERY, params)
+    if not rows:
+        return None
+    if rows[0]["summary_member_id"] is None:
+        await refresh_member(member_id)
+        rows = await fetch_all("user_health_summary", MEMBER_SUMMARY_QUERY, params)
+
+    return _assemble_health_data(rows)
+
+
+async def get_member_health_summaries(member_ids: List[float]) -> Dict[Any, Dict[str, Any]]:
+    """
+    여러 회원의 건강 데이터를 get_member_health_summary와 같은 형식으로 한 번에 조회합니다. (회원 id -> 데이터)
+    요약이 아직 없는 회원은 원본에서 구축한 뒤 다시 읽습니다.
+    """
+    since_day = _window_start()
+    result: Dict[Any, Dict[str, Any]] = {}
+    for i in range(0, len(member_ids), MEMBER_SUMMARY_BULK_CHUNK):
+        chunk = member_ids[i:i + MEMBER_SUMMARY_BULK_CHUNK]
+        rows = await fetch_all("user_health_summary_bulk", MEMBER_SUMMARY_BULK_QUERY,
+                               {"ids": chunk, "since_day": since_day})
+        rows_by_member: Dict[Any, List[Dict[str, Any]]] = {}
+        for row in rows:
+            rows_by_member.setdefault(row["id"], []).append(row)
+
+        missing = [mid for mid, member_rows in rows_by_member.items() if member_rows[0]["summary_member_id"] is None]
+        for mid in missing:
+            await refresh_member(mid)
+        if missing:
+            refreshed = await fetch_all("user_health_summary_bulk", MEMBER_SUMMARY_BULK_QUERY,
+                                        {"ids": missing, "since_day": since_day})
+            for mid in missing:
+                rows_by_member[mid] = []
+            for row in refreshed:
+                rows_by_member[row["id"]].append(row)
+
+        for mid, member_rows in rows_by_member.items():
+            result[mid] = _assemble_health_data(member_rows)
+    return result
+
+
+def _assemble_health_data(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """회원 한 명의 요약 조회 행들을 get_user_health_data 형식으로 변환"""
+    first = rows[0]
+    data = {key: first[key] for key in [
+        "diabetes_proba", "hypertension_proba", "cvd_proba",
+        "age", "activity_level", "gender", "height", "weight", "id",
+        "end_date", "goal", "target_weight",
+    ]}
+    for key, value in data.items():
+        if isinstance(value, Decimal):
+            data[key] = float(value)
+    data["summary_version"] = first["summary_version"]
+
+    bucket_rows = [row for row in rows if row["day"] is not None and row["record_count"]]
+    food_counts: Counter = Counter()
+    meal_times: Dict[str, None] = {}
+    for row in bucket_rows:
+        food_counts.update(_split_csv(row["food_names"]))
+        meal_times.update(dict.fromkeys(_split_csv(row["meal_times"])))
+    totals = NutrientVector.sum([NutrientVector.from_mapping(row, SCHEMA_RECORD) for row in bucket_rows])
+
+    days_count = len(bucket_rows)
+    data["recent_foods"] = ",".join(food_counts) if food_counts else None
+    data["recent_food_counts"] = dict(food_counts)
+    data["meal_time"] = ",".join(meal_times) if meal_times else None
+    for col, avg_key in AVG_KEYS.items():
+        data[avg_key] = totals[col] / days_count if days_count > 0 else None
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="회원 건강 요약 테이블 관리")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = subparsers.add_parser("rebuild", help="원본 테이블에서 요약을 다시 계산")
+    rebuild_parser.add_argument("--member-id", type=int, default=None, help="특정 회원만 재구축")
+    args = parser.parse_args()
+
+    async def run():
+        await ensure_summary_tables()
+        count = await rebuild(args.member_id)
+        print(f"[HealthSummary] {count}명 요약 재구축 완료")
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+스트리밍 LLM 응답용 점진적 JSON 파서.
+
+Gemini 스트리밍 응답 텍스트를 조각 단위로 받아, 지정한 키의 배열("nutrition_per_food": [...])에서
+원소(객체)가 닫히는 즉시 파싱해 on_item으로 넘깁니다. 응답이 중간에 끊겨도 이미 닫힌 원소는 남습니다.
+코드 블록(```json)이나 배열 앞뒤의 다른 키는 그대로 두고 전체 텍스트는 text로 남기므로,
+스트림이 끝난 뒤 llm_json.parse_json_object(parser.text)로 나머지 필드를 읽을 수 있습니다.
+"""
+import re
+from typing import Any, Callable, List, Optional
+
+from app.core.log import get_logger, payload
+from app.services.llm_json import loads
+
+logger = get_logger(__name__)
+
+
+class JsonArrayStream:
+    """조각으로 들어오는 JSON 텍스트에서 array_key 배열의 원소를 완성되는 대로 꺼내는 파서"""
+
+    def __init__(self, array_key: str, on_item: Optional[Callable[[Any], None]] = None):
+        self.array_key = array_key
+        self.on_item = on_item
+        self.items: List[Any] = []
+        self.text = ""
+        self.completed = False  # 배열의 닫는 ']'까지 받았는지
+        self._key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key))
+        self._pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """텍스트 조각 추가. 이번 조각으로 완성된 원소 목록 반환 (on_item도 원소마다 호출)"""
+        self.text += chunk
+        completed: List[Any] = []
+        if not self._in_array and not self.completed:
+            match = self._key_pattern.search(self.text, self._pos)
+            if match is None:
+                # 키가 조각 경계에 걸쳐 있을 수 있으므로 끝부분은 다시 검사
+                self._pos = max(self._pos, len(self.text) - len(self.array_key) - 16)
+                return completed
+            self._in_array = True
+            self._pos = match.end()
+
+        text = self.text
+        pos = self._pos
+        while self._in_array and pos < len(text):
+            ch = text[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                if self._depth == 0:
+                    self._item_start = pos
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # 배열 자체가 닫힘
+                    self._in_array = False
+                    self.completed = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0 and self._item_start is not None:
+                        item = self._parse_item(text[self._item_start:pos + 1])
+                        self._item_start = None
+                        if item is not None:
+                            completed.append(item)
+            pos += 1
+        self._pos = pos
+
+        for item in completed:
+            self.items.append(item)
+            if self.on_item is not None:
+                self.on_item(item)
+        return completed
+
+    @staticmethod
+    def _parse_item(raw: str) -> Any:
+        try:
+            return loads(raw)
+        except ValueError:
+            logger.warning("원소 파싱 실패 - 건너뜀: %s", payload(raw, 100))
+            return None
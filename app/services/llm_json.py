@@ -0,0 +1,225 @@
+"""
+LLM 응답 JSON 공용 파싱 (orjson).
+
+- extract_json: 코드 블록(```json ... ```)이나 앞뒤 설명이 붙은 응답에서 JSON 본문을 한 번에 찾아 파싱
+- parse_model: 파싱 결과를 응답 스키마(pydantic)로 검증. "12g" 같은 값은 숫자로, 단일 문자열 제안은 리스트로 보정
+- loads / dumps: 서비스 전체에서 쓰는 orjson 래퍼 (dumps는 한글을 그대로 둔 UTF-8 bytes)
+
+직렬화 비용 비교 (표준 json vs orjson):
+    python -m app.services.llm_json bench [--rounds 2000]
+"""
+import argparse
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional, Type, TypeVar
+
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_OPENERS = {"{": "}", "[": "]"}
+
+
+class LLMJsonError(ValueError):
+    """응답에서 JSON을 찾지 못했거나 스키마 검증에 실패한 경우"""
+
+
+def loads(data) -> Any:
+    return orjson.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def extract_json(text: str) -> Any:
+    """응답 텍스트에서 처음 나오는 '{' 또는 '['부터 짝이 되는 마지막 닫는 괄호까지를 파싱"""
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        raise LLMJsonError(f"응답에서 JSON을 찾을 수 없습니다: {text[:100]}")
+    start = min(starts)
+    end = text.rfind(_OPENERS[text[start]])
+    if end <= start:
+        raise LLMJsonError(f"응답의 JSON이 닫히지 않았습니다: {text[:100]}")
+    try:
+        return orjson.loads(text[start:end + 1])
+    except orjson.JSONDecodeError as e:
+        raise LLMJsonError(f"JSON 파싱 실패: {e}")
+
+
+def parse_json_object(text: str) -> Optional[dict]:
+    """extract_json의 결과가 객체일 때만 반환. 실패 시 None"""
+    try:
+        value = extract_json(text)
+    except LLMJsonError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def parse_model(text_or_value: Any, model: Type[ModelT]) -> ModelT:
+    """응답 텍스트(또는 이미 파싱한 값)를 스키마로 검증"""
+    value = extract_json(text_or_value) if isinstance(text_or_value, str) else text_or_value
+    try:
+        return model.model_validate(value)
+    except ValidationError as e:
+        raise LLMJsonError(f"응답 형식 검증 실패: {e.errors()[:3]}")
+
+
+# --- LLM 응답 스키마 (알 수 없는 키는 그대로 유지) ---
+
+class _LenientModel(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+
+_NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _to_number(value) -> float:
+    """숫자 또는 "12.5g" 같은 단위 붙은 문자열 -> float. 해석할 수 없으면 0"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        match = _NUMBER_PATTERN.search(value.replace(",", ""))
+        if match:
+            return float(match.group())
+    return 0.0
+
+
+def _to_str_list(value) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(item) for item in value]
+
+
+class DietNutrition(_LenientModel):
+    protein: float = 0.0
+    carbohydrate: float = 0.0
+    water: float = 0.0
+    sugar: float = 0.0
+    fat: float = 0.0
+    fiber: float = 0.0
+    sodium: float = 0.0
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _number(cls, value):
+        return _to_number(value)
+
+
+class FoodNutrition(_LenientModel):
+    food: str
+    nutrition: DietNutrition = Field(default_factory=DietNutrition)
+
+
+class NutritionPerFoodResponse(_LenientModel):
+    nutrition_per_food: List[FoodNutrition] = Field(default_factory=list)
+
+
+class SuggestionResponse(_LenientModel):
+    deficient_nutrients: List[str] = Field(default_factory=list)
+    next_meal_suggestion: List[str] = Field(default_factory=list)
+
+    @field_validator("deficient_nutrients", "next_meal_suggestion", mode="before")
+    @classmethod
+    def _str_list(cls, value):
+        return _to_str_list(value)
+
+
+class MealFood(_LenientModel):
+    food: str
+    calories: float = 0.0
+    nutrients: Dict[str, float] = Field(default_factory=dict)
+
+    @field_validator("calories", mode="before")
+    @classmethod
+    def _number(cls, value):
+        return _to_number(value)
+
+    @field_validator("nutrients", mode="before")
+    @classmethod
+    def _numbers(cls, value):
+        return {key: _to_number(item) for key, item in (value or {}).items()}
+
+
+class MealAnalysisResponse(SuggestionResponse):
+    nutrition_data: List[MealFood] = Field(default_factory=list)
+    total_nutrition: Dict[str, float] = Field(default_factory=dict)
+
+    @field_validator("total_nutrition", mode="before")
+    @classmethod
+    def _numbers(cls, value):
+        return {key: _to_number(item) for key, item in (value or {}).items()}
+
+
+# --- 벤치마크 ---
+
+def _sample_payloads() -> Dict[str, Any]:
+    food = {"food": "김밥", "nutrition": {"protein": 10.0, "carbohydrate": 30.0, "water": 200.0, "sugar": 5.0,
+                                          "fat": 7.0, "fiber": 2.0, "sodium": 500.0}}
+    day = {"date": "2026-10-01", "total": {"calories": 1500.0, "protein": 60.0, "carbohydrates": 200.0, "fat": 50.0,
+                                           "fiber": 20.0, "sugar": 30.0, "water": 1500.0, "sodium": 2400.0,
+                                           "record_count": 6}, "meals": {}}
+    return {
+        "diet_analysis": {"food_list": ["김밥"] * 10, "nutrition_per_food": [food] * 10,
+                          "total_nutrition": food["nutrition"], "deficient_nutrients": ["식이섬유"],
+                          "next_meal_suggestion": ["나물 비빔밥"], "degraded": False},
+        "daily_range_366": {"data": {"days": [day] * 366, "total": day["total"]}},
+    }
+
+
+def _time(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def run_bench(rounds: int = 2000) -> Dict[str, Dict[str, float]]:
+    """샘플 응답 파싱/직렬화의 요청당 CPU 시간(µs): 표준 json vs orjson"""
+    results: Dict[str, Dict[str, float]] = {}
+    for name, payload in _sample_payloads().items():
+        results[f"dumps:{name}"] = {
+            "json": _time(lambda: json.dumps(payload, ensure_ascii=False).encode("utf-8"), rounds),
+            "orjson": _time(lambda: dumps(payload), rounds),
+        }
+    fenced = "```json\n" + json.dumps({"nutrition_per_food": _sample_payloads()["diet_analysis"]["nutrition_per_food"]},
+                                      ensure_ascii=False) + "\n```"
+
+    def legacy_parse():
+        cleaned = fenced.strip()
+        if cleaned.startswith("```json"):
+            cleaned = cleaned[len("```json"):].strip()
+        if cleaned.endswith("```"):
+            cleaned = cleaned[:-len("```")].strip()
+        return json.loads(cleaned[cleaned.find("{"):cleaned.rfind("}") + 1])
+
+    results["parse:nutrition_per_food"] = {
+        "json": _time(legacy_parse, rounds),
+        "orjson": _time(lambda: extract_json(fenced), rounds),
+    }
+    results["parse+validate:nutrition_per_food"] = {
+        "json": results["parse:nutrition_per_food"]["json"],
+        "orjson": _time(lambda: parse_model(fenced, NutritionPerFoodResponse), rounds),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 응답 JSON 파싱/직렬화 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bench_parser = subparsers.add_parser("bench", help="표준 json 대비 orjson 파싱/직렬화 시간 비교")
+    bench_parser.add_argument("--rounds", type=int, default=2000, help="항목별 반복 횟수")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        for name, timings in run_bench(args.rounds).items():
+            speedup = timings["json"] / timings["orjson"] if timings["orjson"] else float("inf")
+            print(f"{name:40s} json {timings['json']:9.1f}µs  orjson {timings['orjson']:9.1f}µs  x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+프롬프트 유형별 Gemini 응답 지연 기록.
+
+최근 지연 시간으로 유형별 적응형 타임아웃과 헤징(중복 요청) 시점을 정합니다.
+- timeout_for: 최근 p99 x LLM_TIMEOUT_MULTIPLIER (유형별 기본값~GEMINI_READ_TIMEOUT 범위로 제한)
+- hedge_delay: 최근 LLM_HEDGE_PERCENTILE 지연을 넘기면 중복 요청 (LLM_HEDGE_BUDGET 비율 이내)
+"""
+import bisect
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+PROMPT_EXTRACTION = "extraction"
+PROMPT_NUTRITION = "nutrition"
+PROMPT_SUGGESTION = "suggestion"
+PROMPT_VISION = "vision"
+PROMPT_RECOMMENDATION = "recommendation"
+PROMPT_GOAL = "goal"
+PROMPT_CALCULATION = "calculation"
+PROMPT_DEFAULT = "default"
+
+# 표본이 부족할 때 쓰는 유형별 기본 타임아웃(초)
+DEFAULT_TIMEOUTS = {
+    PROMPT_EXTRACTION: 15.0,
+    PROMPT_NUTRITION: 30.0,
+    PROMPT_SUGGESTION: 20.0,
+    PROMPT_VISION: 45.0,
+    PROMPT_RECOMMENDATION: 60.0,
+    PROMPT_GOAL: 30.0,
+    PROMPT_CALCULATION: 45.0,
+    PROMPT_DEFAULT: 60.0,
+}
+
+LLM_TIMEOUT_MIN = float(os.environ.get("LLM_TIMEOUT_MIN", "5"))
+LLM_TIMEOUT_MAX = float(os.environ.get("GEMINI_READ_TIMEOUT", "60"))
+LLM_TIMEOUT_MULTIPLIER = float(os.environ.get("LLM_TIMEOUT_MULTIPLIER", "3"))
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "0.95"))
+# 전체 호출 대비 헤지 요청 비율 상한
+LLM_HEDGE_BUDGET = float(os.environ.get("LLM_HEDGE_BUDGET", "0.1"))
+LLM_HEDGE_ENABLED = os.environ.get("LLM_HEDGE_ENABLED", "true").lower() == "true"
+# 적응형 값 계산에 필요한 최소 표본 수
+LLM_LATENCY_MIN_SAMPLES = int(os.environ.get("LLM_LATENCY_MIN_SAMPLES", "20"))
+LLM_LATENCY_WINDOW = int(os.environ.get("LLM_LATENCY_WINDOW", "500"))
+
+# 누적 히스토그램 버킷 경계(초)
+HISTOGRAM_BUCKETS = [0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0]
+
+
+class _TypeLatency:
+    def __init__(self, window: int):
+        self.recent: Deque[float] = deque(maxlen=window)
+        self.bucket_counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        self.recent.append(seconds)
+        self.bucket_counts[bisect.bisect_left(HISTOGRAM_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+
+class LatencyTracker:
+    """프롬프트 유형별 최근 지연 시간과 누적 히스토그램"""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW, min_samples: int = LLM_LATENCY_MIN_SAMPLES,
+                 hedge_budget: float = LLM_HEDGE_BUDGET):
+        self.window = window
+        self.min_samples = min_samples
+        self.hedge_budget = hedge_budget
+        self._types: Dict[str, _TypeLatency] = {}
+        self._lock = threading.Lock()
+        self._hedge_tokens = 1.0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+
+    def _get(self, prompt_type: str) -> _TypeLatency:
+        state = self._types.get(prompt_type)
+        if state is None:
+            state = self._types.setdefault(prompt_type, _TypeLatency(self.window))
+        return state
+
+    def record(self, prompt_type: str, seconds: float):
+        with self._lock:
+            self._get(prompt_type).record(seconds)
+
+    def percentile(self, prompt_type: str, q: float) -> Optional[float]:
+        """최근 표본의 q 분위수. 표본이 부족하면 None"""
+        with self._lock:
+            samples: List[float] = sorted(self._get(prompt_type).recent)
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def timeout_for(self, prompt_type: str) -> float:
+        default = DEFAULT_TIMEOUTS.get(prompt_type, DEFAULT_TIMEOUTS[PROMPT_DEFAULT])
+        p99 = self.percentile(prompt_type, 0.99)
+        if p99 is None:
+            return min(default, LLM_TIMEOUT_MAX)
+        return min(max(p99 * LLM_TIMEOUT_MULTIPLIER, LLM_TIMEOUT_MIN), LLM_TIMEOUT_MAX)
+
+    def hedge_delay(self, prompt_type: str) -> Optional[float]:
+        """이 시간 안에 응답이 없으면 헤지 요청. 헤징 불가(비활성/표본 부족)면 None"""
+        if not LLM_HEDGE_ENABLED:
+            return None
+        return self.percentile(prompt_type, LLM_HEDGE_PERCENTILE)
+
+    def on_call(self):
+        """호출마다 헤지 예산을 budget 비율만큼 적립 (최대 10회분)"""
+        with self._lock:
+            self._hedge_tokens = min(self._hedge_tokens + self.hedge_budget, 10.0)
+
+    def try_consume_hedge(self) -> bool:
+        with self._lock:
+            if self._hedge_tokens < 1.0:
+                return False
+            self._hedge_tokens -= 1.0
+            self.hedges_sent += 1
+            return True
+
+    def record_hedge_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """유형별 누적 히스토그램(버킷 경계, 누적 개수), 합계, 개수와 최근 p50/p95/p99"""
+        with self._lock:
+            types = {name: (list(state.bucket_counts), state.count, state.total)
+                     for name, state in self._types.items()}
+        result = {}
+        for name, (bucket_counts, count, total) in types.items():
+            cumulative, running = [], 0
+            for bound, bucket_count in zip(HISTOGRAM_BUCKETS + [float("inf")], bucket_counts):
+                running += bucket_count
+                cumulative.append((bound, running))
+            result[name] = {
+                "buckets": cumulative,
+                "count": count,
+                "sum": total,
+                "p50": self.percentile(name, 0.5),
+                "p95": self.percentile(name, 0.95),
+                "p99": self.percentile(name, 0.99),
+                "timeout": self.timeout_for(name),
+            }
+        return result
+
+
+latency_tracker = LatencyTracker()
@@ -0,0 +1,163 @@
+"""
+Gemini API 키 하나를 여러 프로세스가 나눠 쓰기 위한 쿼터 임대 (tb_llm_quota_lease).
+
+서버 워커와 야간 배치(recommendation_precompute)는 각자 llm_scheduler 토큰 버킷을 가지므로, 그대로 두면 배치 호출이
+서버 쿼터(LLM_RATE_PER_MINUTE) 위에 더해져 상류 429가 interactive 요청까지 막습니다.
+배치는 시작할 때 쓸 분당 호출 수를 임대로 등록하고, 서버는 살아 있는 임대의 합계를 자기 쿼터에서 뺍니다.
+
+- 배치가 받을 수 있는 몫은 전체 쿼터의 (1 - LLM_INTERACTIVE_RESERVE)에서 다른 임대를 뺀 만큼까지
+  (나머지는 항상 서버의 interactive 요청 몫)
+- 서버는 LLM_QUOTA_REFRESH_SECONDS마다 임대를 다시 읽고, 배치는 등록 후 그만큼 기다린 뒤 호출을 시작
+- 배치는 임대를 주기적으로 연장하고 끝나면 반납. 배치가 죽으면 LLM_QUOTA_LEASE_SECONDS 뒤 만료되어 서버 쿼터가 돌아옴
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import text
+
+from app.core.database import engine, execute, fetch_one
+from app.core.log import get_logger
+from app.services.llm_scheduler import LLM_INTERACTIVE_RESERVE, LLM_RATE_PER_MINUTE, LLMScheduler, llm_scheduler
+
+logger = get_logger(__name__)
+
+LLM_QUOTA_REFRESH_SECONDS = float(os.environ.get("LLM_QUOTA_REFRESH_SECONDS", "15"))
+LLM_QUOTA_LEASE_SECONDS = float(os.environ.get("LLM_QUOTA_LEASE_SECONDS", "60"))
+
+CREATE_QUOTA_TABLE = text("""
+    CREATE TABLE IF NOT EXISTS tb_llm_quota_lease (
+        holder VARCHAR(64) NOT NULL PRIMARY KEY,
+        rate_per_minute DOUBLE NOT NULL,
+        expires_at DATETIME NOT NULL
+    )
+""")
+
+LEASED_RATE_QUERY = text("""
+    SELECT COALESCE(SUM(rate_per_minute), 0) AS rate FROM tb_llm_quota_lease
+    WHERE expires_at > :now AND holder <> :exclude
+""")
+
+RENEW_LEASE_QUERY = text("UPDATE tb_llm_quota_lease SET expires_at = :expires_at WHERE holder = :holder")
+RELEASE_LEASE_QUERY = text("DELETE FROM tb_llm_quota_lease WHERE holder = :holder")
+
+
+def _upsert_lease_query():
+    insert = """
+        INSERT INTO tb_llm_quota_lease (holder, rate_per_minute, expires_at)
+        VALUES (:holder, :rate_per_minute, :expires_at)
+    """
+    if engine.dialect.name == "mysql":
+        return text(insert + """
+            ON DUPLICATE KEY UPDATE rate_per_minute = VALUES(rate_per_minute), expires_at = VALUES(expires_at)
+        """)
+    return text(insert + """
+        ON CONFLICT (holder) DO UPDATE SET rate_per_minute = excluded.rate_per_minute, expires_at = excluded.expires_at
+    """)
+
+
+async def ensure_quota_table():
+    await execute("llm_quota_ddl", (CREATE_QUOTA_TABLE, None))
+
+
+async def leased_rate(exclude: str = "") -> float:
+    """만료되지 않은 임대의 분당 호출 수 합계 (exclude 임대자는 제외)"""
+    row = await fetch_one("llm_quota_leased", LEASED_RATE_QUERY, {"now": datetime.now(), "exclude": exclude})
+    return float(row["rate"] or 0) if row else 0.0
+
+
+async def register_lease(holder: str, rate_per_minute: float,
+                         lease_seconds: float = LLM_QUOTA_LEASE_SECONDS) -> float:
+    """분당 rate_per_minute회 임대를 요청하고 실제로 받은 몫 반환 (interactive 몫과 다른 임대를 빼고 남은 만큼까지)"""
+    available = LLM_RATE_PER_MINUTE * (1 - LLM_INTERACTIVE_RESERVE) - await leased_rate(exclude=holder)
+    granted = max(min(rate_per_minute, available), 0.0)
+    await execute("llm_quota_register", (_upsert_lease_query(), {
+        "holder": holder,
+        "rate_per_minute": granted,
+        "expires_at": datetime.now() + timedelta(seconds=lease_seconds),
+    }))
+    return granted
+
+
+async def renew_lease(holder: str, lease_seconds: float = LLM_QUOTA_LEASE_SECONDS):
+    await execute("llm_quota_renew", (RENEW_LEASE_QUERY, {
+        "holder": holder, "expires_at": datetime.now() + timedelta(seconds=lease_seconds),
+    }))
+
+
+async def release_lease(holder: str):
+    await execute("llm_quota_release", (RELEASE_LEASE_QUERY, {"holder": holder}))
+
+
+@asynccontextmanager
+async def batch_quota(holder: str, rate_per_minute: float, lease_seconds: float = LLM_QUOTA_LEASE_SECONDS,
+                      settle_seconds: float = LLM_QUOTA_REFRESH_SECONDS) -> AsyncIterator[float]:
+    """
+    배치 실행 동안 쿼터를 임대하고 받은 분당 호출 수를 돌려줌.
+    서버가 임대를 반영할 때까지 settle_seconds 기다린 뒤 진입하고, 블록 안에서는 임대를 계속 연장
+    """
+    await ensure_quota_table()
+    granted = await register_lease(holder, rate_per_minute, lease_seconds)
+    if granted < rate_per_minute:
+        logger.warning("'%s' 쿼터 임대: 요청 분당 %.0f회 중 %.0f회만 배정 (interactive 몫/다른 임대 제외)",
+                       holder, rate_per_minute, granted)
+    else:
+        logger.info("'%s' 쿼터 임대: 분당 %.0f회", holder, granted)
+
+    async def keep_alive():
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            try:
+                await renew_lease(holder, lease_seconds)
+            except Exception as e:
+                logger.warning("'%s' 쿼터 임대 연장 실패: %s", holder, e)
+
+    renewer = asyncio.create_task(keep_alive())
+    try:
+        await asyncio.sleep(settle_seconds)
+        yield granted
+    finally:
+        renewer.cancel()
+        await asyncio.gather(renewer, return_exceptions=True)
+        await release_lease(holder)
+        logger.info("'%s' 쿼터 임대 반납", holder)
+
+
+class QuotaSync:
+    """서버 워커: 다른 프로세스의 임대 합계를 주기적으로 읽어 스케줄러 쿼터에서 뺌"""
+
+    def __init__(self, scheduler: LLMScheduler, interval: float = LLM_QUOTA_REFRESH_SECONDS):
+        self.scheduler = scheduler
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self):
+        reserved = await leased_rate()
+        if reserved != self.scheduler.reserved_per_minute:
+            self.scheduler.configure(reserved_per_minute=reserved)
+            logger.info("배치 임대 분당 %.0f회 반영 (이 프로세스 쿼터 분당 %.0f회)", reserved, self.scheduler.rate * 60)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                # DB 오류 시 마지막으로 읽은 값을 유지
+                logger.warning("쿼터 임대 조회 실패: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if self._task is None:
+            await ensure_quota_table()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+quota_sync = QuotaSync(llm_scheduler)
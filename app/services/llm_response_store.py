@@ -0,0 +1,204 @@
+"""
+Gemini 응답 디스크 저장소 (내용 주소 기반, zstd 압축).
+
+모델 이름 + generationConfig + 요청 파트(프롬프트, 이미지)의 sha256을 키로 응답 JSON을 저장합니다.
+같은 프롬프트(영양 분석, 다음 끼니 제안, 목표 영양소, 영양소 계산 등)가 반복되면 네트워크 없이 응답합니다.
+
+LLM_STORE_MODE
+- off: 사용 안 함
+- cache: 유효 기간(LLM_STORE_TTL) 안의 저장 응답을 재사용하고, 없으면 호출 후 저장 (기본값)
+  (게이트웨이는 호출자가 검증한 완결 응답만 저장 - gemini_gateway의 validate 참고)
+  저장할 때 LLM_STORE_PURGE_INTERVAL마다 한 번 유효 기간이 지난 항목을 백그라운드에서 삭제
+- record: 항상 Gemini를 호출하고 응답을 덮어써 저장 (재생용 녹화)
+- replay: 저장된 응답만 사용 (유효 기간 무시). 없으면 GeminiError - 부하 테스트/CI를 네트워크 없이 결정적으로 실행
+
+사용:
+    python -m app.services.llm_response_store stats
+    python -m app.services.llm_response_store purge
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import zstandard
+from dotenv import load_dotenv
+
+from app.core.log import get_logger
+from app.core.metrics import record_cache
+from app.services.llm_json import dumps, loads
+
+load_dotenv(dotenv_path=".env")
+
+logger = get_logger(__name__)
+
+MODE_OFF = "off"
+MODE_CACHE = "cache"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+STORE_MODES = {MODE_OFF, MODE_CACHE, MODE_RECORD, MODE_REPLAY}
+
+LLM_STORE_MODE = os.environ.get("LLM_STORE_MODE", MODE_CACHE).lower()
+LLM_STORE_DIR = os.environ.get("LLM_STORE_DIR", "llm_store")
+LLM_STORE_TTL = int(os.environ.get("LLM_STORE_TTL", str(7 * 24 * 60 * 60)))
+LLM_STORE_ZSTD_LEVEL = int(os.environ.get("LLM_STORE_ZSTD_LEVEL", "3"))
+LLM_STORE_PURGE_INTERVAL = int(os.environ.get("LLM_STORE_PURGE_INTERVAL", str(60 * 60)))
+
+ENTRY_SUFFIX = ".json.zst"
+# 이보다 오래된 임시 파일만 중단된 쓰기로 보고 삭제 (다른 워커가 쓰는 중인 파일은 남김)
+STALE_TMP_SECONDS = 60
+
+
+def compute_store_key(model: str, generation_config: Optional[Dict[str, Any]], parts: List[Dict[str, Any]]) -> str:
+    """모델, 생성 설정, 요청 파트로 내용 주소 키(sha256) 계산"""
+    payload = {"model": model, "generation_config": generation_config or {}, "parts": parts}
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMResponseStore:
+    """키 앞 두 글자로 디렉터리를 나눠 응답을 zstd 압축 파일로 저장"""
+
+    def __init__(self, root: str = LLM_STORE_DIR, mode: str = LLM_STORE_MODE, ttl: int = LLM_STORE_TTL,
+                 level: int = LLM_STORE_ZSTD_LEVEL, purge_interval: int = LLM_STORE_PURGE_INTERVAL):
+        if mode not in STORE_MODES:
+            raise ValueError(f"알 수 없는 LLM_STORE_MODE: {mode} (off/cache/record/replay)")
+        self.root = Path(root)
+        self.mode = mode
+        self.ttl = ttl
+        self.level = level
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self._purge_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != MODE_OFF
+
+    @property
+    def replay_only(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{ENTRY_SUFFIX}"
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                entry = loads(zstandard.ZstdDecompressor().decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except (zstandard.ZstdError, ValueError) as e:
+            logger.warning("손상된 항목 무시: %s (%s)", path.name, e)
+            return None
+        # replay 모드는 녹화 시점과 무관하게 재생
+        if self.mode == MODE_CACHE and time.time() - entry.get("created_at", 0) > self.ttl:
+            return None
+        return entry["response"]
+
+    def _write(self, key: str, model: str, response: Dict[str, Any]):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"model": model, "created_at": time.time(), "response": response}
+        data = zstandard.ZstdCompressor(level=self.level).compress(dumps(entry))
+        # 동시에 같은 키를 쓰더라도 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 임시 파일 후 교체
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{time.monotonic_ns()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """저장된 응답 반환. 사용 안 함/녹화 모드이거나 없으면 None"""
+        if self.mode in (MODE_OFF, MODE_RECORD):
+            return None
+        response = await asyncio.to_thread(self._read, key)
+        if response is None:
+            self.misses += 1
+            record_cache("llm_response_store", misses=1)
+        else:
+            self.hits += 1
+            record_cache("llm_response_store", hits=1)
+        return response
+
+    async def put(self, key: str, model: str, response: Dict[str, Any]):
+        if self.mode not in (MODE_CACHE, MODE_RECORD):
+            return
+        try:
+            await asyncio.to_thread(self._write, key, model, response)
+            self.writes += 1
+        except OSError as e:
+            logger.warning("저장 실패: %s", e)
+        self._purge_if_due()
+
+    def _purge_if_due(self):
+        """cache 모드에서 purge_interval마다 만료 항목 삭제를 백그라운드로 시작 (저장 호출자는 기다리지 않음)"""
+        if self.mode != MODE_CACHE or (self._purge_task is not None and not self._purge_task.done()):
+            return
+        now = time.monotonic()
+        if self._last_purge and now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        self._purge_task = asyncio.create_task(self._purge())
+
+    async def _purge(self):
+        try:
+            removed = await asyncio.to_thread(self.purge_expired)
+        except OSError as e:
+            logger.warning("만료 항목 삭제 실패: %s", e)
+            return
+        if removed:
+            logger.info("만료 항목 %d개 삭제", removed)
+
+    def purge_expired(self) -> int:
+        """유효 기간이 지난 항목과 중단된 쓰기의 임시 파일 삭제 (다른 프로세스가 함께 삭제해도 안전)"""
+        removed = 0
+        now = time.time()
+        if not self.root.exists():
+            return 0
+        for path in self.root.glob("*/*"):
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            cutoff = now - (STALE_TMP_SECONDS if path.name.endswith(".tmp") else self.ttl)
+            if mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def disk_stats(self) -> Dict[str, Any]:
+        entries, total_bytes = 0, 0
+        if self.root.exists():
+            for path in self.root.glob(f"*/*{ENTRY_SUFFIX}"):
+                entries += 1
+                total_bytes += path.stat().st_size
+        return {"mode": self.mode, "root": str(self.root), "entries": entries, "bytes": total_bytes}
+
+
+llm_response_store = LLMResponseStore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gemini 응답 저장소 관리")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="저장된 항목 수와 디스크 사용량")
+    subparsers.add_parser("purge", help="유효 기간이 지난 항목 삭제")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        print(f"[LLMResponseStore] {llm_response_store.disk_stats()}")
+    else:
+        removed = llm_response_store.purge_expired()
+        print(f"[LLMResponseStore] {removed}개 항목 삭제")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Gemini 호출 쿼터 스케줄러.
+
+토큰 버킷 하나(분당 호출 수)를 우선순위 레인들이 나눠 씁니다.
+- interactive: 사용자가 응답을 기다리는 요청 (/analysis/diet, /analyze/image, /diet/* 등)
+- batch: 추천 사전 계산, 캐시 워밍 등 대량 작업
+
+batch 레인은 interactive 대기자가 있거나 버킷 잔량이 예약분(LLM_INTERACTIVE_RESERVE) 이하이면
+토큰을 받지 못하므로, interactive 수요가 늘면 자동으로 양보합니다.
+
+다른 프로세스(야간 배치)가 같은 API 키의 쿼터 일부를 임대해 쓰는 동안에는 그 몫(reserved_per_minute)을
+이 프로세스의 쿼터에서 뺍니다. (llm_quota 참고)
+프리포크 워커 N개가 함께 서비스할 때는 워커마다 남은 쿼터의 1/N(share)만 씁니다. (app/core/prefork.py)
+
+사용:
+    with llm_lane(LANE_BATCH):
+        await gemini_gateway.generate_text(...)
+"""
+import asyncio
+import contextvars
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, List, Tuple
+
+LANE_INTERACTIVE = "interactive"
+LANE_BATCH = "batch"
+
+LLM_RATE_PER_MINUTE = float(os.environ.get("LLM_RATE_PER_MINUTE", "600"))
+LLM_BURST = float(os.environ.get("LLM_BURST", "20"))
+# 버킷 용량 중 batch가 건드리지 못하는 비율
+LLM_INTERACTIVE_RESERVE = float(os.environ.get("LLM_INTERACTIVE_RESERVE", "0.25"))
+LLM_LANE_CONCURRENCY = {
+    LANE_INTERACTIVE: int(os.environ.get("LLM_INTERACTIVE_CONCURRENCY", "16")),
+    LANE_BATCH: int(os.environ.get("LLM_BATCH_CONCURRENCY", "4")),
+}
+# 우선순위 순서 (앞이 높음)
+LANE_ORDER = [LANE_INTERACTIVE, LANE_BATCH]
+
+_current_lane: contextvars.ContextVar[str] = contextvars.ContextVar("llm_lane", default=LANE_INTERACTIVE)
+
+
+@contextmanager
+def llm_lane(lane: str):
+    """이 블록 안에서 실행되는 Gemini 호출의 레인 지정"""
+    if lane not in LLM_LANE_CONCURRENCY:
+        raise ValueError(f"알 수 없는 LLM 레인: {lane}")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+def current_lane() -> str:
+    return _current_lane.get()
+
+
+class _LaneState:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.waiters: Deque[Tuple[asyncio.Future, float]] = deque()
+        # 대기 시간 통계
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=1000)
+
+    def record_wait(self, waited: float):
+        self.granted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.recent_waits.append(waited)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class LLMScheduler:
+    """우선순위 레인과 레인별 동시 실행 상한을 가진 토큰 버킷 스케줄러"""
+
+    def __init__(self, rate_per_minute: float = LLM_RATE_PER_MINUTE, burst: float = LLM_BURST,
+                 lane_concurrency: Dict[str, int] = None, interactive_reserve: float = LLM_INTERACTIVE_RESERVE):
+        self.rate_per_minute = rate_per_minute
+        # 다른 프로세스가 임대해 쓰는 분당 호출 수
+        self.reserved_per_minute = 0.0
+        # 같은 쿼터를 나눠 쓰는 서버 워커 중 이 프로세스의 몫
+        self.share = 1.0
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(burst, 1.0)
+        self.reserve = self._reserve_tokens(interactive_reserve)
+        self.tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lanes = {lane: _LaneState(limit) for lane, limit in (lane_concurrency or LLM_LANE_CONCURRENCY).items()}
+        self._timer: asyncio.TimerHandle = None
+
+    def _reserve_tokens(self, interactive_reserve: float) -> float:
+        # batch가 굶지 않도록 예약분은 용량 - 1을 넘지 않음
+        return min(self.capacity * interactive_reserve, self.capacity - 1)
+
+    def configure(self, rate_per_minute: float = None, lane_concurrency: Dict[str, int] = None,
+                  reserved_per_minute: float = None, interactive_reserve: float = None, share: float = None):
+        """
+        실행 중 쿼터/레인별 동시 실행 상한 변경 (배치 워커 프로세스별 몫 배분 등)
+        reserved_per_minute: 다른 프로세스가 임대한 분당 호출 수 (이 프로세스 쿼터에서 뺌)
+        interactive_reserve: interactive 호출이 없는 배치 프로세스는 0으로 두어 예약분을 남기지 않음
+        share: 임대를 뺀 쿼터 중 이 프로세스가 쓰는 비율 (프리포크 워커 N개면 1/N)
+        """
+        self._refill()
+        if rate_per_minute is not None:
+            self.rate_per_minute = rate_per_minute
+        if reserved_per_minute is not None:
+            self.reserved_per_minute = reserved_per_minute
+        if share is not None:
+            self.share = share
+        self.rate = max(self.rate_per_minute - self.reserved_per_minute, 0.0) * self.share / 60.0
+        if interactive_reserve is not None:
+            self.reserve = self._reserve_tokens(interactive_reserve)
+        for lane, limit in (lane_concurrency or {}).items():
+            self._lanes[lane].concurrency = limit
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def _can_grant(self, lane: str) -> bool:
+        state = self._lanes[lane]
+        if state.in_flight >= state.concurrency or self.tokens < 1:
+            return False
+        if lane == LANE_INTERACTIVE:
+            return True
+        # 하위 레인은 상위 레인 대기자가 없고 예약분을 남길 수 있을 때만
+        for higher in LANE_ORDER[:LANE_ORDER.index(lane)]:
+            if self._lanes[higher].waiters:
+                return False
+        return self.tokens - 1 >= self.reserve
+
+    def _dispatch(self):
+        self._refill()
+        now = time.monotonic()
+        for lane in LANE_ORDER:
+            state = self._lanes[lane]
+            while state.waiters and self._can_grant(lane):
+                future, enqueued_at = state.waiters.popleft()
+                if future.done():
+                    continue
+                self.tokens -= 1
+                state.in_flight += 1
+                state.record_wait(now - enqueued_at)
+                future.set_result(None)
+
+        # 토큰 부족으로 남은 대기자가 있으면 필요한 토큰이 찰 시점에 다시 배분
+        # (동시 실행 상한에 걸린 레인은 release에서 다시 배분되므로 제외)
+        needed = None
+        for lane in LANE_ORDER:
+            state = self._lanes[lane]
+            if state.waiters and state.in_flight < state.concurrency:
+                required = 1 if lane == LANE_INTERACTIVE else self.reserve + 1
+                needed = required if needed is None else min(needed, required)
+        if needed is not None and self.tokens < needed and self._timer is None and self.rate > 0:
+            delay = max((needed - self.tokens) / self.rate, 0.001)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    async def acquire(self, lane: str):
+        state = self._lanes[lane]
+        future = asyncio.get_running_loop().create_future()
+        state.waiters.append((future, time.monotonic()))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 배정 직후 취소된 경우 슬롯 반환
+                self.release(lane)
+            else:
+                # 배정 전에 취소되면 대기열에서 빼야 queued 통계와 하위 레인 배분이 정상
+                for entry in state.waiters:
+                    if entry[0] is future:
+                        state.waiters.remove(entry)
+                        break
+                self._dispatch()
+            raise
+
+    def release(self, lane: str):
+        self._lanes[lane].in_flight -= 1
+        self._dispatch()
+
+    def penalize(self):
+        """상류에서 429를 받으면 버킷을 비워 잠시 호출을 멈춤"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+    @asynccontextmanager
+    async def slot(self, lane: str = None):
+        lane = lane or current_lane()
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """레인별 대기열 길이, 실행 중 수, 대기 시간 통계(초)"""
+        stats = {}
+        for lane, state in self._lanes.items():
+            recent = list(state.recent_waits)
+            stats[lane] = {
+                "queued": len(state.waiters),
+                "in_flight": state.in_flight,
+                "concurrency": state.concurrency,
+                "granted": state.granted,
+                "avg_wait": state.total_wait / state.granted if state.granted else 0.0,
+                "p95_wait": _percentile(recent, 0.95),
+                "max_wait": state.max_wait,
+            }
+        return stats
+
+
+llm_scheduler = LLMScheduler()
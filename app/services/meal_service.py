@@ -1,15 +1,27 @@
 import platform
 import os
-import json
+import asyncio
+from typing import Callable, Optional
 from PIL import Image
-import google.generativeai as genai
 from dotenv import load_dotenv
 from pathlib import Path
+from app.core.log import get_logger
+from app.core.metrics import STAGE_IMAGE_LOAD, STAGE_VISION, stage
+from app.services.circuit_breaker import CircuitOpenError, BREAKER_MEAL_IMAGE
+from app.services.gemini_gateway import gemini_gateway, image_part, text_part, GeminiError
+from app.services.json_stream import JsonArrayStream
+from app.services.llm_json import LLMJsonError, MealAnalysisResponse, parse_json_object, parse_model
+from app.services.llm_latency import PROMPT_VISION
+from app.services.nutrient_vector import NutrientVector, SCHEMA_MEAL_NUTRIENTS, SCHEMA_MEAL_TOTAL
+
+logger = get_logger(__name__)
 
 # 환경 변수 로드
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 ALLOWED_IMAGE_DIR = os.getenv("ALLOWED_IMAGE_DIR")
+# 일괄 분석 시 전체 요청에 걸쳐 동시에 실행되는 이미지 분석 수 상한
+MEAL_ANALYSIS_CONCURRENCY = int(os.getenv("MEAL_ANALYSIS_CONCURRENCY", "4"))
 
 def get_upload_path(upload_dir='uploads') -> Path:
     home_dir = Path.home()
@@ -36,11 +48,11 @@ if not ALLOWED_IMAGE_DIR.exists():
 if not ALLOWED_IMAGE_DIR.is_dir():
     raise ValueError(f"ALLOWED_IMAGE_DIR은 디렉토리가 아닙니다: {ALLOWED_IMAGE_DIR}")
 
-print(f"Using ALLOWED_IMAGE_DIR: {ALLOWED_IMAGE_DIR}")
+logger.info("Using ALLOWED_IMAGE_DIR: %s", ALLOWED_IMAGE_DIR)
 
-# Gemini API 설정
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel("gemini-1.5-flash")
+# Gemini 모델 (호출은 공용 게이트웨이 사용)
+MEAL_MODEL = "gemini-1.5-flash"
+IMAGE_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png"}
 
 # 파일 경로 검증
 def validate_file_path(file_path: str) -> str:
@@ -60,16 +72,29 @@ def validate_file_path(file_path: str) -> str:
     except Exception as e:
         raise ValueError(f"파일 경로 검증 실패: {str(e)}")
 
+def _load_image(file_path: str):
+    """이미지 검증 후 원본 바이트와 MIME 타입 반환"""
+    with Image.open(file_path) as image:
+        image.verify()
+        image_format = image.format
+    with open(file_path, "rb") as f:
+        data = f.read()
+    return data, IMAGE_MIME_TYPES.get(image_format, "image/jpeg")
+
 # 식단 분석 함수
-def analyze_meal(file_path: str) -> dict:
+async def analyze_meal(file_path: str, on_item: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    식단 이미지 분석. 응답은 스트리밍으로 받아 nutrition_data 원소가 완성될 때마다 on_item(원소)을 호출합니다.
+    응답이 중간에 끊기면 받은 음식들만으로 결과를 만들고 "partial": True를 붙입니다.
+    """
     # 파일 경로 검증
     file_path = validate_file_path(file_path)
 
     # 이미지 열기
     try:
-        image = Image.open(file_path)
-        image.verify()
-        image = Image.open(file_path)
+        with stage(STAGE_IMAGE_LOAD):
+            image_bytes, mime_type = await asyncio.to_thread(_load_image, file_path)
+        image = image_part(image_bytes, mime_type)
     except Exception as e:
         raise ValueError(f"유효하지 않은 이미지 파일입니다: {str(e)}")
 
@@ -80,10 +105,13 @@ def analyze_meal(file_path: str) -> dict:
     다른 텍스트나 코멘트는 포함시키지 마세요.
     """
     try:
-        is_food_response = model.generate_content([is_food_prompt, image])
-        is_food_text = is_food_response.text.strip()
+        is_food_text = (await gemini_gateway.generate_text([text_part(is_food_prompt), image], model=MEAL_MODEL, prompt_type=PROMPT_VISION,
+                                                      breaker=BREAKER_MEAL_IMAGE,
+                                                      validate=lambda text: text.strip() in ("Yes", "No"))).strip()
         if is_food_text == "No":
             return {"error": "음식 사진이 아닙니다. 음식 사진으로 바꿔주세요."}
+    except CircuitOpenError:
+        raise
     except Exception as e:
         raise Exception(f"음식 확인 API 호출 실패: {str(e)}")
 
@@ -131,14 +159,100 @@ def analyze_meal(file_path: str) -> dict:
     음식이름은 한국어로 나타내주세요.
     다른 텍스트나 코멘트는 포함시키지 마세요.
     """
+    stream = JsonArrayStream("nutrition_data", on_item=on_item)
     try:
-        response = model.generate_content([analysis_prompt, image])
-        response_text = response.text.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:-3].strip()
-        diet_analysis = json.loads(response_text)
-        return diet_analysis
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Gemini 응답을 JSON으로 파싱하지 못했습니다: {str(e)}")
+        with stage(STAGE_VISION):
+            response_text = await gemini_gateway.stream_text([text_part(analysis_prompt), image], on_text=stream.feed,
+                                                             model=MEAL_MODEL, prompt_type=PROMPT_VISION,
+                                                             breaker=BREAKER_MEAL_IMAGE, validate=_is_meal_analysis)
+    except CircuitOpenError:
+        raise
+    except GeminiError as e:
+        if not stream.items:
+            raise Exception(f"Gemini API 호출 실패: {str(e)}")
+        logger.warning("응답 수신 중단 - 받은 음식 %d개로 결과 생성: %s", len(stream.items), e)
+        return _partial_analysis(stream.items)
     except Exception as e:
-        raise Exception(f"Gemini API 호출 실패: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Gemini API 호출 실패: {str(e)}")
+
+    diet_analysis = parse_json_object(response_text)
+    if diet_analysis is not None:
+        try:
+            return parse_model(diet_analysis, MealAnalysisResponse).model_dump()
+        except LLMJsonError as e:
+            logger.warning("응답 형식 검증 실패: %s", e)
+    if stream.items:
+        logger.warning("응답 JSON이 완결되지 않음 - 받은 음식 %d개로 결과 생성", len(stream.items))
+        return _partial_analysis(stream.items)
+    raise ValueError(f"Gemini 응답을 JSON으로 파싱하지 못했습니다: {response_text[:200]}")
+
+def _is_meal_analysis(text: str) -> bool:
+    """응답 저장소 기록 조건: 응답 전체가 MealAnalysisResponse 형식"""
+    value = parse_json_object(text)
+    return value is not None and parse_model(value, MealAnalysisResponse) is not None
+
+def _partial_analysis(nutrition_data: list) -> dict:
+    """끊긴 응답에서 받은 nutrition_data만으로 분석 결과 구성 (합계는 로컬 계산, 제안 없음)"""
+    return {
+        "nutrition_data": nutrition_data,
+        "total_nutrition": merge_total_nutrition(nutrition_data),
+        "deficient_nutrients": [],
+        "next_meal_suggestion": [],
+        "partial": True,
+    }
+
+# 일괄 분석용 전역 세마포어 (이벤트 루프 안에서 처음 사용할 때 생성)
+_analysis_semaphore = None
+
+def _get_analysis_semaphore() -> asyncio.Semaphore:
+    global _analysis_semaphore
+    if _analysis_semaphore is None:
+        _analysis_semaphore = asyncio.Semaphore(MEAL_ANALYSIS_CONCURRENCY)
+    return _analysis_semaphore
+
+def merge_total_nutrition(nutrition_data: list) -> dict:
+    """nutrition_data 항목들을 로컬에서 합산하여 total_nutrition 계산"""
+    vectors = [NutrientVector.from_mapping(item.get("nutrients"), SCHEMA_MEAL_NUTRIENTS, calories=item.get("calories"))
+               for item in nutrition_data]
+    return NutrientVector.sum(vectors).to_dict(SCHEMA_MEAL_TOTAL, digits=2)
+
+async def _analyze_one(file_path: str) -> dict:
+    async with _get_analysis_semaphore():
+        try:
+            result = await analyze_meal(file_path)
+        except FileNotFoundError:
+            return {"file_path": file_path, "status": "failed",
+                    "error": {"status_code": 404, "detail": "이미지 파일을 찾을 수 없습니다."}}
+        except ValueError as e:
+            return {"file_path": file_path, "status": "failed",
+                    "error": {"status_code": 400, "detail": str(e)}}
+        except CircuitOpenError as e:
+            return {"file_path": file_path, "status": "failed",
+                    "error": {"status_code": 503, "detail": f"이미지 분석을 일시적으로 사용할 수 없습니다: {str(e)}"}}
+        except Exception as e:
+            return {"file_path": file_path, "status": "failed",
+                    "error": {"status_code": 500, "detail": f"분석 중 오류 발생: {str(e)}"}}
+
+    if "error" in result:
+        # 음식 사진이 아닌 경우
+        return {"file_path": file_path, "status": "failed",
+                "error": {"status_code": 400, "detail": result["error"]}}
+    return {"file_path": file_path, "status": "done",
+            "nutrition_data": result.get("nutrition_data", []),
+            "deficient_nutrients": result.get("deficient_nutrients", []),
+            "next_meal_suggestion": result.get("next_meal_suggestion", [])}
+
+async def analyze_meals(file_paths: list) -> dict:
+    """
+    여러 식단 이미지를 전역 동시 실행 제한 안에서 병렬로 분석합니다.
+    이미지별 결과와 성공한 이미지들의 영양소를 합산한 하루 total_nutrition을 반환합니다.
+    """
+    results = await asyncio.gather(*(_analyze_one(path) for path in file_paths))
+    nutrition_data = [item for result in results if result["status"] == "done"
+                      for item in result["nutrition_data"]]
+    return {
+        "results": list(results),
+        "total_nutrition": merge_total_nutrition(nutrition_data),
+        "succeeded": sum(1 for result in results if result["status"] == "done"),
+        "failed": sum(1 for result in results if result["status"] == "failed"),
+    }
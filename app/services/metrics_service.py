@@ -0,0 +1,88 @@
+"""
+/metrics 수집.
+
+요청 경로에서 직접 기록하는 메트릭(app.core.metrics: 라우트/단계/쿼리 히스토그램, 캐시 히트, LLM 바이트/토큰) 외에
+서비스가 이미 들고 있는 통계를 조회 시점에 Prometheus family로 바꿉니다.
+- LLM: 프롬프트 유형별 지연 히스토그램, 헤지 요청, 유형별 예상 프롬프트 토큰, 브레이커 상태
+- 대기열: LLM 스케줄러 레인별 대기/실행 중, 기본 스레드 풀 작업 큐, 로그 큐, 이미지 분석 작업 상태별 수
+- 캐시: 캐시별 누적 히트 비율, 캐시 크기
+"""
+import asyncio
+from typing import List
+
+from app.core import log
+from app.core.metrics import MetricFamily, cache_hit_ratios, metrics_registry
+from app.services import analysis_job_service
+from app.services.circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN, get_breaker_states
+from app.services.llm_latency import latency_tracker
+from app.services.llm_scheduler import llm_scheduler
+from app.services.nutrition_aggregate_service import closed_day_cache
+from app.services.nutrition_profile_service import nutrition_profile_store
+from app.services.prompt_builder import prompt_size_tracker
+from app.services.recommendation_cache import recommendation_cache
+
+
+def _llm_families() -> List[MetricFamily]:
+    latency = MetricFamily("app_llm_latency_seconds", "histogram", "프롬프트 유형별 Gemini 응답 지연")
+    timeout = MetricFamily("app_llm_adaptive_timeout_seconds", "gauge", "프롬프트 유형별 현재 적응형 타임아웃")
+    for prompt_type, stats in sorted(latency_tracker.snapshot().items()):
+        for bound, cumulative in stats["buckets"]:
+            latency.add(cumulative, "_bucket", prompt_type=prompt_type, le="+Inf" if bound == float("inf") else bound)
+        latency.add(stats["sum"], "_sum", prompt_type=prompt_type)
+        latency.add(stats["count"], "_count", prompt_type=prompt_type)
+        timeout.add(stats["timeout"], prompt_type=prompt_type)
+
+    hedges = MetricFamily("app_llm_hedged_requests_total", "counter", "헤지 요청 수 (result=sent|won)")
+    hedges.add(latency_tracker.hedges_sent, result="sent").add(latency_tracker.hedge_wins, result="won")
+
+    prompt_tokens = MetricFamily("app_prompt_estimated_tokens_total", "counter", "프롬프트 빌더가 계산한 예상 입력 토큰")
+    truncated = MetricFamily("app_prompt_truncated_total", "counter", "토큰 예산 때문에 섹션이 잘린 프롬프트 수")
+    for prompt_type, stats in sorted(prompt_size_tracker.snapshot().items()):
+        prompt_tokens.add(stats["tokens"], prompt_type=prompt_type)
+        truncated.add(stats["truncated"], prompt_type=prompt_type)
+
+    breakers = MetricFamily("app_circuit_breaker_state", "gauge", "브레이커 상태 (현재 상태만 1)")
+    for name, current in sorted(get_breaker_states().items()):
+        for state in (STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN):
+            breakers.add(1 if state == current else 0, breaker=name, state=state)
+    return [latency, timeout, hedges, prompt_tokens, truncated, breakers]
+
+
+async def _queue_families() -> List[MetricFamily]:
+    lanes = MetricFamily("app_llm_lane_requests", "gauge", "LLM 스케줄러 레인별 요청 수 (state=queued|in_flight)")
+    lane_wait = MetricFamily("app_llm_lane_wait_seconds", "gauge", "LLM 스케줄러 레인별 최근 p95 대기 시간")
+    for lane, stats in sorted(llm_scheduler.get_stats().items()):
+        lanes.add(stats["queued"], lane=lane, state="queued").add(stats["in_flight"], lane=lane, state="in_flight")
+        lane_wait.add(stats["p95_wait"], lane=lane)
+
+    depth = MetricFamily("app_executor_queue_depth", "gauge", "실행기별 대기 중인 작업 수")
+    executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    work_queue = getattr(executor, "_work_queue", None)
+    depth.add(work_queue.qsize() if work_queue is not None else 0, executor="default_thread_pool")
+    depth.add(log.queue_depth(), executor="log_queue")
+    dropped = MetricFamily("app_log_dropped_total", "counter", "로그 큐가 가득 차 버려진 기록 수")
+    dropped.add(log.dropped_count())
+
+    families = [lanes, lane_wait, depth, dropped]
+    job_queue = analysis_job_service.job_queue_instance
+    if job_queue is not None:
+        jobs = MetricFamily("app_analysis_jobs", "gauge", "이미지 분석 작업 상태별 수")
+        for status, count in sorted((await asyncio.to_thread(job_queue.store.count_by_status)).items()):
+            jobs.add(count, status=status)
+        families.append(jobs)
+    return families
+
+
+def _cache_families() -> List[MetricFamily]:
+    ratio = MetricFamily("app_cache_hit_ratio", "gauge", "캐시별 누적 히트 비율")
+    for cache, value in sorted(cache_hit_ratios().items()):
+        ratio.add(value, cache=cache)
+    size = MetricFamily("app_cache_entries", "gauge", "캐시별 항목 수")
+    size.add(len(closed_day_cache), cache="closed_day")
+    size.add(len(nutrition_profile_store), cache="nutrition_profile")
+    size.add(len(recommendation_cache), cache="recommendation")
+    return [ratio, size]
+
+
+async def render_metrics() -> str:
+    return metrics_registry.render(_llm_families() + await _queue_families() + _cache_families())
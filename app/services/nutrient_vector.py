@@ -0,0 +1,146 @@
+"""
+서비스 공용 영양소 벡터.
+
+영양소를 고정 순서(NUTRIENT_FIELDS, tb_food_record 컬럼 순서)의 numpy 배열 하나로 들고 다니고,
+서비스마다 다른 응답/캐시 형식과는 스키마(출력 키 -> 필드)로 변환합니다.
+
+- SCHEMA_RECORD: tb_food_record 컬럼 (calories, carbohydrates ...)
+- SCHEMA_MEAL_TOTAL / SCHEMA_MEAL_NUTRIENTS: meal_service total_nutrition / 음식별 "nutrients" (calories는 바깥 키)
+- SCHEMA_DIET_ANALYSIS: DietAnalysisService (carbohydrate, 칼로리 없음)
+- SCHEMA_KOREAN: /nutrition/calculate (탄수화물, 단백질 ... 칼로리)
+
+합산은 NutrientVector.sum / stack으로 한 번의 배열 연산으로 처리합니다.
+"""
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+NUTRIENT_FIELDS = ("calories", "protein", "carbohydrates", "fat", "fiber", "sugar", "water", "sodium")
+FIELD_INDEX = {field: index for index, field in enumerate(NUTRIENT_FIELDS)}
+NUTRIENT_DTYPE = np.float64
+
+# 스키마: 출력 키 -> 필드 (dict 순서가 출력 순서)
+SCHEMA_RECORD = {field: field for field in NUTRIENT_FIELDS}
+SCHEMA_MEAL_TOTAL = {key: key for key in ["calories", "protein", "carbohydrates", "fat", "sugar", "sodium", "fiber", "water"]}
+SCHEMA_MEAL_NUTRIENTS = {key: key for key in ["protein", "carbohydrates", "fat", "sugar", "sodium", "fiber", "water"]}
+SCHEMA_DIET_ANALYSIS = {
+    "protein": "protein",
+    "carbohydrate": "carbohydrates",
+    "water": "water",
+    "sugar": "sugar",
+    "fat": "fat",
+    "fiber": "fiber",
+    "sodium": "sodium",
+}
+SCHEMA_KOREAN = {
+    "탄수화물": "carbohydrates",
+    "단백질": "protein",
+    "지방": "fat",
+    "당분": "sugar",
+    "나트륨": "sodium",
+    "식이섬유": "fiber",
+    "수분": "water",
+    "칼로리": "calories",
+}
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def schema_indices(schema: Mapping[str, str]) -> np.ndarray:
+    """스키마 출력 키 순서대로의 필드 위치"""
+    return np.array([FIELD_INDEX[field] for field in schema.values()], dtype=np.intp)
+
+
+class NutrientVector:
+    """NUTRIENT_FIELDS 순서의 영양소 값 배열 (캐시 항목당 dict 대신 배열 하나)"""
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: Optional[Iterable[float]] = None):
+        if values is None:
+            self.values = np.zeros(len(NUTRIENT_FIELDS), dtype=NUTRIENT_DTYPE)
+        else:
+            self.values = np.asarray(values, dtype=NUTRIENT_DTYPE).reshape(len(NUTRIENT_FIELDS))
+
+    @classmethod
+    def from_mapping(cls, mapping: Optional[Mapping[str, Any]], schema: Mapping[str, str] = SCHEMA_RECORD,
+                     **extra: Any) -> "NutrientVector":
+        """스키마 형식 dict에서 생성. 없는/숫자가 아닌 값은 0. extra는 필드 이름으로 직접 지정 (예: calories=...)"""
+        vector = cls()
+        mapping = mapping or {}
+        for key, field in schema.items():
+            vector.values[FIELD_INDEX[field]] = _to_float(mapping.get(key))
+        for field, value in extra.items():
+            vector.values[FIELD_INDEX[field]] = _to_float(value)
+        return vector
+
+    def to_dict(self, schema: Mapping[str, str] = SCHEMA_RECORD, digits: Optional[int] = None) -> Dict[str, float]:
+        """스키마 형식 dict로 (digits가 있으면 반올림)"""
+        values = self.values[schema_indices(schema)]
+        if digits is not None:
+            values = np.round(values, digits)
+        return dict(zip(schema.keys(), values.tolist()))
+
+    def __getitem__(self, field: str) -> float:
+        return float(self.values[FIELD_INDEX[field]])
+
+    def __add__(self, other: "NutrientVector") -> "NutrientVector":
+        return NutrientVector(self.values + other.values)
+
+    def __iadd__(self, other: "NutrientVector") -> "NutrientVector":
+        self.values += other.values
+        return self
+
+    def __mul__(self, factor: float) -> "NutrientVector":
+        return NutrientVector(self.values * factor)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, divisor: float) -> "NutrientVector":
+        return NutrientVector(self.values / divisor)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, NutrientVector) and np.array_equal(self.values, other.values)
+
+    def __repr__(self) -> str:
+        return f"NutrientVector({self.to_dict()})"
+
+    def __getstate__(self):
+        # 캐시 파일 호환을 위해 numpy 객체 대신 float 리스트로 저장
+        return self.values.tolist()
+
+    def __setstate__(self, state):
+        self.values = np.asarray(state, dtype=NUTRIENT_DTYPE)
+
+    def ratio_to(self, reference: "NutrientVector") -> np.ndarray:
+        """기준 대비 비율 배열 (기준이 0인 필드는 nan)"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(reference.values > 0, self.values / reference.values, np.nan)
+
+    def shortfall(self, reference: "NutrientVector") -> Dict[str, float]:
+        """기준보다 부족한 필드 -> 부족 비율(0~1). 기준이 0인 필드는 제외"""
+        ratios = self.ratio_to(reference)
+        return {NUTRIENT_FIELDS[index]: float(1 - ratio)
+                for index, ratio in enumerate(ratios) if not np.isnan(ratio) and ratio < 1}
+
+    @staticmethod
+    def stack(vectors: Sequence["NutrientVector"]) -> np.ndarray:
+        """(n x 필드 수) 행렬"""
+        if not vectors:
+            return np.zeros((0, len(NUTRIENT_FIELDS)), dtype=NUTRIENT_DTYPE)
+        return np.stack([vector.values for vector in vectors])
+
+    @classmethod
+    def sum(cls, vectors: Sequence["NutrientVector"]) -> "NutrientVector":
+        """벡터 여러 개의 합 (한 번의 배열 합산)"""
+        return cls(cls.stack(vectors).sum(axis=0))
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> "NutrientVector":
+        """행렬의 열 합"""
+        return cls(np.asarray(matrix, dtype=NUTRIENT_DTYPE).reshape(-1, len(NUTRIENT_FIELDS)).sum(axis=0))
@@ -0,0 +1,273 @@
+"""
+회원의 일별/끼니별 섭취 영양소 집계 (LLM 없이 tb_food_record에서 바로 계산).
+
+- (member_id, consumed_date) 범위 조건으로 날짜 x meal_time 단위 SUM/COUNT를 DB에서 집계
+- 지난 날짜(오늘 이전)의 집계는 기록이 거의 바뀌지 않으므로 메모리에 캐시하고, 오늘은 항상 다시 조회
+- 기록 추가/수정 이벤트(/summary/food-record, /summary/members/{id}/refresh)가 오면 해당 캐시를 비움
+- 캐시 항목은 회원 요약(tb_member_health_summary)의 version과 함께 저장해, 다른 워커가 받은 이벤트로
+  버전이 오르면 이 워커의 캐시도 무효. 이벤트 없이 바뀐 기록은 AGGREGATE_CACHE_TTL초 안에 반영
+- 긴 구간은 AGGREGATE_QUERY_CHUNK_DAYS일씩 나눠 조회하므로 스트리밍(NDJSON)에서 첫 날짜부터 바로 내보냄
+
+tb_food_record에 (member_id, consumed_date) 인덱스가 없으면 만들기:
+    python -m app.services.nutrition_aggregate_service create-index
+"""
+import argparse
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.database import engine, execute, fetch_all, fetch_one
+from app.core.metrics import record_cache
+from app.services.health_summary_service import NUTRIENT_COLUMNS
+from app.services.nutrient_vector import NutrientVector, SCHEMA_RECORD
+
+AGGREGATE_MAX_DAYS = int(os.environ.get("AGGREGATE_MAX_DAYS", "366"))
+AGGREGATE_QUERY_CHUNK_DAYS = int(os.environ.get("AGGREGATE_QUERY_CHUNK_DAYS", "31"))
+# 캐시하는 (회원, 날짜) 수
+AGGREGATE_CACHE_MAX_DAYS = int(os.environ.get("AGGREGATE_CACHE_MAX_DAYS", "200000"))
+# 캐시 항목 유효 시간(초)
+AGGREGATE_CACHE_TTL = float(os.environ.get("AGGREGATE_CACHE_TTL", "3600"))
+
+FOOD_RECORD_INDEX_NAME = "idx_food_record_member_consumed"
+
+DAILY_MEAL_AGGREGATE_QUERY = text(f"""
+    SELECT
+        DATE(consumed_date) AS day,
+        meal_time,
+        {", ".join(f"SUM({col}) AS {col}" for col in NUTRIENT_COLUMNS)},
+        COUNT(*) AS record_count
+    FROM tb_food_record
+    WHERE member_id = :member_id AND consumed_date >= :start AND consumed_date < :end
+    GROUP BY DATE(consumed_date), meal_time
+    ORDER BY day
+""")
+
+MEMBER_VERSION_QUERY = text("SELECT version FROM tb_member_health_summary WHERE member_id = :member_id")
+
+UNKNOWN_MEAL_TIME = "기타"
+
+# 하루 집계: meal_time -> (영양소 합, 기록 수)
+DayMeals = Dict[str, Tuple[NutrientVector, int]]
+
+
+class AggregateRangeError(ValueError):
+    """조회 구간이 잘못된 경우"""
+
+
+def _as_day(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _render_totals(vector: NutrientVector, record_count: int) -> Dict[str, Any]:
+    return {**vector.to_dict(SCHEMA_RECORD, digits=1), "record_count": record_count}
+
+
+def _build_meals(rows: List[Dict[str, Any]]) -> DayMeals:
+    """하루치 (meal_time별) 집계 행을 끼니별 벡터로. meal_time이 비어 있는 행은 기타로 합침"""
+    meals: DayMeals = {}
+    for row in rows:
+        name = row["meal_time"] or UNKNOWN_MEAL_TIME
+        vector, count = meals.get(name, (NutrientVector(), 0))
+        meals[name] = (vector + NutrientVector.from_mapping(row, SCHEMA_RECORD), count + int(row["record_count"]))
+    return meals
+
+
+def _render_day(day: date, meals: DayMeals) -> Dict[str, Any]:
+    """끼니별 벡터를 {"date", "total", "meals"} 응답 형식으로"""
+    total = NutrientVector.sum([vector for vector, _ in meals.values()])
+    return {
+        "date": day.isoformat(),
+        "total": _render_totals(total, sum(count for _, count in meals.values())),
+        "meals": {name: _render_totals(vector, count) for name, (vector, count) in meals.items()},
+    }
+
+
+class ClosedDayCache:
+    """
+    (회원, 지난 날짜) -> 끼니별 벡터 LRU 캐시. 기록이 없는 날도 None 대신 빈 dict로 저장
+    조회 시 넘긴 회원 요약 버전이 저장 시점과 다르거나 ttl이 지난 항목은 버림
+    """
+
+    def __init__(self, max_days: int = AGGREGATE_CACHE_MAX_DAYS, ttl: float = AGGREGATE_CACHE_TTL):
+        self.max_days = max_days
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[Hashable, date], Tuple[DayMeals, Optional[int], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, member_id: Hashable, day: date, version: Optional[int] = None) -> Optional[DayMeals]:
+        key = (member_id, day)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, stored_version, expires_at = entry
+        if stored_version != version or time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, member_id: Hashable, day: date, value: DayMeals, version: Optional[int] = None):
+        self._entries[(member_id, day)] = (value, version, time.monotonic() + self.ttl)
+        self._entries.move_to_end((member_id, day))
+        while len(self._entries) > self.max_days:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, member_id: Hashable, day: Optional[date] = None):
+        """회원의 특정 날짜(없으면 전체) 캐시 삭제"""
+        if day is not None:
+            self._entries.pop((member_id, day), None)
+            return
+        for key in [key for key in self._entries if key[0] == member_id]:
+            del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+closed_day_cache = ClosedDayCache()
+
+
+def _normalize_member_id(member_id) -> Hashable:
+    """라우터마다 float/int로 들어오는 회원 id를 같은 캐시 키로"""
+    member_id = float(member_id)
+    return int(member_id) if member_id.is_integer() else member_id
+
+
+def invalidate_member_days(member_id, day=None):
+    """음식 기록 추가/수정 시 호출"""
+    closed_day_cache.invalidate(_normalize_member_id(member_id), _as_day(day) if day is not None else None)
+
+
+def validate_range(start: date, end: date) -> None:
+    if end < start:
+        raise AggregateRangeError("end는 start보다 빠를 수 없습니다.")
+    if (end - start).days + 1 > AGGREGATE_MAX_DAYS:
+        raise AggregateRangeError(f"조회 구간은 최대 {AGGREGATE_MAX_DAYS}일입니다.")
+
+
+async def _member_version(member_id: Hashable) -> Optional[int]:
+    """회원 요약 버전 (기록 이벤트마다 증가). 요약 행이 없으면 None"""
+    row = await fetch_one("member_summary_version", MEMBER_VERSION_QUERY, {"member_id": member_id})
+    return int(row["version"]) if row else None
+
+
+async def _query_days(member_id, start: date, end: date) -> Dict[date, DayMeals]:
+    """start~end(포함) 구간을 DB에서 집계. 기록이 있는 날짜만 반환"""
+    rows = await fetch_all("nutrition_daily_aggregate", DAILY_MEAL_AGGREGATE_QUERY, {
+        "member_id": member_id,
+        "start": datetime.combine(start, datetime.min.time()),
+        "end": datetime.combine(end + timedelta(days=1), datetime.min.time()),
+    })
+    rows_by_day: Dict[date, List[Dict[str, Any]]] = {}
+    for row in rows:
+        rows_by_day.setdefault(_as_day(row["day"]), []).append(row)
+    return {day: _build_meals(day_rows) for day, day_rows in rows_by_day.items()}
+
+
+async def _aggregate_chunk(member_id: Hashable, start: date, end: date, today: date,
+                           version: Optional[int]) -> List[Tuple[date, DayMeals]]:
+    """구간의 각 날짜 집계. 캐시에 없는(또는 회원 요약 버전이 바뀐) 날짜와 오늘이 걸친 최소 구간만 한 번에 조회"""
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    cached = {}
+    missing = []
+    for day in days:
+        entry = closed_day_cache.get(member_id, day, version) if day < today else None
+        if entry is None:
+            missing.append(day)
+        else:
+            cached[day] = entry
+    closed_day_cache.hits += len(cached)
+    closed_day_cache.misses += len(missing)
+    record_cache("closed_day", hits=len(cached), misses=len(missing))
+
+    if missing:
+        queried = await _query_days(member_id, missing[0], missing[-1])
+        for day in missing:
+            value = queried.get(day, {})
+            if day < today:
+                closed_day_cache.put(member_id, day, value, version)
+            cached[day] = value
+    return [(day, cached[day]) for day in days]
+
+
+async def iter_daily_nutrition(member_id, start: date, end: date,
+                               include_empty: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """start~end(포함) 날짜별 집계를 날짜 순서대로 하나씩 반환 (AGGREGATE_QUERY_CHUNK_DAYS일씩 조회)"""
+    validate_range(start, end)
+    member_id = _normalize_member_id(member_id)
+    today = date.today()
+    version = await _member_version(member_id)
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=AGGREGATE_QUERY_CHUNK_DAYS - 1), end)
+        for day, meals in await _aggregate_chunk(member_id, chunk_start, chunk_end, today, version):
+            if include_empty or meals:
+                yield _render_day(day, meals)
+        chunk_start = chunk_end + timedelta(days=1)
+
+
+async def get_daily_nutrition(member_id, start: date, end: date, include_empty: bool = False) -> Dict[str, Any]:
+    """구간 전체 응답: 날짜별 집계 + 구간 합계/기록일 평균"""
+    days = [day async for day in iter_daily_nutrition(member_id, start, end, include_empty)]
+    logged = [day["total"] for day in days if day["total"]["record_count"]]
+    total = NutrientVector.sum([NutrientVector.from_mapping(day_total, SCHEMA_RECORD) for day_total in logged])
+    logged_days = len(logged)
+    if logged_days:
+        average = (total / logged_days).to_dict(SCHEMA_RECORD, digits=1)
+    else:
+        average = {col: None for col in NUTRIENT_COLUMNS}
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": days,
+        "total": _render_totals(total, sum(day_total["record_count"] for day_total in logged)),
+        "logged_days": logged_days,
+        "daily_average": average,
+    }
+
+
+async def create_food_record_index() -> bool:
+    """tb_food_record (member_id, consumed_date) 인덱스 생성. 이미 있으면 False"""
+    if engine.dialect.name == "mysql":
+        existing = await fetch_one("food_record_index_check", text(
+            "SELECT 1 AS found FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'tb_food_record' AND index_name = :name LIMIT 1"
+        ), {"name": FOOD_RECORD_INDEX_NAME})
+    else:
+        existing = await fetch_one("food_record_index_check", text(
+            "SELECT 1 AS found FROM sqlite_master WHERE type = 'index' AND name = :name"
+        ), {"name": FOOD_RECORD_INDEX_NAME})
+    if existing:
+        return False
+    ddl = text(f"CREATE INDEX {FOOD_RECORD_INDEX_NAME} ON tb_food_record (member_id, consumed_date)")
+    await execute("food_record_index_ddl", (ddl, None))
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="일별 영양소 집계 관리")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("create-index", help="tb_food_record (member_id, consumed_date) 인덱스 생성")
+    args = parser.parse_args()
+
+    async def run():
+        if args.command == "create-index":
+            created = await create_food_record_index()
+            print(f"[NutritionAggregate] 인덱스 {FOOD_RECORD_INDEX_NAME} {'생성 완료' if created else '이미 있음'}")
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
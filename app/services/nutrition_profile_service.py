@@ -0,0 +1,157 @@
+"""
+음식/단위별 기준 영양소 프로필 저장소와 로컬 영양소 계산.
+
+프로필은 (음식 이름, 기준 단위) -> 기준 단위 1당 NutrientVector로 저장합니다.
+- 질량/부피 단위(g, kg, mg, ml, l, cc ...)는 g 또는 ml로 환산해 g/ml 프로필 하나로 계산
+- 개수 단위(개, 줄, 인분, 공기, 그릇 ...)는 음식별로 따로 저장
+섭취량 배율 계산과 합산은 numpy 행렬 연산으로 한 번에 처리합니다.
+프로필이 없는 (음식, 단위)만 Gemini로 조회하고, 그 결과는 캐시 파일에 저장해 재사용합니다.
+"""
+import os
+import pickle
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.log import get_logger
+from app.services.nutrient_vector import NutrientVector, NUTRIENT_FIELDS, SCHEMA_KOREAN
+
+logger = get_logger(__name__)
+
+# 출력 순서 (기존 /nutrition/calculate 응답 키)
+NUTRIENT_KEYS = list(SCHEMA_KOREAN)
+
+# 단위 별칭 -> (기준 단위, 배율)
+UNIT_ALIASES = {
+    "g": ("g", 1.0), "그램": ("g", 1.0), "gram": ("g", 1.0), "grams": ("g", 1.0),
+    "kg": ("g", 1000.0), "킬로그램": ("g", 1000.0), "킬로": ("g", 1000.0),
+    "mg": ("g", 0.001), "밀리그램": ("g", 0.001),
+    "ml": ("ml", 1.0), "밀리리터": ("ml", 1.0), "cc": ("ml", 1.0),
+    "l": ("ml", 1000.0), "리터": ("ml", 1000.0),
+}
+# Gemini에 g/ml 프로필을 물을 때의 기준량 (100g, 100ml 기준 값이 더 정확함)
+MASS_VOLUME_REFERENCE = 100.0
+
+NUTRITION_PROFILE_CACHE_FILE = os.environ.get("NUTRITION_PROFILE_CACHE_FILE", "nutrition_profile_cache.pkl")
+
+ProfileKey = Tuple[str, str]
+
+
+def normalize_food_name(name: str) -> str:
+    return "".join(str(name).split())
+
+
+def normalize_unit(unit: str) -> Tuple[str, float]:
+    """단위를 (기준 단위, 배율)로. 개수 단위는 그대로 배율 1"""
+    unit = str(unit or "").strip().lower()
+    return UNIT_ALIASES.get(unit, (unit or "개", 1.0))
+
+
+def food_item_fields(item: Any) -> Tuple[str, float, str]:
+    """FoodItem(pydantic) 또는 dict에서 (이름, 양, 단위) 추출"""
+    if isinstance(item, dict):
+        return str(item["name"]), float(item["amount"]), str(item["unit"])
+    return str(item.name), float(item.amount), str(item.unit)
+
+
+def describe_item(name: str, amount: float, unit: str) -> str:
+    """'김밥 1줄' 형식의 입력 표시"""
+    amount_text = str(int(amount)) if float(amount).is_integer() else str(amount)
+    return f"{name} {amount_text}{unit}"
+
+
+class NutritionProfileStore:
+    """(음식, 기준 단위)별 기준 단위 1당 영양소 벡터 저장소 (pickle 파일로 유지)"""
+
+    def __init__(self, cache_file: str = NUTRITION_PROFILE_CACHE_FILE):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self.profiles: Dict[ProfileKey, NutrientVector] = self.load_cache()
+
+    def load_cache(self) -> Dict[ProfileKey, NutrientVector]:
+        """캐시 로드. 이전 형식(NUTRIENT_KEYS 순서의 리스트) 항목은 NutrientVector로 변환"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, "rb") as f:
+                    cache = pickle.load(f)
+                return {key: values if isinstance(values, NutrientVector)
+                        else NutrientVector.from_mapping(dict(zip(NUTRIENT_KEYS, values)), SCHEMA_KOREAN)
+                        for key, values in cache.items()}
+            return {}
+        except Exception as e:
+            logger.warning("캐시 로드 오류: %s", e)
+            return {}
+
+    def save_cache(self):
+        try:
+            with self._lock:
+                data = dict(self.profiles)
+            tmp_path = f"{self.cache_file}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(data, f)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            logger.warning("캐시 저장 오류: %s", e)
+
+    def lookup(self, name: str, unit: str) -> Tuple[Optional[NutrientVector], float]:
+        """(기준 단위 1당 프로필 또는 None, 섭취량에 곱할 단위 배율)"""
+        base_unit, scale = normalize_unit(unit)
+        return self.profiles.get((normalize_food_name(name), base_unit)), scale
+
+    def put(self, name: str, unit: str, nutrients: Dict[str, Any], per_amount: float = 1.0):
+        """per_amount(단위 기준량)당 영양소 dict를 기준 단위 1당 프로필로 저장"""
+        base_unit, scale = normalize_unit(unit)
+        per_base = float(per_amount) * scale
+        if per_base <= 0:
+            return
+        profile = NutrientVector.from_mapping(nutrients, SCHEMA_KOREAN) / per_base
+        with self._lock:
+            self.profiles[(normalize_food_name(name), base_unit)] = profile
+
+    def __len__(self):
+        return len(self.profiles)
+
+
+def reference_amount(unit: str) -> float:
+    """Gemini에 프로필을 물을 때의 기준량 (g/ml는 100, 개수 단위는 1)"""
+    base_unit, _ = normalize_unit(unit)
+    return MASS_VOLUME_REFERENCE if base_unit in ("g", "ml") else 1.0
+
+
+def calculate_locally(store: NutritionProfileStore, items: Sequence[Tuple[str, float, str]]):
+    """
+    프로필이 있는 항목은 벡터 연산으로 음식별 영양소를 계산하고, 없는 항목의 위치를 돌려줍니다.
+    반환: (음식별 영양소 행렬(n x NUTRIENT_FIELDS, 미확인 항목은 0), 미확인 항목 인덱스 목록)
+    """
+    profiles = np.zeros((len(items), len(NUTRIENT_FIELDS)))
+    factors = np.zeros(len(items))
+    unknown: List[int] = []
+    for index, (name, amount, unit) in enumerate(items):
+        profile, scale = store.lookup(name, unit)
+        if profile is None:
+            unknown.append(index)
+            continue
+        profiles[index] = profile.values
+        factors[index] = amount * scale
+    return profiles * factors[:, None], unknown
+
+
+def build_result(items: Sequence[Tuple[str, float, str]], per_item: np.ndarray, unknown: Sequence[int]) -> Dict[str, Any]:
+    """음식별 영양소와 합계를 기존 응답 형식(입력된 식단 + 영양소 키)으로 변환"""
+    unknown_set = set(unknown)
+    known_rows = [index for index in range(len(items)) if index not in unknown_set]
+    totals = NutrientVector.from_matrix(per_item[known_rows])
+
+    result: Dict[str, Any] = {"입력된 식단": ", ".join(describe_item(*item) for item in items)}
+    result.update(totals.to_dict(SCHEMA_KOREAN, digits=1))
+    result["음식별"] = [
+        {"입력된 식단": describe_item(*items[index]), **NutrientVector(per_item[index]).to_dict(SCHEMA_KOREAN, digits=1)}
+        for index in known_rows
+    ]
+    if unknown_set:
+        result["미확인 음식"] = [describe_item(*items[index]) for index in unknown]
+    return result
+
+
+nutrition_profile_store = NutritionProfileStore()
@@ -0,0 +1,193 @@
+"""
+목표 영양소(칼로리, 탄수화물, 단백질, 지방) 로컬 계산 엔진.
+
+1. Mifflin-St Jeor BMR x 활동 계수로 TDEE 계산
+2. (목표 체중 - 현재 체중) x KCAL_PER_KG / 남은 일수로 하루 칼로리 증감량 계산 후 안전 범위로 제한
+3. 감량/유지/증량 규칙(MACRO_RULES)으로 단백질(g/kg), 지방(칼로리 비율)을 정하고 나머지를 탄수화물로 배분
+
+단건 계산(compute_targets)도 배치 계산(compute_targets_batch)과 같은 numpy 경로를 쓰므로 결과가 항상 같습니다.
+진행 중(ONGOING) 챌린지가 있는 전체 회원은 compute_ongoing_targets로 한 번에 계산합니다.
+
+전체 회원 목표 내보내기 (회원당 JSON 한 줄):
+    python -m app.services.nutrition_target_service ongoing [--output targets.jsonl]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import date
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+from sqlalchemy import text
+
+from app.core.database import engine, fetch_all
+
+ACTIVITY_FACTORS = {
+    "sedentary": 1.2,
+    "lightly_active": 1.375,
+    "moderately_active": 1.55,
+    "very_active": 1.725,
+    "extra_active": 1.9,
+}
+# Mifflin-St Jeor 성별 상수
+BMR_GENDER_OFFSETS = {"male": 5.0, "female": -161.0}
+
+KCAL_PER_KG = float(os.environ.get("NUTRITION_KCAL_PER_KG", "7700"))
+MAX_DAILY_DEFICIT = float(os.environ.get("NUTRITION_MAX_DAILY_DEFICIT", "1000"))
+MAX_DAILY_SURPLUS = float(os.environ.get("NUTRITION_MAX_DAILY_SURPLUS", "500"))
+# TDEE 대비 최대 감량 비율
+MAX_DEFICIT_RATIO = float(os.environ.get("NUTRITION_MAX_DEFICIT_RATIO", "0.25"))
+MIN_DAILY_CALORIES = {
+    "male": float(os.environ.get("NUTRITION_MIN_CALORIES_MALE", "1500")),
+    "female": float(os.environ.get("NUTRITION_MIN_CALORIES_FEMALE", "1200")),
+}
+MIN_CARB_GRAMS = float(os.environ.get("NUTRITION_MIN_CARB_GRAMS", "100"))
+# 이 차이(kg) 이내면 유지로 판단
+MAINTAIN_TOLERANCE_KG = float(os.environ.get("NUTRITION_MAINTAIN_TOLERANCE_KG", "0.5"))
+
+# 규칙 값이 설정으로 바뀌어도 벗어나지 않는 안전 범위
+PROTEIN_PER_KG_BOUNDS = (0.8, 2.2)
+FAT_RATIO_BOUNDS = (0.20, 0.35)
+
+DIRECTION_LOSS = "loss"
+DIRECTION_MAINTAIN = "maintain"
+DIRECTION_GAIN = "gain"
+
+DEFAULT_MACRO_RULES = {
+    DIRECTION_LOSS: {"protein_per_kg": 1.8, "fat_ratio": 0.25},
+    DIRECTION_MAINTAIN: {"protein_per_kg": 1.4, "fat_ratio": 0.28},
+    DIRECTION_GAIN: {"protein_per_kg": 1.8, "fat_ratio": 0.25},
+}
+
+
+def _load_macro_rules() -> Dict[str, Dict[str, float]]:
+    """기본 규칙에 NUTRITION_MACRO_RULES(JSON) 설정을 덮어쓰고 안전 범위로 제한"""
+    rules = {direction: dict(rule) for direction, rule in DEFAULT_MACRO_RULES.items()}
+    override = os.environ.get("NUTRITION_MACRO_RULES")
+    if override:
+        for direction, rule in json.loads(override).items():
+            if direction in rules:
+                rules[direction].update(rule)
+    for rule in rules.values():
+        rule["protein_per_kg"] = min(max(float(rule["protein_per_kg"]), PROTEIN_PER_KG_BOUNDS[0]), PROTEIN_PER_KG_BOUNDS[1])
+        rule["fat_ratio"] = min(max(float(rule["fat_ratio"]), FAT_RATIO_BOUNDS[0]), FAT_RATIO_BOUNDS[1])
+    return rules
+
+
+MACRO_RULES = _load_macro_rules()
+
+TARGET_KEYS = ["tdee", "calories", "carb", "protein", "fat"]
+
+ONGOING_TARGET_INPUT_QUERY = text("""
+    SELECT m.id AS member_id, m.weight, m.height, m.age, m.gender, m.activity_level,
+           c.target_weight, c.end_date
+    FROM challenge c
+    JOIN tb_members m ON m.id = c.member_id
+    WHERE c.status = 'ONGOING' AND c.target_weight IS NOT NULL AND c.end_date IS NOT NULL
+    ORDER BY c.member_id, c.end_date
+""")
+
+
+def _to_date(value: Any) -> date:
+    if isinstance(value, date):
+        return value if type(value) is date else value.date()
+    return date.fromisoformat(str(value)[:10])
+
+
+def compute_targets_batch(members: List[Mapping[str, Any]], today: Optional[date] = None) -> List[Optional[Dict[str, int]]]:
+    """
+    회원별 입력(weight, height, age, gender, activity_level, target_weight, end_date)으로 목표 영양소를 한 번에 계산.
+    성별/활동 수준을 알 수 없어 TDEE를 구할 수 없는 회원은 None.
+    """
+    if not members:
+        return []
+    today = today or date.today()
+
+    weight = np.array([float(m["weight"]) for m in members])
+    height = np.array([float(m["height"]) for m in members])
+    age = np.array([float(m["age"]) for m in members])
+    target_weight = np.array([float(m["target_weight"]) for m in members])
+    days_left = np.array([(_to_date(m["end_date"]) - today).days for m in members], dtype=float)
+    genders = [str(m["gender"] or "").lower() for m in members]
+    gender_offset = np.array([BMR_GENDER_OFFSETS.get(g, np.nan) for g in genders])
+    activity = np.array([ACTIVITY_FACTORS.get(str(m["activity_level"] or "").lower(), np.nan) for m in members])
+    min_calories = np.array([MIN_DAILY_CALORIES.get(g, MIN_DAILY_CALORIES["female"]) for g in genders])
+
+    tdee = (10 * weight + 6.25 * height - 5 * age + gender_offset) * activity
+
+    # 남은 기간에 필요한 하루 증감량. 종료일이 지났으면 유지
+    weight_diff = target_weight - weight
+    daily_delta = np.where(days_left > 0, weight_diff * KCAL_PER_KG / np.maximum(days_left, 1), 0.0)
+    max_deficit = np.minimum(MAX_DAILY_DEFICIT, tdee * MAX_DEFICIT_RATIO)
+    daily_delta = np.clip(daily_delta, -max_deficit, MAX_DAILY_SURPLUS)
+    calories = np.maximum(tdee + daily_delta, min_calories)
+
+    is_loss = weight_diff < -MAINTAIN_TOLERANCE_KG
+    is_gain = weight_diff > MAINTAIN_TOLERANCE_KG
+    protein_per_kg = np.select([is_loss, is_gain],
+                               [MACRO_RULES[DIRECTION_LOSS]["protein_per_kg"], MACRO_RULES[DIRECTION_GAIN]["protein_per_kg"]],
+                               MACRO_RULES[DIRECTION_MAINTAIN]["protein_per_kg"])
+    fat_ratio = np.select([is_loss, is_gain],
+                          [MACRO_RULES[DIRECTION_LOSS]["fat_ratio"], MACRO_RULES[DIRECTION_GAIN]["fat_ratio"]],
+                          MACRO_RULES[DIRECTION_MAINTAIN]["fat_ratio"])
+
+    protein = weight * protein_per_kg
+    fat = calories * fat_ratio / 9
+    carb = np.maximum((calories - protein * 4 - fat * 9) / 4, MIN_CARB_GRAMS)
+    # 탄수화물 하한으로 늘어난 만큼 칼로리도 맞춰 매크로 합계와 일치시킴
+    calories = np.maximum(calories, carb * 4 + protein * 4 + fat * 9)
+
+    values = np.rint(np.stack([tdee, calories, carb, protein, fat], axis=1))
+    valid = ~np.isnan(tdee)
+    return [
+        {key: int(value) for key, value in zip(TARGET_KEYS, row)} if ok else None
+        for row, ok in zip(values, valid)
+    ]
+
+
+def compute_targets(health_data: Mapping[str, Any], target_weight: float, end_date: date,
+                    today: Optional[date] = None) -> Optional[Dict[str, int]]:
+    """한 회원의 목표 영양소 ({"tdee", "calories", "carb", "protein", "fat"}). 계산 불가면 None"""
+    member = {**health_data, "target_weight": target_weight, "end_date": end_date}
+    return compute_targets_batch([member], today=today)[0]
+
+
+async def compute_ongoing_targets(today: Optional[date] = None) -> Dict[Any, Dict[str, int]]:
+    """
+    진행 중인 챌린지가 있는 모든 회원의 목표 영양소를 한 번의 조회와 배치 계산으로 반환
+    진행 중 챌린지가 여럿인 회원은 종료일이 가장 늦은 챌린지 기준 (회원 건강 요약과 같은 챌린지)
+    """
+    rows = await fetch_all("ongoing_target_inputs", ONGOING_TARGET_INPUT_QUERY)
+    rows = [row for row in rows if None not in (row["weight"], row["height"], row["age"])]
+    targets = compute_targets_batch(rows, today=today)
+    # 회원별로 종료일 순 정렬이므로 나중 값(종료일이 가장 늦은 챌린지)이 남음
+    return {row["member_id"]: target for row, target in zip(rows, targets) if target is not None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="목표 영양소 로컬 계산")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ongoing_parser = subparsers.add_parser("ongoing", help="진행 중인 챌린지가 있는 전체 회원의 목표 영양소 계산")
+    ongoing_parser.add_argument("--output", default=None, help="JSON Lines 출력 파일 (기본: 표준 출력)")
+    args = parser.parse_args()
+
+    async def run():
+        targets = await compute_ongoing_targets()
+        await engine.dispose()
+        return targets
+
+    targets = asyncio.run(run())
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for member_id, target in targets.items():
+            output.write(json.dumps({"member_id": member_id, **target}, ensure_ascii=False) + "\n")
+    finally:
+        if args.output:
+            output.close()
+    print(f"[NutritionTarget] {len(targets)}명 목표 영양소 계산 완료", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+섹션 단위 프롬프트 빌더와 프롬프트 크기 기록.
+
+- 섹션별 예상 토큰 수를 세고, 예산(budget)을 넘는 섹션은 잘라냅니다.
+- 목록 섹션(최근 먹은 음식 등)은 빈도순으로 정렬해 예산 안에 들어가는 항목만 남깁니다.
+- 숫자는 지정 자릿수로 반올림해 넣습니다.
+- 요청마다 프롬프트 크기(섹션별/전체 예상 토큰)와 LLM 응답 시간을 prompt_size_tracker에 기록합니다.
+
+토큰 수는 실제 토크나이저가 아닌 추정치입니다. (ASCII 4글자당 1토큰, 한글 등은 글자당 약 0.7토큰)
+"""
+import math
+import os
+import textwrap
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Tuple
+
+PROMPT_FOOD_BUDGET_TOKENS = int(os.environ.get("PROMPT_FOOD_BUDGET_TOKENS", "120"))
+PROMPT_FOOD_MAX_ITEMS = int(os.environ.get("PROMPT_FOOD_MAX_ITEMS", "20"))
+PROMPT_STATS_WINDOW = int(os.environ.get("PROMPT_STATS_WINDOW", "500"))
+
+NON_ASCII_TOKENS_PER_CHAR = 0.7
+ASCII_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """프롬프트 텍스트의 예상 토큰 수"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    non_ascii_chars = len(text) - ascii_chars
+    return math.ceil(ascii_chars / ASCII_CHARS_PER_TOKEN + non_ascii_chars * NON_ASCII_TOKENS_PER_CHAR)
+
+
+def round_number(value, digits: int = 1, unit: str = "", missing: str = "기록 없음") -> str:
+    """숫자를 반올림해 단위와 함께 문자열로. 값이 없으면 missing (단위 없이)"""
+    if value is None:
+        return missing
+    try:
+        number = round(float(value), digits)
+    except (TypeError, ValueError):
+        return f"{value}{unit}"
+    text = str(int(number)) if digits == 0 or number.is_integer() else str(number)
+    return f"{text}{unit}"
+
+
+def rank_by_frequency(counts: Mapping[str, int]) -> List[Tuple[str, int]]:
+    """(이름, 횟수)를 횟수 내림차순으로. 같은 횟수는 기존 순서 유지"""
+    return sorted(counts.items(), key=lambda item: -item[1])
+
+
+class PromptBuilder:
+    """섹션을 순서대로 쌓아 프롬프트를 만들고 섹션별 예상 토큰 수를 기록"""
+
+    def __init__(self, prompt_type: str):
+        self.prompt_type = prompt_type
+        self._sections: List[Tuple[str, str]] = []
+        self.section_tokens: Dict[str, int] = {}
+        self.truncated: List[str] = []
+
+    def add(self, name: str, text: str, budget: Optional[int] = None) -> "PromptBuilder":
+        """섹션 추가. 들여쓰기를 제거하고, budget(토큰)을 넘으면 뒤를 잘라냄"""
+        text = textwrap.dedent(text).strip("\n")
+        if budget is not None and estimate_tokens(text) > budget:
+            while text and estimate_tokens(text) > budget:
+                text = text[:int(len(text) * 0.9)]
+            text = text.rstrip() + " …"
+            self.truncated.append(name)
+        self._sections.append((name, text))
+        self.section_tokens[name] = estimate_tokens(text)
+        return self
+
+    def add_list(self, name: str, label: str, items: Iterable[str], budget: int,
+                 max_items: Optional[int] = None, empty: str = "기록 없음") -> "PromptBuilder":
+        """항목을 순서대로 예산(토큰)과 개수 한도 안에서만 넣고, 빠진 항목 수를 표시"""
+        items = list(items)
+        kept: List[str] = []
+        used = estimate_tokens(label)
+        for item in items:
+            if max_items is not None and len(kept) >= max_items:
+                break
+            cost = estimate_tokens(item) + 1
+            if used + cost > budget:
+                break
+            kept.append(item)
+            used += cost
+        if len(kept) < len(items):
+            self.truncated.append(name)
+        body = ", ".join(kept) if kept else empty
+        if len(kept) < len(items):
+            body += f" 외 {len(items) - len(kept)}개"
+        return self.add(name, f"{label}{body}")
+
+    def build(self) -> str:
+        return "\n\n".join(text for _, text in self._sections)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.section_tokens.values())
+
+
+class PromptSizeTracker:
+    """프롬프트 유형별 요청 크기(예상 토큰)와 LLM 응답 시간 기록"""
+
+    def __init__(self, window: int = PROMPT_STATS_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        # prompt_type -> 최근 (전체 토큰, 섹션별 토큰, 응답 시간)
+        self._recent: Dict[str, Deque[Tuple[int, Dict[str, int], Optional[float]]]] = {}
+        self._totals: Dict[str, Dict[str, float]] = {}
+
+    def record(self, builder: PromptBuilder, latency: Optional[float] = None):
+        with self._lock:
+            recent = self._recent.setdefault(builder.prompt_type, deque(maxlen=self.window))
+            recent.append((builder.total_tokens, dict(builder.section_tokens), latency))
+            totals = self._totals.setdefault(builder.prompt_type, {"count": 0, "tokens": 0, "truncated": 0})
+            totals["count"] += 1
+            totals["tokens"] += builder.total_tokens
+            totals["truncated"] += 1 if builder.truncated else 0
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """유형별 누적 요청 수/토큰, 최근 평균/최대 토큰, 섹션별 평균 토큰, 평균 응답 시간"""
+        with self._lock:
+            recent = {name: list(entries) for name, entries in self._recent.items()}
+            totals = {name: dict(values) for name, values in self._totals.items()}
+        result = {}
+        for name, entries in recent.items():
+            sections: Dict[str, List[int]] = {}
+            for _, section_tokens, _ in entries:
+                for section, tokens in section_tokens.items():
+                    sections.setdefault(section, []).append(tokens)
+            latencies = [latency for _, _, latency in entries if latency is not None]
+            result[name] = {
+                **totals[name],
+                "avg_tokens": sum(tokens for tokens, _, _ in entries) / len(entries),
+                "max_tokens": max(tokens for tokens, _, _ in entries),
+                "section_avg_tokens": {section: sum(values) / len(values) for section, values in sections.items()},
+                "avg_latency": sum(latencies) / len(latencies) if latencies else None,
+            }
+        return result
+
+
+prompt_size_tracker = PromptSizeTracker()
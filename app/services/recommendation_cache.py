@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.metrics import record_cache
+
+RECOMMENDATION_CACHE_MAX_ENTRIES = int(os.environ.get("RECOMMENDATION_CACHE_MAX_ENTRIES", "10000"))
+RECOMMENDATION_CACHE_TTL = int(os.environ.get("RECOMMENDATION_CACHE_TTL", str(24 * 60 * 60)))
+
+# 데이터 버전 계산에서 제외하는 키 (입력 내용과 무관하게 바뀌는 값)
+_STAMP_EXCLUDED_KEYS = {"summary_version"}
+
+
+def compute_data_stamp(health_data: Dict[str, Any], **extra: Any) -> str:
+    """
+    프롬프트 입력(회원 정보, 최신 예측, 최근 식단 버킷, 진행 중 챌린지)과 추가 입력으로 데이터 버전을 계산.
+    tb_food_record / tb_predict_record / challenge 내용이 바뀌면 버전도 바뀝니다.
+    """
+    payload = {key: value for key, value in health_data.items() if key not in _STAMP_EXCLUDED_KEYS}
+    payload["__extra__"] = extra
+    payload["__date__"] = date.today()
+    encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def _is_cacheable(value: Any) -> bool:
+    """오류 응답(문자열, error 키)과 LLM 장애 시 만든 대체 응답(degraded)은 캐시하지 않음"""
+    return isinstance(value, dict) and "error" not in value and not value.get("degraded")
+
+
+class RecommendationCache:
+    """회원별 추천 결과 캐시. 데이터 버전이 같을 때만 재사용하고, 동시 갱신은 한 번만 계산"""
+
+    def __init__(self, max_entries: int = RECOMMENDATION_CACHE_MAX_ENTRIES, ttl: int = RECOMMENDATION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # (kind, member_id) -> (stamp, value, created_at)
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[str, Any, float]]" = OrderedDict()
+        # (kind, member_id, stamp) -> 계산 중인 Future
+        self._inflight: Dict[Tuple[str, Hashable, str], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, member_id: Hashable, stamp: str) -> Optional[Any]:
+        entry = self._entries.get((kind, member_id))
+        if entry is None:
+            return None
+        entry_stamp, value, created_at = entry
+        if entry_stamp != stamp or time.time() - created_at > self.ttl:
+            return None
+        self._entries.move_to_end((kind, member_id))
+        return value
+
+    def get_last(self, kind: str, member_id: Hashable) -> Optional[Any]:
+        """데이터 버전과 무관하게 마지막으로 저장된 결과 (장애 시 대체 응답용)"""
+        entry = self._entries.get((kind, member_id))
+        return entry[1] if entry else None
+
+    def put(self, kind: str, member_id: Hashable, stamp: str, value: Any):
+        self._entries[(kind, member_id)] = (stamp, value, time.time())
+        self._entries.move_to_end((kind, member_id))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def invalidate(self, member_id: Hashable):
+        for key in [key for key in self._entries if key[1] == member_id]:
+            del self._entries[key]
+
+    async def get_or_compute(self, kind: str, member_id: Hashable, stamp: str,
+                             compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        캐시 히트면 즉시 반환, 아니면 compute 실행. 같은 키의 동시 요청은 하나의 계산 결과를 공유.
+        계산은 별도 태스크에서 돌므로 먼저 요청한 쪽이 취소(연결 끊김, 타임아웃)돼도 나머지 요청은 결과를 받음
+        """
+        value = self.get(kind, member_id, stamp)
+        if value is not None:
+            self.hits += 1
+            record_cache("recommendation", hits=1)
+            return value
+
+        inflight_key = (kind, member_id, stamp)
+        task = self._inflight.get(inflight_key)
+        if task is not None:
+            self.hits += 1
+            record_cache("recommendation", hits=1)
+        else:
+            self.misses += 1
+            record_cache("recommendation", misses=1)
+            task = asyncio.ensure_future(self._compute(kind, member_id, stamp, compute))
+            self._inflight[inflight_key] = task
+            task.add_done_callback(lambda done: self._finish(inflight_key, done))
+        return await asyncio.shield(task)
+
+    async def _compute(self, kind: str, member_id: Hashable, stamp: str,
+                       compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = await compute()
+        if _is_cacheable(value):
+            self.put(kind, member_id, stamp, value)
+        return value
+
+    def _finish(self, inflight_key: Tuple[str, Hashable, str], task: asyncio.Future):
+        if self._inflight.get(inflight_key) is task:
+            del self._inflight[inflight_key]
+        # 기다리던 요청이 모두 취소됐으면 "exception was never retrieved" 경고 방지
+        if not task.cancelled():
+            task.exception()
+
+
+recommendation_cache = RecommendationCache()
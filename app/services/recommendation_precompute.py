@@ -0,0 +1,274 @@
+"""
+식단 추천 야간 사전 계산 배치.
+
+최근 N일 안에 음식 기록/예측 기록이 있는 회원을 골라, get_user_health_data 입력을 대량 조회로 한 번에 읽고
+Gemini 추천을 미리 생성해 tb_member_recommendation에 저장합니다. 아침 요청은 저장된 결과로 즉시 응답합니다.
+
+- 회원 목록을 샤드로 나눠 프로세스 풀에서 생성 (프로세스마다 자체 이벤트 루프, batch 레인)
+- 전체 호출 속도는 --rate(분당)로 제한하고 프로세스 수만큼 나눠 배분
+- 배치 프로세스는 서버와 별도의 스케줄러를 가지므로, 같은 API 키의 쿼터를 llm_quota 임대로 받아 씀
+  (서버는 임대만큼 자기 쿼터를 줄이고, interactive 몫(LLM_INTERACTIVE_RESERVE)은 임대할 수 없음)
+- 샤드가 끝날 때마다 결과 저장 후 체크포인트 파일 갱신. 같은 날 다시 실행하면 완료된 회원은 건너뜀
+- 회원 한 명의 실패(오류 응답, 예외)는 그 회원만 실패로 기록하고 계속 진행
+
+추천 캐시의 데이터 버전에 날짜가 포함되므로, 서비스 당일 새벽(자정 이후)에 실행해야 합니다.
+
+사용:
+    python -m app.services.recommendation_precompute run [--days 3] [--processes 2] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from app.core.database import engine, fetch_all
+from app.core.log import get_logger
+from app.services.food_consult_service import generate_recommendation, RECOMMENDATION_REQUIRED_KEYS
+from app.services.gemini_gateway import gemini_gateway
+from app.services.health_summary_service import ensure_summary_tables, get_member_health_summaries
+from app.services.llm_quota import batch_quota
+from app.services.llm_scheduler import llm_lane, llm_scheduler, LANE_BATCH
+from app.services.recommendation_cache import compute_data_stamp
+from app.services.recommendation_store import ensure_recommendation_table, load_stamps, save_precomputed
+
+load_dotenv()
+
+logger = get_logger("app.services.recommendation_precompute")
+
+PRECOMPUTE_ACTIVE_DAYS = int(os.getenv("PRECOMPUTE_ACTIVE_DAYS", "3"))
+PRECOMPUTE_PROCESSES = int(os.getenv("PRECOMPUTE_PROCESSES", "2"))
+# 프로세스당 동시 Gemini 호출 수
+PRECOMPUTE_CONCURRENCY = int(os.getenv("PRECOMPUTE_CONCURRENCY", "8"))
+# 전체 프로세스 합산 분당 호출 수 (서버 쿼터와 같은 API 키에서 임대)
+PRECOMPUTE_RATE_PER_MINUTE = float(os.getenv("PRECOMPUTE_RATE_PER_MINUTE", "300"))
+PRECOMPUTE_SHARD_SIZE = int(os.getenv("PRECOMPUTE_SHARD_SIZE", "50"))
+PRECOMPUTE_CHECKPOINT = os.getenv("PRECOMPUTE_CHECKPOINT", "recommendation_precompute.json")
+PRECOMPUTE_QUOTA_HOLDER = "recommendation_precompute"
+
+ACTIVE_MEMBERS_QUERY = text("""
+    SELECT member_id FROM tb_food_record WHERE consumed_date >= :since
+    UNION
+    SELECT member_id FROM tb_predict_record WHERE reg_date >= :since
+""")
+
+# (member_id, stamp, health_data)
+WorkItem = Tuple[Any, str, Dict[str, Any]]
+# (member_id, stamp, recommendation 또는 None, 오류 메시지 또는 None)
+WorkResult = Tuple[Any, str, Optional[Dict[str, Any]], Optional[str]]
+
+
+class Checkpoint:
+    """실행 날짜별 완료/실패 회원 기록. 날짜가 바뀌면 새로 시작"""
+
+    def __init__(self, path: str, run_date: date):
+        self.path = path
+        self.run_date = run_date.isoformat()
+        self.done: set = set()
+        self.failed: Dict[str, str] = {}
+        self.skipped: Dict[str, str] = {}
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        if data.get("run_date") != self.run_date:
+            logger.info("이전 실행(%s) 체크포인트는 무시", data.get("run_date"))
+            return
+        self.done = set(data.get("done", []))
+        self.failed = data.get("failed", {})
+        self.skipped = data.get("skipped", {})
+
+    def save(self):
+        data = {
+            "run_date": self.run_date,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "done": sorted(self.done),
+            "failed": self.failed,
+            "skipped": self.skipped,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def mark_done(self, member_id):
+        self.done.add(member_id)
+        self.failed.pop(str(member_id), None)
+
+    def mark_failed(self, member_id, error: str):
+        self.failed[str(member_id)] = error[:300]
+
+
+def _init_worker(rate_per_minute: float, concurrency: int):
+    """
+    풀 워커 초기화: 이 프로세스의 몫만큼 쿼터를 줄이고 batch 레인 동시 실행 수를 맞춤.
+    이 프로세스에는 interactive 호출이 없으므로 예약분을 두지 않음 (interactive 몫은 서버가 임대에서 제외해 보장)
+    """
+    llm_scheduler.configure(rate_per_minute=rate_per_minute, lane_concurrency={LANE_BATCH: concurrency},
+                            interactive_reserve=0.0)
+
+
+async def _generate_shard_async(items: List[WorkItem], concurrency: int) -> List[WorkResult]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate_one(member_id, stamp, health_data) -> WorkResult:
+        async with semaphore:
+            try:
+                recommendation = await generate_recommendation(health_data)
+            except Exception as e:
+                return member_id, stamp, None, f"{type(e).__name__}: {e}"
+        if not isinstance(recommendation, dict):
+            return member_id, stamp, None, str(recommendation)
+        if "error" in recommendation:
+            return member_id, stamp, None, str(recommendation["error"])
+        return member_id, stamp, recommendation, None
+
+    with llm_lane(LANE_BATCH):
+        return list(await asyncio.gather(*(generate_one(*item) for item in items)))
+
+
+def _generate_shard(items: List[WorkItem], concurrency: int) -> List[WorkResult]:
+    """프로세스 풀에서 실행: 샤드 하나를 자체 이벤트 루프에서 생성"""
+
+    async def run():
+        try:
+            return await _generate_shard_async(items, concurrency)
+        finally:
+            await gemini_gateway.aclose()
+
+    return asyncio.run(run())
+
+
+async def _prepare(days: int, checkpoint: Checkpoint) -> List[WorkItem]:
+    """대상 회원 선택 + 입력 대량 조회. 이미 완료했거나 저장된 추천이 최신인 회원은 제외"""
+    since = datetime.combine(date.today() - timedelta(days=days), datetime.min.time())
+    member_ids = [row["member_id"] for row in await fetch_all("precompute_active_members", ACTIVE_MEMBERS_QUERY, {"since": since})]
+    pending = [member_id for member_id in member_ids if member_id not in checkpoint.done]
+    logger.info("최근 %d일 활동 회원 %d명, 남은 회원 %d명", days, len(member_ids), len(pending))
+
+    health_data = await get_member_health_summaries(pending)
+    stored_stamps = await load_stamps(pending)
+    items: List[WorkItem] = []
+    for member_id in pending:
+        data = health_data.get(member_id)
+        if data is None or any(data.get(key) is None for key in RECOMMENDATION_REQUIRED_KEYS):
+            checkpoint.skipped[str(member_id)] = "필수 사용자 정보 누락"
+            continue
+        stamp = compute_data_stamp(data)
+        if stored_stamps.get(member_id) == stamp:
+            checkpoint.mark_done(member_id)
+            continue
+        items.append((member_id, stamp, data))
+    checkpoint.save()
+    return items
+
+
+async def _store_results(results: List[WorkResult], checkpoint: Checkpoint) -> int:
+    entries = [{"member_id": member_id, "stamp": stamp, "recommendation": recommendation}
+               for member_id, stamp, recommendation, error in results if recommendation is not None]
+    await save_precomputed(entries)
+    for member_id, _, recommendation, error in results:
+        if recommendation is not None:
+            checkpoint.mark_done(member_id)
+        else:
+            checkpoint.mark_failed(member_id, error or "알 수 없는 오류")
+    checkpoint.save()
+    return len(entries)
+
+
+async def _run_shards(shards: List[List[WorkItem]], checkpoint: Checkpoint, processes: int, concurrency: int,
+                      rate_per_minute: float) -> int:
+    stored = 0
+    if processes <= 1:
+        _init_worker(rate_per_minute, concurrency)
+        for shard in shards:
+            stored += await _store_results(await _generate_shard_async(shard, concurrency), checkpoint)
+            logger.info("진행: 완료 %d명, 실패 %d명", len(checkpoint.done), len(checkpoint.failed))
+        return stored
+
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn"),
+                             initializer=_init_worker, initargs=(rate_per_minute / processes, concurrency)) as pool:
+
+        async def run_shard(shard: List[WorkItem]) -> List[WorkResult]:
+            try:
+                return await loop.run_in_executor(pool, _generate_shard, shard, concurrency)
+            except Exception as e:
+                # 워커 프로세스 자체가 죽은 경우 해당 샤드만 실패 처리
+                return [(member_id, stamp, None, f"샤드 실패: {type(e).__name__}: {e}")
+                        for member_id, stamp, _ in shard]
+
+        for next_result in asyncio.as_completed([run_shard(shard) for shard in shards]):
+            stored += await _store_results(await next_result, checkpoint)
+            logger.info("진행: 완료 %d명, 실패 %d명", len(checkpoint.done), len(checkpoint.failed))
+    return stored
+
+
+async def run_precompute(days: int = PRECOMPUTE_ACTIVE_DAYS, processes: int = PRECOMPUTE_PROCESSES,
+                         concurrency: int = PRECOMPUTE_CONCURRENCY, rate_per_minute: float = PRECOMPUTE_RATE_PER_MINUTE,
+                         checkpoint_path: str = PRECOMPUTE_CHECKPOINT, shard_size: int = PRECOMPUTE_SHARD_SIZE) -> Dict[str, int]:
+    start = time.perf_counter()
+    await ensure_summary_tables()
+    await ensure_recommendation_table()
+    checkpoint = Checkpoint(checkpoint_path, date.today())
+    checkpoint.load()
+
+    items = await _prepare(days, checkpoint)
+    shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+    stored = 0
+
+    if shards:
+        async with batch_quota(PRECOMPUTE_QUOTA_HOLDER, rate_per_minute) as granted:
+            if granted <= 0:
+                logger.warning("임대할 수 있는 쿼터가 없어 생성을 건너뜀 (다음 실행에서 이어서 처리)")
+            else:
+                stored = await _run_shards(shards, checkpoint, processes, concurrency, granted)
+
+    summary = {
+        "targets": len(items),
+        "stored": stored,
+        "done": len(checkpoint.done),
+        "failed": len(checkpoint.failed),
+        "skipped": len(checkpoint.skipped),
+    }
+    logger.info("완료 %s (%.1f초)", summary, time.perf_counter() - start)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="식단 추천 야간 사전 계산")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="최근 활동 회원의 추천을 미리 생성")
+    run_parser.add_argument("--days", type=int, default=PRECOMPUTE_ACTIVE_DAYS, help="최근 활동 기준 일수")
+    run_parser.add_argument("--processes", type=int, default=PRECOMPUTE_PROCESSES, help="워커 프로세스 수 (1이면 단일 프로세스)")
+    run_parser.add_argument("--concurrency", type=int, default=PRECOMPUTE_CONCURRENCY, help="프로세스당 동시 호출 수")
+    run_parser.add_argument("--rate", type=float, default=PRECOMPUTE_RATE_PER_MINUTE, help="전체 분당 호출 수")
+    run_parser.add_argument("--checkpoint", default=PRECOMPUTE_CHECKPOINT, help="체크포인트 파일 경로")
+    run_parser.add_argument("--reset", action="store_true", help="체크포인트를 지우고 처음부터 실행")
+    args = parser.parse_args()
+
+    if args.reset and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    async def run():
+        try:
+            await run_precompute(args.days, args.processes, args.concurrency, args.rate, args.checkpoint)
+        finally:
+            await gemini_gateway.aclose()
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
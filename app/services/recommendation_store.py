@@ -0,0 +1,80 @@
+"""
+사전 계산된 식단 추천 저장소 (tb_member_recommendation).
+
+야간 배치(recommendation_precompute)가 회원별 추천과 그 입력의 데이터 버전(stamp)을 저장하고,
+/diet/recommendation은 메모리 캐시에 없을 때 같은 버전의 저장 결과가 있으면 Gemini 호출 없이 바로 응답합니다.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, text
+
+from app.core.database import engine, execute, fetch_all, fetch_one
+
+CREATE_RECOMMENDATION_TABLE = text("""
+    CREATE TABLE IF NOT EXISTS tb_member_recommendation (
+        member_id BIGINT NOT NULL PRIMARY KEY,
+        stamp VARCHAR(64) NOT NULL,
+        recommendation TEXT NOT NULL,
+        created_at DATETIME NOT NULL
+    )
+""")
+
+LOAD_RECOMMENDATION_QUERY = text("""
+    SELECT recommendation FROM tb_member_recommendation WHERE member_id = :member_id AND stamp = :stamp
+""")
+
+LOAD_STAMPS_QUERY = text("""
+    SELECT member_id, stamp FROM tb_member_recommendation WHERE member_id IN :ids
+""").bindparams(bindparam("ids", expanding=True))
+
+
+def _upsert_recommendation_query():
+    insert = """
+        INSERT INTO tb_member_recommendation (member_id, stamp, recommendation, created_at)
+        VALUES (:member_id, :stamp, :recommendation, :created_at)
+    """
+    if engine.dialect.name == "mysql":
+        return text(insert + """
+            ON DUPLICATE KEY UPDATE stamp = VALUES(stamp), recommendation = VALUES(recommendation),
+                created_at = VALUES(created_at)
+        """)
+    return text(insert + """
+        ON CONFLICT (member_id) DO UPDATE SET stamp = excluded.stamp, recommendation = excluded.recommendation,
+            created_at = excluded.created_at
+    """)
+
+
+async def ensure_recommendation_table():
+    await execute("recommendation_ddl", (CREATE_RECOMMENDATION_TABLE, None))
+
+
+async def load_precomputed(member_id: float, stamp: str) -> Optional[Dict[str, Any]]:
+    """현재 데이터 버전과 같은 사전 계산 추천이 있으면 반환"""
+    row = await fetch_one("recommendation_load", LOAD_RECOMMENDATION_QUERY, {"member_id": member_id, "stamp": stamp})
+    if row is None:
+        return None
+    return json.loads(row["recommendation"])
+
+
+async def load_stamps(member_ids: List[Any]) -> Dict[Any, str]:
+    """회원별로 저장된 추천의 데이터 버전 (이미 최신인 회원은 배치에서 건너뜀)"""
+    if not member_ids:
+        return {}
+    rows = await fetch_all("recommendation_stamps", LOAD_STAMPS_QUERY, {"ids": list(member_ids)})
+    return {row["member_id"]: row["stamp"] for row in rows}
+
+
+async def save_precomputed(entries: List[Dict[str, Any]]):
+    """[{"member_id", "stamp", "recommendation"}] 일괄 저장"""
+    if not entries:
+        return
+    now = datetime.now()
+    params = [{
+        "member_id": entry["member_id"],
+        "stamp": entry["stamp"],
+        "recommendation": json.dumps(entry["recommendation"], ensure_ascii=False),
+        "created_at": now,
+    } for entry in entries]
+    await execute("recommendation_save", (_upsert_recommendation_query(), params))
@@ -0,0 +1,13 @@
+"""
+오프라인 부하 테스트 도구.
+
+Gemini와 MySQL 없이 로컬에서 전체 API를 부하 테스트합니다.
+- gemini_stub: 응답 지연을 설정할 수 있는 Gemini REST 스텁 (generateContent / streamGenerateContent)
+- seed: tb_members / tb_food_record / tb_predict_record / challenge 를 채운 SQLite DB와 식단 이미지 생성
+- workloads: 라우터별 요청 시나리오와 기본 비율
+- runner: 스텁 + 시드 DB로 서버를 띄우고 워크로드를 실행해 처리량과 p50/p95/p99 지연을 보고
+
+    python -m loadtest run [--duration 30] [--concurrency 16] [--mix diet_analysis=3,predict_health=1]
+    python -m loadtest stub [--port 8790] [--latency-ms 800]
+    python -m loadtest seed [--db loadtest.db] [--members 200]
+"""
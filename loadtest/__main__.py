@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import json
+import sys
+
+import httpx
+
+from loadtest.gemini_stub import StubConfig, parse_latency_overrides, serve
+from loadtest.runner import StackOptions, format_report, local_stack, run_load, summarize
+from loadtest.seed import create_meal_image, seed_database
+from loadtest.workloads import WorkloadContext, parse_mix
+
+
+def _add_stub_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="첫 응답까지의 평균 지연 (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=200.0, help="지연의 ± 범위 (ms)")
+    parser.add_argument("--latency-for", action="append", default=[], metavar="TYPE=MS",
+                        help="유형별 지연 (extraction, nutrition, suggestion, vision_check, vision, calculation, goal, "
+                             "recommendation). 여러 번 지정 가능")
+    parser.add_argument("--chunk-chars", type=int, default=40, help="스트리밍 조각당 글자 수")
+    parser.add_argument("--chunk-ms", type=float, default=20.0, help="스트리밍 조각 사이 지연 (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503을 반환할 비율 (0~1)")
+
+
+def _stub_args(args) -> list:
+    """run 명령의 스텁 옵션을 stub 하위 명령 인자로 전달"""
+    stub_args = ["--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+                 "--chunk-chars", str(args.chunk_chars), "--chunk-ms", str(args.chunk_ms),
+                 "--error-rate", str(args.error_rate)]
+    for value in args.latency_for:
+        stub_args += ["--latency-for", value]
+    return stub_args
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Gemini/MySQL 없이 실행하는 부하 테스트")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    stub_parser = subparsers.add_parser("stub", help="Gemini REST 스텁 서버 실행")
+    stub_parser.add_argument("--host", default="127.0.0.1")
+    stub_parser.add_argument("--port", type=int, default=8790)
+    _add_stub_arguments(stub_parser)
+
+    seed_parser = subparsers.add_parser("seed", help="SQLite DB와 식단 이미지 생성")
+    seed_parser.add_argument("--db", default="loadtest.db", help="만들 SQLite 파일")
+    seed_parser.add_argument("--image-dir", default="uploads", help="식단 이미지를 만들 디렉터리")
+    seed_parser.add_argument("--members", type=int, default=200)
+    seed_parser.add_argument("--days", type=int, default=30, help="회원당 음식 기록 일수")
+    seed_parser.add_argument("--seed", type=int, default=42)
+
+    run_parser = subparsers.add_parser("run", help="워크로드를 실행하고 처리량/지연 보고")
+    run_parser.add_argument("--target", help="이미 실행 중인 앱 URL (생략하면 스텁 + 시드 DB로 앱을 직접 띄움)")
+    run_parser.add_argument("--image-path", help="--target 사용 시 서버의 ALLOWED_IMAGE_DIR 안 식단 이미지 경로")
+    run_parser.add_argument("--mix", help="워크로드 비율 (예: diet_analysis=3,predict_health=1). 기본은 전체 라우터")
+    run_parser.add_argument("--duration", type=float, default=30.0, help="집계 구간 (초)")
+    run_parser.add_argument("--warmup", type=float, default=5.0, help="집계에서 뺄 시작 구간 (초)")
+    run_parser.add_argument("--concurrency", type=int, default=16, help="동시 요청 수")
+    run_parser.add_argument("--timeout", type=float, default=120.0, help="요청 타임아웃 (초)")
+    run_parser.add_argument("--members", type=int, default=200)
+    run_parser.add_argument("--days", type=int, default=30)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--workers", type=int, default=1, help="uvicorn 워커 수")
+    run_parser.add_argument("--cold-cache", action="store_true", help="nutrition_cache.pkl 없이 시작")
+    run_parser.add_argument("--workdir", help="작업 디렉터리 (기본: 임시 디렉터리)")
+    run_parser.add_argument("--json", dest="json_path", help="결과를 JSON으로도 저장")
+    _add_stub_arguments(run_parser)
+    args = parser.parse_args()
+
+    if args.command == "stub":
+        config = StubConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                            latency_for=parse_latency_overrides(args.latency_for), chunk_chars=args.chunk_chars,
+                            chunk_ms=args.chunk_ms, error_rate=args.error_rate)
+        serve(config, host=args.host, port=args.port)
+
+    elif args.command == "seed":
+        counts = seed_database(args.db, members=args.members, days=args.days, seed=args.seed)
+        print(f"{args.db}: {counts}")
+        print(f"이미지: {create_meal_image(args.image_dir)}")
+
+    elif args.command == "run":
+        mix = parse_mix(args.mix)
+
+        def execute(base_url: str, context: WorkloadContext, stub_url: str = None):
+            stats, measured = asyncio.run(run_load(base_url, mix, context, duration=args.duration,
+                                                   concurrency=args.concurrency, warmup=args.warmup,
+                                                   seed=args.seed, timeout=args.timeout))
+            rows = summarize(stats, measured)
+            print(format_report(rows, measured, args.concurrency))
+            report = {"target": base_url, "duration": measured, "concurrency": args.concurrency, "mix": mix,
+                      "workloads": rows}
+            if stub_url:
+                report["stub_calls"] = httpx.get(f"{stub_url}/stats").json()["calls"]
+                print(f"스텁 호출 수: {report['stub_calls']}")
+            if args.json_path:
+                with open(args.json_path, "w", encoding="utf-8") as f:
+                    json.dump(report, f, ensure_ascii=False, indent=2)
+
+        if args.target:
+            if "meal_image" in mix and not args.image_path:
+                sys.exit("--target으로 meal_image를 실행하려면 --image-path가 필요합니다.")
+            execute(args.target.rstrip("/"), WorkloadContext(members=args.members, image_path=args.image_path or ""))
+        else:
+            options = StackOptions(members=args.members, days=args.days, seed=args.seed, stub_args=_stub_args(args),
+                                   workers=args.workers, cold_cache=args.cold_cache, workdir=args.workdir)
+            with local_stack(options) as (app_url, stub_url, context):
+                execute(app_url, context, stub_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Gemini REST API 스텁.
+
+POST /{version}/models/{model}:generateContent 와 :streamGenerateContent?alt=sse 를 흉내 냅니다.
+앱의 GeminiGateway는 GEMINI_API_BASE=http://127.0.0.1:<port>/v1beta 로,
+google.generativeai SDK는 transport="rest", client_options={"api_endpoint": "http://127.0.0.1:<port>"} 로 연결합니다.
+
+응답은 프롬프트 내용으로 유형(음식 추출, 영양 분석, 제안, 이미지, 추천, 목표, 프로필)을 판별해
+서비스가 파싱할 수 있는 형식으로 만들고, 음식별 영양소는 음식 이름으로 정해지는 고정 값입니다.
+
+- latency_ms ± jitter_ms: 첫 응답까지의 지연 (유형별로 latency_for에서 덮어씀)
+- chunk_chars / chunk_ms: 스트리밍 조각 크기와 조각 사이 지연
+- error_rate: 이 비율로 503 반환 (재시도/브레이커 경로 확인용)
+- fail_first / fail_status / retry_after: 처음 fail_first번의 호출은 fail_status로 실패 (테스트에서 재시도 순서 고정용)
+- finish_reason: 마지막 조각(또는 응답)의 finishReason (MAX_TOKENS로 잘린 응답 흉내)
+- /stats의 peak_in_flight: 동시에 처리 중이던 요청 수의 최댓값 (호출 측 동시 실행 상한 확인용)
+"""
+import asyncio
+import random
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+
+TYPE_EXTRACTION = "extraction"
+TYPE_NUTRITION = "nutrition"
+TYPE_SUGGESTION = "suggestion"
+TYPE_VISION_CHECK = "vision_check"
+TYPE_VISION = "vision"
+TYPE_CALCULATION = "calculation"
+TYPE_GOAL = "goal"
+TYPE_RECOMMENDATION = "recommendation"
+TYPE_DEFAULT = "default"
+
+# 워크로드 문장에 쓰는 음식 (추출 응답은 문장에 들어 있는 것만 반환)
+FOODS = [
+    "김밥", "라면", "떡볶이", "비빔밥", "불고기", "김치찌개", "된장찌개", "제육볶음", "돈까스", "냉면",
+    "삼계탕", "순두부찌개", "잡채", "짜장면", "짬뽕", "볶음밥", "카레", "우동", "갈비탕", "닭갈비",
+]
+NUTRIENTS_EN = ["protein", "carbohydrate", "water", "sugar", "fat", "fiber", "sodium"]
+NUTRIENTS_KO = ["탄수화물", "단백질", "지방", "당분", "나트륨", "식이섬유", "수분", "칼로리"]
+
+_FOOD_LIST_PATTERN = re.compile(r"음식 리스트:\s*(.+)")
+_SENTENCE_PATTERN = re.compile(r'문장:\s*"(.*)"')
+_PROFILE_LINE_PATTERN = re.compile(r"^\s*(\d+)\.\s+(.+?)\s+\(기준량:", re.MULTILINE)
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 800.0
+    jitter_ms: float = 200.0
+    latency_for: Dict[str, float] = field(default_factory=dict)
+    chunk_chars: int = 40
+    chunk_ms: float = 20.0
+    error_rate: float = 0.0
+    fail_first: int = 0
+    fail_status: int = 503
+    retry_after: Optional[str] = None
+    finish_reason: str = "STOP"
+
+
+def _amount(name: str, nutrient: str, low: float, high: float) -> float:
+    """음식/영양소별 고정 값 (같은 음식이면 항상 같은 응답)"""
+    fraction = (zlib.crc32(f"{name}:{nutrient}".encode("utf-8")) % 1000) / 1000
+    return round(low + (high - low) * fraction, 1)
+
+
+def _food_nutrition(name: str) -> Dict[str, float]:
+    return {nutrient: _amount(name, nutrient, 1, 80 if nutrient != "sodium" else 1500) for nutrient in NUTRIENTS_EN}
+
+
+def classify(prompt: str, has_image: bool) -> str:
+    if has_image:
+        return TYPE_VISION if "nutrition_data" in prompt else TYPE_VISION_CHECK
+    if "음식 이름만 정확히 추출" in prompt:
+        return TYPE_EXTRACTION
+    if "nutrition_per_food" in prompt:
+        return TYPE_NUTRITION
+    if "deficient_nutrients" in prompt:
+        return TYPE_SUGGESTION
+    if '"profiles"' in prompt:
+        return TYPE_CALCULATION
+    if "목표 영양소" in prompt:
+        return TYPE_GOAL
+    if "식단 추천" in prompt:
+        return TYPE_RECOMMENDATION
+    return TYPE_DEFAULT
+
+
+def respond(prompt_type: str, prompt: str) -> str:
+    """유형별 응답 텍스트 (실제 모델처럼 JSON은 코드 블록으로 감쌈)"""
+    if prompt_type == TYPE_EXTRACTION:
+        match = _SENTENCE_PATTERN.search(prompt)
+        sentence = match.group(1) if match else ""
+        return ", ".join(food for food in FOODS if food in sentence)
+    if prompt_type == TYPE_VISION_CHECK:
+        return "Yes"
+
+    if prompt_type == TYPE_NUTRITION:
+        match = _FOOD_LIST_PATTERN.search(prompt)
+        foods = [food.strip() for food in match.group(1).split(",")] if match else []
+        value: Any = {"nutrition_per_food": [{"food": food, "nutrition": _food_nutrition(food)} for food in foods if food]}
+    elif prompt_type == TYPE_SUGGESTION:
+        value = {"deficient_nutrients": ["식이섬유"], "next_meal_suggestion": ["나물 비빔밥"]}
+    elif prompt_type == TYPE_VISION:
+        foods = [FOODS[index] for index in (0, 3)]
+        nutrition_data = []
+        for food in foods:
+            nutrients = {"protein": _amount(food, "protein", 5, 40), "carbohydrates": _amount(food, "carb", 20, 90),
+                         "fat": _amount(food, "fat", 3, 30), "sugar": _amount(food, "sugar", 1, 20),
+                         "sodium": _amount(food, "sodium", 200, 1500), "fiber": _amount(food, "fiber", 1, 8),
+                         "water": _amount(food, "water", 50, 400)}
+            nutrition_data.append({"food": food, "calories": _amount(food, "kcal", 200, 700), "nutrients": nutrients})
+        total = {"calories": sum(item["calories"] for item in nutrition_data)}
+        for key in nutrition_data[0]["nutrients"]:
+            total[key] = round(sum(item["nutrients"][key] for item in nutrition_data), 1)
+        value = {"nutrition_data": nutrition_data, "total_nutrition": total,
+                 "deficient_nutrients": ["식이섬유"], "next_meal_suggestion": ["두부 스테이크"]}
+    elif prompt_type == TYPE_CALCULATION:
+        profiles = []
+        for number, name in _PROFILE_LINE_PATTERN.findall(prompt):
+            profile: Dict[str, Any] = {"번호": int(number)}
+            profile.update({key: _amount(name, key, 0.1, 20 if key != "칼로리" else 300) for key in NUTRIENTS_KO})
+            profiles.append(profile)
+        value = {"profiles": profiles}
+    elif prompt_type == TYPE_GOAL:
+        value = {"tdee": 2300, "calories": 1900, "carb": 240, "protein": 110, "fat": 55}
+    elif prompt_type == TYPE_RECOMMENDATION:
+        value = {
+            "건강 위험도 분석": "당뇨 12% (확률 낮음), 고혈압 35% (주의), 심혈관 20% (확률 낮음)",
+            "목표 기반 추천": "하루 1900kcal 섭취를 권장합니다.",
+            "식단 추천": {"아침": ["현미밥", "계란찜"], "점심": ["비빔밥"], "저녁": ["닭가슴살 샐러드"], "간식": ["그릭요거트"]},
+            "주의사항": "나트륨 섭취를 줄이세요.",
+        }
+    else:
+        return "OK"
+    return "```json\n" + orjson.dumps(value).decode("utf-8") + "\n```"
+
+
+def _prompt_of(body: Dict[str, Any]) -> Tuple[str, bool]:
+    parts: List[Dict[str, Any]] = [part for content in body.get("contents", []) for part in content.get("parts", [])]
+    text = "\n".join(part.get("text", "") for part in parts)
+    return text, any("inline_data" in part or "inlineData" in part for part in parts)
+
+
+def _usage(prompt: str, text: str) -> Dict[str, int]:
+    # 한글 위주라 글자당 약 0.7 토큰으로 근사 (app.services.prompt_builder와 같은 기준)
+    return {"promptTokenCount": int(len(prompt) * 0.7), "candidatesTokenCount": int(len(text) * 0.7),
+            "totalTokenCount": int((len(prompt) + len(text)) * 0.7)}
+
+
+def _candidate(text: str, finish: Optional[str] = None) -> Dict[str, Any]:
+    candidate: Dict[str, Any] = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish:
+        candidate["finishReason"] = finish
+    return candidate
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="Gemini Stub")
+    app.state.calls = {}
+    app.state.requests = 0
+    app.state.in_flight = 0
+    app.state.peak_in_flight = 0
+
+    async def delay(prompt_type: str):
+        latency = config.latency_for.get(prompt_type, config.latency_ms)
+        await asyncio.sleep(max(0.0, latency + random.uniform(-config.jitter_ms, config.jitter_ms)) / 1000)
+
+    @app.post("/{version}/models/{target}")
+    async def generate(version: str, target: str, request: Request):
+        _, _, method = target.partition(":")
+        body = orjson.loads(await request.body())
+        prompt, has_image = _prompt_of(body)
+        prompt_type = classify(prompt, has_image)
+        app.state.calls[prompt_type] = app.state.calls.get(prompt_type, 0) + 1
+        app.state.requests += 1
+        scripted_failure = app.state.requests <= config.fail_first
+
+        app.state.in_flight += 1
+        app.state.peak_in_flight = max(app.state.peak_in_flight, app.state.in_flight)
+        try:
+            await delay(prompt_type)
+        finally:
+            app.state.in_flight -= 1
+        if scripted_failure:
+            headers = {"Retry-After": config.retry_after} if config.retry_after else None
+            return Response(orjson.dumps({"error": {"code": config.fail_status, "message": "stub failure"}}),
+                            status_code=config.fail_status, media_type="application/json", headers=headers)
+        if config.error_rate and random.random() < config.error_rate:
+            return Response(orjson.dumps({"error": {"code": 503, "message": "stub overloaded"}}), status_code=503,
+                            media_type="application/json")
+
+        text = respond(prompt_type, prompt)
+        if method != "streamGenerateContent":
+            payload = {"candidates": [_candidate(text, config.finish_reason)], "usageMetadata": _usage(prompt, text)}
+            return Response(orjson.dumps(payload), media_type="application/json")
+
+        async def events():
+            size = max(1, config.chunk_chars)
+            for start in range(0, len(text), size):
+                if start:
+                    await asyncio.sleep(config.chunk_ms / 1000)
+                yield b"data: " + orjson.dumps({"candidates": [_candidate(text[start:start + size])]}) + b"\r\n\r\n"
+            last = {"candidates": [_candidate("", config.finish_reason)], "usageMetadata": _usage(prompt, text)}
+            yield b"data: " + orjson.dumps(last) + b"\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"calls": app.state.calls, "requests": app.state.requests, "peak_in_flight": app.state.peak_in_flight}
+
+    return app
+
+
+def parse_latency_overrides(values: List[str]) -> Dict[str, float]:
+    """["vision=2500", "extraction=300"] -> {"vision": 2500.0, "extraction": 300.0}"""
+    overrides = {}
+    for value in values or []:
+        name, _, latency = value.partition("=")
+        if not latency:
+            raise ValueError(f"유형별 지연은 이름=ms 형식이어야 합니다: {value}")
+        overrides[name.strip()] = float(latency)
+    return overrides
+
+
+def serve(config: StubConfig, host: str = "127.0.0.1", port: int = 8790):
+    import uvicorn
+
+    uvicorn.run(create_app(config), host=host, port=port, log_level="warning", access_log=False)
@@ -0,0 +1,222 @@
+"""
+부하 생성과 결과 보고.
+
+run_load: concurrency개의 워커가 duration초 동안 쉬지 않고(closed loop) 비율에 따라 워크로드를 골라 요청합니다.
+워밍업 구간의 요청은 집계에서 빼고, 워크로드별 요청 수/오류 수/처리량과 p50/p95/p99/최대 지연을 보고합니다.
+HTTP 4xx/5xx와 연결 오류는 오류로 세고 지연 분포에는 넣지 않습니다.
+
+local_stack: 임시 작업 디렉터리에 시드 DB와 이미지를 만들고 Gemini 스텁과 앱 서버(uvicorn)를 띄웁니다.
+앱은 작업 디렉터리에서 실행되므로 캐시 파일(nutrition_cache.pkl 등)과 작업 DB가 저장소를 건드리지 않습니다.
+DB/Gemini 연결 외의 앱 설정(LLM_RATE_PER_MINUTE, GEMINI_MAX_CONCURRENCY 등)은 현재 환경 변수를 그대로 따릅니다.
+"""
+import asyncio
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from loadtest.seed import create_meal_image, seed_database
+from loadtest.workloads import WORKLOADS, WorkloadContext
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class WorkloadStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+
+async def _worker(client: httpx.AsyncClient, rng: random.Random, mix: Dict[str, float], context: WorkloadContext,
+                  measure_from: float, deadline: float, stats: Dict[str, WorkloadStats]):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        request = WORKLOADS[name](rng, context)
+        start = time.perf_counter()
+        try:
+            response = await client.request(request.method, request.path, json=request.json, params=request.params)
+            status = str(response.status_code)
+            ok = response.status_code < 400
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+            ok = False
+        elapsed = time.perf_counter() - start
+        if start < measure_from:
+            continue
+        entry = stats.setdefault(name, WorkloadStats())
+        entry.statuses[status] = entry.statuses.get(status, 0) + 1
+        if ok:
+            entry.latencies.append(elapsed)
+        else:
+            entry.errors += 1
+
+
+async def run_load(base_url: str, mix: Dict[str, float], context: WorkloadContext, duration: float = 30.0,
+                   concurrency: int = 16, warmup: float = 5.0, seed: int = 42,
+                   timeout: float = 120.0) -> Tuple[Dict[str, WorkloadStats], float]:
+    """(워크로드별 통계, 집계 구간 길이(초))"""
+    stats: Dict[str, WorkloadStats] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        measure_from = start + warmup
+        deadline = measure_from + duration
+        await asyncio.gather(*[
+            _worker(client, random.Random(seed + index), mix, context, measure_from, deadline, stats)
+            for index in range(concurrency)
+        ])
+        # 마지막 요청이 deadline을 넘겨 끝날 수 있으므로 실제 종료 시각 기준
+        measured = max(time.perf_counter() - measure_from, 1e-9)
+    return stats, measured
+
+
+def summarize(stats: Dict[str, WorkloadStats], measured: float) -> List[Dict[str, float]]:
+    """워크로드별 + 전체 행 (지연은 ms)"""
+    rows = []
+    groups = sorted(stats.items())
+    groups.append(("TOTAL", WorkloadStats(
+        latencies=[value for entry in stats.values() for value in entry.latencies],
+        errors=sum(entry.errors for entry in stats.values()),
+    )))
+    for name, entry in groups:
+        latencies = np.array(entry.latencies) * 1000
+        count = len(entry.latencies) + entry.errors
+        row = {"workload": name, "requests": count, "errors": entry.errors, "rps": count / measured}
+        if latencies.size:
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            row.update(p50_ms=float(p50), p95_ms=float(p95), p99_ms=float(p99), max_ms=float(latencies.max()))
+        else:
+            row.update(p50_ms=0.0, p95_ms=0.0, p99_ms=0.0, max_ms=0.0)
+        if entry.statuses:
+            row["statuses"] = dict(sorted(entry.statuses.items()))
+        rows.append(row)
+    return rows
+
+
+def format_report(rows: List[Dict[str, float]], measured: float, concurrency: int) -> str:
+    lines = [
+        f"집계 구간 {measured:.1f}초, 동시 요청 {concurrency}",
+        f"{'workload':22s} {'requests':>9s} {'errors':>7s} {'req/s':>8s} {'p50(ms)':>9s} {'p95(ms)':>9s} "
+        f"{'p99(ms)':>9s} {'max(ms)':>9s}",
+    ]
+    for row in rows:
+        lines.append(
+            f"{row['workload']:22s} {row['requests']:9d} {row['errors']:7d} {row['rps']:8.1f} {row['p50_ms']:9.1f} "
+            f"{row['p95_ms']:9.1f} {row['p99_ms']:9.1f} {row['max_ms']:9.1f}"
+        )
+        failed = {status: count for status, count in row.get("statuses", {}).items() if not status.startswith(("2", "3"))}
+        if failed:
+            lines.append(f"{'':22s} 오류 응답: {failed}")
+    return "\n".join(lines)
+
+
+# --- 로컬 스택 (스텁 + 시드 DB + 앱 서버) ---
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"서버가 시작 중 종료되었습니다 (exit {process.returncode}): {' '.join(process.args)}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{timeout:.0f}초 안에 서버가 준비되지 않았습니다: {url}")
+
+
+def _stop(process: Optional[subprocess.Popen]):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+@dataclass
+class StackOptions:
+    members: int = 200
+    days: int = 30
+    seed: int = 42
+    stub_args: List[str] = field(default_factory=list)
+    workers: int = 1
+    cold_cache: bool = False
+    workdir: Optional[str] = None
+    startup_timeout: float = 180.0
+
+
+@contextmanager
+def local_stack(options: StackOptions) -> Iterator[Tuple[str, str, WorkloadContext]]:
+    """(앱 URL, 스텁 URL, 워크로드 context)"""
+    workdir = Path(options.workdir or tempfile.mkdtemp(prefix="loadtest-")).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / "loadtest.db"
+    counts = seed_database(str(db_path), members=options.members, days=options.days, seed=options.seed)
+    image_path = create_meal_image(str(workdir / "uploads"))
+    print(f"작업 디렉터리 {workdir}, 시드 {counts}")
+
+    # 앱은 작업 디렉터리에서 실행 (모델 경로 app/model/... 는 링크로, 캐시 파일은 작업 디렉터리에)
+    app_link = workdir / "app"
+    if not app_link.exists():
+        app_link.symlink_to(REPO_ROOT / "app", target_is_directory=True)
+    cache_file = REPO_ROOT / "nutrition_cache.pkl"
+    if not options.cold_cache and cache_file.exists():
+        shutil.copy(cache_file, workdir / "nutrition_cache.pkl")
+
+    stub_port, app_port = _free_port(), _free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")])),
+        "DB_URL": f"sqlite+aiosqlite:///{db_path}",
+        "GEMINI_API_BASE": f"{stub_url}/v1beta",
+        "GEMINI_API_KEY": "loadtest",
+        "LLM_STORE_MODE": "off",
+        "ALLOWED_IMAGE_DIR": str(workdir / "uploads"),
+        "LOG_LEVEL": env.get("LOG_LEVEL", "WARNING"),
+    })
+    env.pop("PROFILE_TOKEN", None)
+
+    stub = server = None
+    try:
+        stub = subprocess.Popen([sys.executable, "-m", "loadtest", "stub", "--port", str(stub_port), *options.stub_args],
+                                cwd=workdir, env=env)
+        _wait_ready(f"{stub_url}/stats", stub, 30)
+        # 추천 워크로드가 읽는 회원 요약 테이블을 시드 데이터로 채움
+        subprocess.run([sys.executable, "-m", "app.services.health_summary_service", "rebuild"],
+                       cwd=workdir, env=env, check=True)
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", str(REPO_ROOT), "--host", "127.0.0.1",
+             "--port", str(app_port), "--workers", str(options.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=workdir, env=env,
+        )
+        _wait_ready(f"{app_url}/", server, options.startup_timeout)
+        yield app_url, stub_url, WorkloadContext(members=options.members, image_path=image_path)
+    finally:
+        _stop(server)
+        _stop(stub)
@@ -0,0 +1,128 @@
+"""
+부하 테스트용 SQLite DB와 식단 이미지 생성.
+
+운영 MySQL의 tb_members / tb_food_record / tb_predict_record / challenge 중 서비스가 읽는 컬럼만 같은 이름으로 만들고,
+회원 members명에 대해 days일치 음식 기록(하루 records_per_day건), 예측 기록, 진행 중 챌린지(일부 회원)를 채웁니다.
+같은 seed면 같은 데이터가 만들어지므로 변경 전후 결과를 같은 입력으로 비교할 수 있습니다.
+"""
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict
+
+from loadtest.gemini_stub import FOODS
+
+SCHEMA = """
+DROP TABLE IF EXISTS tb_members;
+DROP TABLE IF EXISTS tb_food_record;
+DROP TABLE IF EXISTS tb_predict_record;
+DROP TABLE IF EXISTS challenge;
+CREATE TABLE tb_members (
+    id INTEGER PRIMARY KEY,
+    age INTEGER,
+    gender TEXT,
+    height REAL,
+    weight REAL,
+    activity_level TEXT
+);
+CREATE TABLE tb_food_record (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    member_id INTEGER NOT NULL,
+    food_name TEXT,
+    meal_time TEXT,
+    consumed_date DATETIME NOT NULL,
+    calories REAL, protein REAL, carbohydrates REAL, fat REAL,
+    fiber REAL, sugar REAL, water REAL, sodium REAL
+);
+CREATE INDEX idx_food_record_member_consumed ON tb_food_record (member_id, consumed_date);
+CREATE TABLE tb_predict_record (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    member_id INTEGER NOT NULL,
+    diabetes_proba REAL,
+    hypertension_proba REAL,
+    cvd_proba REAL,
+    reg_date DATETIME NOT NULL
+);
+CREATE INDEX idx_predict_record_member_reg ON tb_predict_record (member_id, reg_date);
+CREATE TABLE challenge (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    member_id INTEGER NOT NULL,
+    status TEXT,
+    goal TEXT,
+    target_weight REAL,
+    end_date DATE
+);
+"""
+
+MEAL_TIMES = ["BREAKFAST", "LUNCH", "DINNER", "SNACK"]
+ACTIVITY_LEVELS = ["sedentary", "lightly_active", "moderately_active", "very_active"]
+GENDERS = ["male", "female"]
+
+
+def seed_database(path: str, members: int = 200, days: int = 30, records_per_day: int = 4,
+                  seed: int = 42) -> Dict[str, int]:
+    """SQLite DB를 새로 만들고 테이블별 행 수 반환"""
+    rng = random.Random(seed)
+    today = date.today()
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    try:
+        connection.executescript(SCHEMA)
+        member_rows, food_rows, predict_rows, challenge_rows = [], [], [], []
+        for member_id in range(1, members + 1):
+            gender = rng.choice(GENDERS)
+            height = rng.uniform(155, 185) if gender == "male" else rng.uniform(150, 175)
+            weight = rng.uniform(50, 95)
+            member_rows.append((member_id, rng.randint(20, 70), gender, round(height, 1), round(weight, 1),
+                                rng.choice(ACTIVITY_LEVELS)))
+            for offset in range(days):
+                day = today - timedelta(days=offset)
+                for index in range(records_per_day):
+                    consumed = datetime(day.year, day.month, day.day, 7 + index * 4, rng.randint(0, 59))
+                    food_rows.append((
+                        member_id, rng.choice(FOODS), MEAL_TIMES[index % len(MEAL_TIMES)], consumed.isoformat(sep=" "),
+                        round(rng.uniform(150, 800), 1), round(rng.uniform(5, 40), 1), round(rng.uniform(20, 120), 1),
+                        round(rng.uniform(3, 35), 1), round(rng.uniform(0, 10), 1), round(rng.uniform(0, 30), 1),
+                        round(rng.uniform(50, 500), 1), round(rng.uniform(100, 2000), 1),
+                    ))
+            for offset in range(0, days, 7):
+                reg_date = datetime.combine(today - timedelta(days=offset), datetime.min.time()) + timedelta(hours=9)
+                predict_rows.append((member_id, round(rng.random(), 3), round(rng.random(), 3), round(rng.random(), 3),
+                                     reg_date.isoformat(sep=" ")))
+            if rng.random() < 0.7:
+                challenge_rows.append((member_id, "ONGOING", "감량", round(weight - rng.uniform(2, 8), 1),
+                                       (today + timedelta(days=rng.randint(30, 120))).isoformat()))
+
+        connection.executemany("INSERT INTO tb_members VALUES (?, ?, ?, ?, ?, ?)", member_rows)
+        connection.executemany(
+            "INSERT INTO tb_food_record (member_id, food_name, meal_time, consumed_date, calories, protein, "
+            "carbohydrates, fat, fiber, sugar, water, sodium) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            food_rows,
+        )
+        connection.executemany(
+            "INSERT INTO tb_predict_record (member_id, diabetes_proba, hypertension_proba, cvd_proba, reg_date) "
+            "VALUES (?, ?, ?, ?, ?)",
+            predict_rows,
+        )
+        connection.executemany(
+            "INSERT INTO challenge (member_id, status, goal, target_weight, end_date) VALUES (?, ?, ?, ?, ?)",
+            challenge_rows,
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    return {"tb_members": len(member_rows), "tb_food_record": len(food_rows),
+            "tb_predict_record": len(predict_rows), "challenge": len(challenge_rows)}
+
+
+def create_meal_image(directory: str, name: str = "meal.jpg") -> str:
+    """이미지 분석 워크로드용 식단 사진 대용 이미지 (스텁은 내용을 보지 않으므로 크기만 실제 업로드와 비슷하게)"""
+    from PIL import Image
+
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    path = Path(directory) / name
+    rng = random.Random(0)
+    image = Image.frombytes("RGB", (1024, 768), rng.randbytes(1024 * 768 * 3))
+    image.save(path, "JPEG", quality=85)
+    return str(path.resolve())
@@ -0,0 +1,114 @@
+"""
+라우터별 부하 테스트 요청 시나리오.
+
+각 워크로드는 (rng, context) -> WorkloadRequest 함수입니다. context에는 시드한 회원 수와 식단 이미지 경로가 들어갑니다.
+DEFAULT_MIX는 실제 트래픽에 가깝게 잡은 기본 비율이고, --mix로 바꿀 수 있습니다.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from loadtest.gemini_stub import FOODS
+
+UNITS = [("g", 100, 400), ("개", 1, 3), ("인분", 1, 2), ("그릇", 1, 2)]
+
+
+@dataclass
+class WorkloadContext:
+    members: int
+    image_path: str
+
+
+@dataclass
+class WorkloadRequest:
+    method: str
+    path: str
+    json: Optional[Dict[str, Any]] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+def _member(rng: random.Random, context: WorkloadContext) -> int:
+    return rng.randint(1, context.members)
+
+
+def predict_health(rng: random.Random, context: WorkloadContext) -> WorkloadRequest:
+    height = rng.uniform(150, 190)
+    return WorkloadRequest("POST", "/predict/health", json={
+        "memberId": _member(rng, context),
+        "age": rng.randint(20, 75), "gender": rng.randint(0, 1),
+        "height": round(height, 1), "weight": round(rng.uniform(45, 110), 1),
+        "historyDiabetes": rng.randint(0, 1), "historyHypertension": rng.randint(0, 1),
+        "historyCardiovascular": rng.randint(0, 1), "smokeDaily": rng.randint(0, 20),
+        "drinkWeekly": rng.randint(0, 7), "exerciseWeekly": rng.randint(0, 7),
+        "dailyCarbohydrate": round(rng.uniform(150, 400), 1), "dailySugar": round(rng.uniform(10, 80), 1),
+        "dailyFat": round(rng.uniform(30, 100), 1), "dailySodium": round(rng.uniform(1500, 5000), 1),
+        "dailyFibrin": round(rng.uniform(5, 35), 1), "dailyWater": round(rng.uniform(500, 2500), 1),
+    })
+
+
+def diet_analysis(rng: random.Random, context: WorkloadContext) -> WorkloadRequest:
+    foods = rng.sample(FOODS, rng.randint(1, 3))
+    return WorkloadRequest("POST", "/analysis/diet", json={"message": f"오늘 점심에 {'이랑 '.join(foods)} 먹었어"})
+
+
+def meal_image(rng: random.Random, context: WorkloadContext) -> WorkloadRequest:
+    return WorkloadRequest("POST", "/analyze/image", json={"file_path": context.image_path})
+
+
+def diet_recommendation(rng: random.Random, context: WorkloadContext) -> WorkloadRequest:
+    return WorkloadRequest("POST", "/diet/recommendation", json={"id": _member(rng, context)})
+
+
+def goal_nutrition(rng: random.Random, context: WorkloadContext) -> WorkloadRequest:
+    end_date = date.today() + timedelta(days=rng.randint(30, 180))
+    return WorkloadRequest("POST", "/diet/goal-nutrition", json={
+        "id": _member(rng, context), "target_weight": round(rng.uniform(50, 80), 1), "end_date": end_date.isoformat(),
+    })
+
+
+def nutrition_calculate(rng: random.Random, context: WorkloadContext) -> WorkloadRequest:
+    food_list = []
+    for food in rng.sample(FOODS, rng.randint(1, 5)):
+        unit, low, high = rng.choice(UNITS)
+        food_list.append({"name": food, "amount": rng.randint(low, high), "unit": unit})
+    return WorkloadRequest("POST", "/nutrition/calculate", json={"foodList": food_list})
+
+
+def nutrition_daily(rng: random.Random, context: WorkloadContext) -> WorkloadRequest:
+    start = date.today() - timedelta(days=rng.choice([7, 30]))
+    return WorkloadRequest("GET", "/nutrition/daily", params={"memberId": _member(rng, context), "start": start.isoformat()})
+
+
+WORKLOADS: Dict[str, Callable[[random.Random, WorkloadContext], WorkloadRequest]] = {
+    "predict_health": predict_health,
+    "diet_analysis": diet_analysis,
+    "meal_image": meal_image,
+    "diet_recommendation": diet_recommendation,
+    "goal_nutrition": goal_nutrition,
+    "nutrition_calculate": nutrition_calculate,
+    "nutrition_daily": nutrition_daily,
+}
+
+DEFAULT_MIX: Dict[str, float] = {
+    "predict_health": 2,
+    "diet_analysis": 3,
+    "meal_image": 1,
+    "diet_recommendation": 2,
+    "goal_nutrition": 1,
+    "nutrition_calculate": 2,
+    "nutrition_daily": 2,
+}
+
+
+def parse_mix(value: Optional[str]) -> Dict[str, float]:
+    """"diet_analysis=3,predict_health=1" -> 비율. 이름만 쓰면 비율 1. 비어 있으면 DEFAULT_MIX"""
+    if not value:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in WORKLOADS:
+            raise ValueError(f"알 수 없는 워크로드: {name} (가능: {', '.join(WORKLOADS)})")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
@@ -1,20 +1,71 @@
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import hPrediction_router, diet_recommendation_router
 from app.routers import diet_analysis_router
 from app.routers import meal_analysis_router
 from app.routers import nutrition_calculate_router
+from app.routers import nutrition_aggregate_router
+from app.routers import health_summary_router
+from app.routers import metrics_router
+from app.routers import profiling_router
+from app.core.log import RequestIdMiddleware, shutdown_logging
+from app.core.metrics import MetricsMiddleware, ServerTimingMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.services.analysis_job_service import get_job_queue
+from app.services.health_summary_service import ensure_summary_tables
+from app.services.recommendation_store import ensure_recommendation_table
+from app.services.gemini_gateway import gemini_gateway
+from app.services.llm_quota import quota_sync
 from dotenv import load_dotenv
 
 
 load_dotenv(dotenv_path=".env")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 예측 모델 (NumPy로 import 시 로드되지 않은 경우에만 워커 프로세스 안에서 TensorFlow로 로드)
+    hPrediction_router.load_prediction_models()
+    # 회원 건강 요약 테이블 준비
+    await ensure_summary_tables()
+    # 야간 사전 계산 추천 테이블 준비
+    await ensure_recommendation_table()
+    # 야간 배치가 임대한 Gemini 쿼터를 이 워커 쿼터에서 빼기
+    await quota_sync.start()
+    # 이미지 분석 작업 워커 시작/종료
+    job_queue = get_job_queue()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await quota_sync.stop()
+    await diet_analysis_router.flush_diet_analysis_cache()
+    await gemini_gateway.aclose()
+    # 큐에 남은 로그 기록 내보내기
+    shutdown_logging()
+
 app = FastAPI(
     title="Health Prediction API",
     description="건강 상태(당뇨, 고혈압, 심혈관질환) 예측 서비스",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # 응답 직렬화는 orjson으로 (표준 json 대비 요청당 직렬화 CPU 절감, app/services/llm_json.py bench 참고)
+    default_response_class=ORJSONResponse,
 )
 
+# 요청 단위 프로파일링 (PROFILE_TOKEN 설정 시, 프로파일 ID에 요청 ID를 쓰므로 RequestIdMiddleware 안쪽)
+app.add_middleware(ProfilingMiddleware)
+
+# 요청 ID (로그 상관관계 + X-Request-ID 응답 헤더)
+app.add_middleware(RequestIdMiddleware)
+
+# 단계별 시간 Server-Timing 응답 헤더
+app.add_middleware(ServerTimingMiddleware)
+
+# 라우트별 요청 시간 (/metrics)
+app.add_middleware(MetricsMiddleware)
+
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
@@ -30,11 +81,16 @@ app.include_router(diet_analysis_router.router)
 app.include_router(meal_analysis_router.router)
 app.include_router(diet_recommendation_router.router)
 app.include_router(nutrition_calculate_router.router)
+app.include_router(nutrition_aggregate_router.router)
+app.include_router(health_summary_router.router)
+app.include_router(metrics_router.router)
+app.include_router(profiling_router.router)
 
 @app.get("/")
 async def root():
     return {"message": "Health Prediction API Running"}
 
 if __name__ == "__main__":
+    # 개발용. 운영은 모델을 한 번만 로드하고 워커를 fork하는 python -m app.core.prefork serve --workers N
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
     
@@ -0,0 +1,120 @@
+"""
+테스트 공통 설정.
+
+앱 모듈은 import 시점에 DB_URL로 엔진을 만들므로, 어떤 app 모듈보다 먼저 환경 변수를 SQLite(aiosqlite) 임시 파일로 맞춥니다.
+비동기 테스트는 anyio 플러그인(@pytest.mark.anyio)으로 실행합니다.
+"""
+import os
+import sqlite3
+import tempfile
+from datetime import date, datetime, timedelta
+
+import pytest
+
+TEST_DIR = tempfile.mkdtemp(prefix="balancelab-test-")
+TEST_DB_PATH = os.path.join(TEST_DIR, "test.db")
+
+os.environ["DB_URL"] = f"sqlite+aiosqlite:///{TEST_DB_PATH}"
+os.environ["LLM_STORE_MODE"] = "off"
+os.environ.setdefault("GEMINI_API_KEY", "test")
+os.environ.pop("PROFILE_TOKEN", None)
+
+SOURCE_SCHEMA = """
+DROP TABLE IF EXISTS tb_members;
+DROP TABLE IF EXISTS tb_food_record;
+DROP TABLE IF EXISTS tb_predict_record;
+DROP TABLE IF EXISTS challenge;
+DROP TABLE IF EXISTS tb_member_health_summary;
+DROP TABLE IF EXISTS tb_member_daily_nutrition;
+CREATE TABLE tb_members (
+    id INTEGER PRIMARY KEY, age INTEGER, gender TEXT, height REAL, weight REAL, activity_level TEXT
+);
+CREATE TABLE tb_food_record (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, member_id INTEGER NOT NULL, food_name TEXT, meal_time TEXT,
+    consumed_date DATETIME NOT NULL, calories REAL, protein REAL, carbohydrates REAL, fat REAL,
+    fiber REAL, sugar REAL, water REAL, sodium REAL
+);
+CREATE TABLE tb_predict_record (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, member_id INTEGER NOT NULL, diabetes_proba REAL,
+    hypertension_proba REAL, cvd_proba REAL, reg_date DATETIME NOT NULL
+);
+CREATE TABLE challenge (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, member_id INTEGER NOT NULL, status TEXT, goal TEXT,
+    target_weight REAL, end_date DATE
+);
+"""
+
+
+def food_row(member_id: int, food_name: str, meal_time: str, consumed: datetime, calories: float):
+    """tb_food_record 행 (칼로리 외 영양소는 칼로리에 비례하는 고정 값)"""
+    return (member_id, food_name, meal_time, consumed.isoformat(sep=" "), calories, calories / 20, calories / 8,
+            calories / 30, 1.0, 2.0, 100.0, calories * 2)
+
+
+def insert_food(db_path: str, member_id: int, food_name: str, consumed: datetime, calories: float):
+    """백엔드가 tb_food_record에 기록을 추가한 상태를 흉내 (훅은 원본 저장 후 호출됨)"""
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute(
+            "INSERT INTO tb_food_record (member_id, food_name, meal_time, consumed_date, calories, protein, "
+            "carbohydrates, fat, fiber, sugar, water, sodium) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            food_row(member_id, food_name, "DINNER", consumed, calories),
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def engine():
+    """테스트마다 엔진 풀을 비워 이벤트 루프 간에 커넥션이 섞이지 않도록"""
+    from app.core.database import engine as shared_engine
+
+    yield shared_engine
+    await shared_engine.dispose()
+
+
+@pytest.fixture
+def source_db(engine):
+    """
+    회원 1: 예측 2건(최신 0.3/0.4/0.5), 최근 3일 음식 기록 4건(김밥 2, 라면 1, 샐러드 1), 진행 중 챌린지
+    회원 2: 기록 없음
+    """
+    today = date.today()
+    now = datetime.combine(today, datetime.min.time())
+    connection = sqlite3.connect(TEST_DB_PATH)
+    try:
+        connection.executescript(SOURCE_SCHEMA)
+        connection.executemany("INSERT INTO tb_members VALUES (?, ?, ?, ?, ?, ?)", [
+            (1, 35, "male", 175.0, 80.0, "moderately_active"),
+            (2, 28, "female", 162.0, 55.0, "sedentary"),
+        ])
+        connection.executemany(
+            "INSERT INTO tb_predict_record (member_id, diabetes_proba, hypertension_proba, cvd_proba, reg_date) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(1, 0.1, 0.2, 0.3, (now - timedelta(days=10)).isoformat(sep=" ")),
+             (1, 0.3, 0.4, 0.5, (now - timedelta(days=1)).isoformat(sep=" "))],
+        )
+        connection.executemany(
+            "INSERT INTO tb_food_record (member_id, food_name, meal_time, consumed_date, calories, protein, "
+            "carbohydrates, fat, fiber, sugar, water, sodium) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [food_row(1, "김밥", "LUNCH", now - timedelta(days=2, hours=-12), 400.0),
+             food_row(1, "라면", "DINNER", now - timedelta(days=2, hours=-19), 500.0),
+             food_row(1, "김밥", "LUNCH", now - timedelta(days=1, hours=-12), 400.0),
+             food_row(1, "샐러드", "BREAKFAST", now + timedelta(hours=8), 200.0),
+             # 요약 구간(SUMMARY_WINDOW_DAYS) 밖의 기록은 집계에서 빠짐
+             food_row(1, "피자", "DINNER", now - timedelta(days=30), 1000.0)],
+        )
+        connection.execute(
+            "INSERT INTO challenge (member_id, status, goal, target_weight, end_date) VALUES (?, ?, ?, ?, ?)",
+            (1, "ONGOING", "감량", 72.0, (today + timedelta(days=60)).isoformat()),
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    return TEST_DB_PATH
@@ -0,0 +1,112 @@
+"""analysis_job_service 작업 큐: 가져오기, 소유 기한 재등록, long-poll"""
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from app.services import analysis_job_service as service
+from app.services.analysis_job_service import (
+    STATUS_DONE, STATUS_PENDING, STATUS_RUNNING, AnalysisJobQueue, AnalysisJobStore,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+def test_claim_next_is_fifo_and_exclusive(db_path):
+    # 같은 DB 파일을 쓰는 두 프로세스의 저장소
+    first, second = AnalysisJobStore(db_path), AnalysisJobStore(db_path)
+    submitted = [first.submit(f"/images/{index}.jpg")["job_id"] for index in range(3)]
+
+    claimed = [first.claim_next("a"), second.claim_next("b"), first.claim_next("a")]
+    assert [job["job_id"] for job in claimed] == submitted
+    assert [job["owner"] for job in claimed] == ["a", "b", "a"]
+    assert all(job["status"] == STATUS_RUNNING for job in claimed)
+    assert second.claim_next("b") is None
+
+
+def test_old_schema_is_migrated_once(db_path):
+    # owner_pid 시절의 테이블을 여러 워커가 함께 열어도 컬럼은 한 번만 추가
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE analysis_job (job_id TEXT PRIMARY KEY, status TEXT NOT NULL, file_path TEXT NOT NULL, "
+        "submitted_at REAL NOT NULL, started_at REAL, finished_at REAL, result TEXT, error TEXT, "
+        "error_status INTEGER, owner_pid INTEGER)"
+    )
+    connection.close()
+
+    first, second = AnalysisJobStore(db_path), AnalysisJobStore(db_path)
+    job_id = first.submit("/images/old.jpg")["job_id"]
+    assert second.claim_next("worker")["job_id"] == job_id
+
+
+def test_requeue_only_expired_leases(db_path):
+    store = AnalysisJobStore(db_path)
+    live = store.submit("/images/live.jpg")["job_id"]
+    orphaned = store.submit("/images/orphaned.jpg")["job_id"]
+    store.claim_next("alive", lease_seconds=60)
+    # 같은 PID로 재시작된 프로세스라도 소유 기한만 보고 판단
+    store.claim_next("crashed", lease_seconds=-1)
+
+    assert store.requeue_expired() == 1
+    assert store.get(live)["status"] == STATUS_RUNNING
+    job = store.get(orphaned)
+    assert job["status"] == STATUS_PENDING
+    assert job["owner"] is None and job["lease_until"] is None
+    assert store.claim_next("restarted")["job_id"] == orphaned
+
+
+def test_renew_leases_keeps_jobs_owned(db_path):
+    store = AnalysisJobStore(db_path)
+    job_id = store.submit("/images/slow.jpg")["job_id"]
+    store.claim_next("worker", lease_seconds=-1)
+
+    assert store.renew_leases("other", lease_seconds=60) == 0
+    assert store.renew_leases("worker", lease_seconds=60) == 1
+    assert store.get(job_id)["lease_until"] > time.time()
+    assert store.requeue_expired() == 0
+
+
+async def test_queue_processes_and_long_polls(db_path, monkeypatch):
+    release = asyncio.Event()
+
+    async def analyze_meal(file_path, on_item=None):
+        await release.wait()
+        return {"file": file_path}
+
+    monkeypatch.setattr(service, "analyze_meal", analyze_meal)
+    queue = AnalysisJobQueue(AnalysisJobStore(db_path), workers=1, lease_seconds=60)
+    await queue.start()
+    try:
+        job_id = queue.store.submit("/images/meal.jpg")["job_id"]
+        queue._wakeup.set()
+
+        job = await queue.get(job_id, wait=0.2)
+        assert job["status"] == STATUS_RUNNING
+        assert job["owner"] == queue.owner
+
+        asyncio.get_running_loop().call_later(0.1, release.set)
+        start = time.monotonic()
+        job = await queue.get(job_id, wait=5)
+        assert time.monotonic() - start < 2
+        assert job["status"] == STATUS_DONE
+        assert job["result"] == {"file": "/images/meal.jpg"}
+    finally:
+        await queue.stop()
+
+
+async def test_long_poll_sees_other_process_completion(db_path):
+    queue = AnalysisJobQueue(AnalysisJobStore(db_path), workers=1)
+    other = AnalysisJobStore(db_path)
+    job_id = other.submit("/images/meal.jpg")["job_id"]
+    other.claim_next("other")
+
+    asyncio.get_running_loop().call_later(0.2, other.complete, job_id, {"ok": True})
+    job = await queue.get(job_id, wait=5)
+    assert job["status"] == STATUS_DONE
+    assert job["result"] == {"ok": True}
@@ -0,0 +1,54 @@
+"""CircuitBreaker 호출 시간 제한: 쿼터 슬롯을 받은 뒤부터 잼"""
+import asyncio
+
+import pytest
+
+from app.services.circuit_breaker import STATE_CLOSED, STATE_OPEN, CircuitBreaker, mark_call_started
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_queue_wait_is_not_counted():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+
+    async def queued_then_fast():
+        # 스케줄러 대기열에서 제한 시간보다 오래 기다린 뒤 빠르게 응답
+        await asyncio.sleep(0.2)
+        mark_call_started()
+        await asyncio.sleep(0.01)
+        return "OK"
+
+    assert await breaker.call(queued_then_fast, call_timeout=0.1, slow_call_seconds=0.05) == "OK"
+    assert breaker.state == STATE_CLOSED
+
+
+async def test_timeout_after_start_opens_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    cancelled = []
+
+    async def hangs():
+        mark_call_started()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call(hangs, call_timeout=0.05, slow_call_seconds=0.05)
+    assert cancelled == [True]
+    assert breaker.state == STATE_OPEN
+
+
+async def test_slow_success_counts_as_failure():
+    breaker = CircuitBreaker("test", failure_threshold=2)
+
+    async def slow():
+        mark_call_started()
+        await asyncio.sleep(0.05)
+        return "OK"
+
+    assert await breaker.call(slow, call_timeout=1.0, slow_call_seconds=0.01) == "OK"
+    assert breaker.consecutive_failures == 1
+    assert await breaker.call(slow, call_timeout=1.0, slow_call_seconds=1.0) == "OK"
+    assert breaker.consecutive_failures == 0
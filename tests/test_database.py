@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.database import execute, fetch_all, fetch_one, get_query_stats
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_fetch_one_maps_row_to_plain_dict(source_db):
+    row = await fetch_one("test_member", text("SELECT id, age, gender, height FROM tb_members WHERE id = :id"), {"id": 1})
+
+    assert type(row) is dict
+    assert row == {"id": 1, "age": 35, "gender": "male", "height": 175.0}
+
+
+async def test_fetch_one_returns_none_without_rows(source_db):
+    assert await fetch_one("test_member", text("SELECT id FROM tb_members WHERE id = :id"), {"id": 999}) is None
+
+
+async def test_fetch_all_maps_every_row(source_db):
+    rows = await fetch_all("test_members", text("SELECT id, activity_level FROM tb_members ORDER BY id"))
+
+    assert rows == [{"id": 1, "activity_level": "moderately_active"}, {"id": 2, "activity_level": "sedentary"}]
+    assert all(type(row) is dict for row in rows)
+
+
+async def test_execute_runs_list_params_as_executemany_and_skips_empty(source_db):
+    insert = text("INSERT INTO tb_members (id, age) VALUES (:id, :age)")
+    await execute("test_insert", (insert, [{"id": 10, "age": 20}, {"id": 11, "age": 21}]), (insert, []))
+
+    rows = await fetch_all("test_members", text("SELECT id, age FROM tb_members WHERE id >= 10 ORDER BY id"))
+    assert rows == [{"id": 10, "age": 20}, {"id": 11, "age": 21}]
+
+
+async def test_execute_rolls_back_whole_transaction_on_error(source_db):
+    insert = text("INSERT INTO tb_members (id, age) VALUES (:id, :age)")
+    with pytest.raises(Exception):
+        await execute("test_insert", (insert, {"id": 20, "age": 30}), (insert, {"id": 20, "age": 31}))
+
+    assert await fetch_one("test_member", text("SELECT id FROM tb_members WHERE id = 20")) is None
+
+
+async def test_query_stats_count_round_trips(source_db):
+    before = get_query_stats().get("test_stats", {}).get("count", 0)
+    for _ in range(3):
+        await fetch_one("test_stats", text("SELECT 1 AS one"))
+
+    stats = get_query_stats()["test_stats"]
+    assert stats["count"] == before + 3
+    assert stats["max_ms"] >= stats["avg_ms"] >= 0
@@ -0,0 +1,65 @@
+"""dense_model: Keras .h5 Dense 모델 NumPy 추론"""
+import json
+
+import numpy as np
+import pytest
+
+h5py = pytest.importorskip("h5py")
+
+from app.services.dense_model import UnsupportedModelError, load_dense_model  # noqa: E402
+
+
+def _write_model(path, layers, weights):
+    """Keras가 저장하는 .h5 구조(model_config + model_weights/<층>/weight_names)를 흉내"""
+    with h5py.File(path, "w") as f:
+        f.attrs["model_config"] = json.dumps({"class_name": "Sequential", "config": {"layers": layers}})
+        group = f.create_group("model_weights")
+        for name, arrays in weights.items():
+            layer = group.create_group(name)
+            names = [f"sequential/{name}/{kind}" for kind in ("kernel", "bias")[:len(arrays)]]
+            layer.attrs["weight_names"] = [n.encode() for n in names]
+            for weight_name, array in zip(names, arrays):
+                layer.create_dataset(weight_name, data=array)
+
+
+def _dense(name, units, activation):
+    return {"class_name": "Dense", "config": {"name": name, "units": units, "activation": activation, "use_bias": True}}
+
+
+def test_forward_pass_matches_numpy(tmp_path):
+    rng = np.random.default_rng(0)
+    k1, b1 = rng.normal(size=(3, 4)).astype(np.float32), rng.normal(size=4).astype(np.float32)
+    k2, b2 = rng.normal(size=(4, 1)).astype(np.float32), rng.normal(size=1).astype(np.float32)
+    path = tmp_path / "model.h5"
+    _write_model(path, [
+        {"class_name": "InputLayer", "config": {"name": "input", "batch_shape": [None, 3]}},
+        _dense("dense_1", 4, "relu"),
+        {"class_name": "Dropout", "config": {"name": "dropout", "rate": 0.5}},
+        _dense("dense_2", 1, "sigmoid"),
+    ], {"dense_1": (k1, b1), "dense_2": (k2, b2)})
+
+    x = rng.normal(size=(5, 3))
+    expected = 1 / (1 + np.exp(-(np.maximum(x @ k1 + b1, 0) @ k2 + b2)))
+    model = load_dense_model(str(path))
+    output = model.predict(x, verbose=0)
+    assert output.shape == (5, 1) and output.dtype == np.float32
+    np.testing.assert_allclose(output, expected, rtol=1e-5)
+    assert not model.layers[0][0].flags.writeable
+
+    with pytest.raises(ValueError):
+        model.predict(np.zeros((1, 4)))
+
+
+def test_unsupported_layer(tmp_path):
+    path = tmp_path / "model.h5"
+    _write_model(path, [{"class_name": "BatchNormalization", "config": {"name": "bn"}}], {})
+    with pytest.raises(UnsupportedModelError):
+        load_dense_model(str(path))
+
+
+@pytest.mark.parametrize("name", ["diabetes", "hypertension", "cardiovascular"])
+def test_prediction_models_load_without_tensorflow(name):
+    model = load_dense_model(f"app/model/{name}_predict.h5")
+    output = model.predict(np.zeros((2, 15)), verbose=0)
+    assert output.shape == (2, 1)
+    assert np.all((output >= 0) & (output <= 1))
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import pickle
+
+import pytest
+
+from app.services import diet_analysis_service
+from app.services.diet_analysis_service import DietAnalysisService
+from app.services.nutrient_vector import NutrientVector, SCHEMA_DIET_ANALYSIS
+
+pytestmark = pytest.mark.anyio
+
+
+def _vector(protein: float) -> NutrientVector:
+    return NutrientVector.from_mapping({"protein": protein}, SCHEMA_DIET_ANALYSIS)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(diet_analysis_service, "NUTRITION_CACHE_SAVE_DELAY", 0.05)
+    return DietAnalysisService(cache_file=str(tmp_path / "nutrition_cache.pkl"))
+
+
+async def test_schedule_save_debounces_writes_off_the_event_loop(service, monkeypatch):
+    writes = []
+    original = service.save_cache
+
+    def save_cache(cache=None):
+        writes.append(dict(cache))
+        original(cache)
+
+    monkeypatch.setattr(service, "save_cache", save_cache)
+    service.nutrition_cache[service.get_cache_key("김밥")] = _vector(10)
+    service.schedule_save()
+    service.nutrition_cache[service.get_cache_key("라면")] = _vector(8)
+    service.schedule_save()
+    await asyncio.sleep(0.2)
+
+    assert len(writes) == 1
+    with open(service.cache_file, "rb") as f:
+        assert set(pickle.load(f)) == {service.get_cache_key("김밥"), service.get_cache_key("라면")}
+
+
+async def test_save_keeps_entries_written_by_other_workers(service, tmp_path):
+    other_key = service.get_cache_key("비빔밥")
+    with open(service.cache_file, "wb") as f:
+        pickle.dump({other_key: _vector(12)}, f)
+
+    service.nutrition_cache[service.get_cache_key("김밥")] = _vector(10)
+    service.schedule_save()
+    await service.flush_cache()
+
+    with open(service.cache_file, "rb") as f:
+        saved = pickle.load(f)
+    assert set(saved) == {other_key, service.get_cache_key("김밥")}
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+async def test_flush_without_pending_save_does_nothing(service):
+    await service.flush_cache()
+
+    assert not os.path.exists(service.cache_file)
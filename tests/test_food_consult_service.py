@@ -0,0 +1,52 @@
+import pytest
+
+from app.services.food_consult_service import get_user_health_data
+from app.services.health_summary_service import ensure_summary_tables
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def summary_db(source_db):
+    await ensure_summary_tables()
+    return source_db
+
+
+async def test_get_user_health_data_maps_member_prediction_and_challenge(summary_db):
+    data = await get_user_health_data(1)
+
+    assert {key: data[key] for key in ["id", "age", "gender", "height", "weight", "activity_level"]} == {
+        "id": 1, "age": 35, "gender": "male", "height": 175.0, "weight": 80.0, "activity_level": "moderately_active",
+    }
+    # 가장 최근 예측 기록
+    assert (data["diabetes_proba"], data["hypertension_proba"], data["cvd_proba"]) == (0.3, 0.4, 0.5)
+    assert data["goal"] == "감량"
+    assert data["target_weight"] == 72.0
+    assert data["end_date"] is not None
+
+
+async def test_get_user_health_data_aggregates_recent_week(summary_db):
+    data = await get_user_health_data(1)
+
+    # 구간 밖의 피자는 빠지고, 기록이 있는 3일 평균
+    assert data["recent_food_counts"] == {"김밥": 2, "라면": 1, "샐러드": 1}
+    assert set(data["recent_foods"].split(",")) == {"김밥", "라면", "샐러드"}
+    assert set(data["meal_time"].split(",")) == {"LUNCH", "DINNER", "BREAKFAST"}
+    assert data["avg_calories"] == pytest.approx((400 + 500 + 400 + 200) / 3)
+    assert data["avg_sodium"] == pytest.approx((400 + 500 + 400 + 200) * 2 / 3)
+
+
+async def test_get_user_health_data_without_records_uses_defaults(summary_db):
+    data = await get_user_health_data(2)
+
+    assert (data["diabetes_proba"], data["hypertension_proba"], data["cvd_proba"]) == (0, 0, 0)
+    assert data["recent_foods"] is None
+    assert data["recent_food_counts"] == {}
+    assert data["avg_calories"] is None
+    assert data["goal"] is None
+
+
+async def test_get_user_health_data_unknown_member_returns_error(summary_db):
+    data = await get_user_health_data(999)
+
+    assert data == {"error": "사용자 데이터를 찾을 수 없습니다."}
@@ -0,0 +1,256 @@
+"""GeminiGateway 재시도/백오프/타임아웃/동시 실행 상한 (loadtest 스텁 서버 상대)"""
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from app.services import gemini_gateway as gateway_module
+from app.services.gemini_gateway import GeminiError, GeminiGateway
+from app.services.llm_latency import LatencyTracker
+from app.services.llm_response_store import LLMResponseStore
+from app.services.llm_scheduler import LLMScheduler
+from loadtest.gemini_stub import StubConfig, create_app
+
+pytestmark = pytest.mark.anyio
+
+
+class StubServer:
+    """스텁 앱을 별도 스레드의 uvicorn으로 띄움"""
+
+    def __init__(self, config: StubConfig):
+        self.app = create_app(config)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.bind(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self._sock.getsockname()[1]}"
+        self._server = uvicorn.Server(uvicorn.Config(self.app, log_level="warning", access_log=False))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._sock]}, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("스텁 서버 시작 실패")
+            time.sleep(0.01)
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(10)
+        self._sock.close()
+
+    @property
+    def requests(self) -> int:
+        return self.app.state.requests
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**options) -> StubServer:
+        options.setdefault("latency_ms", 0)
+        options.setdefault("jitter_ms", 0)
+        server = StubServer(StubConfig(**options))
+        server.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    """테스트마다 새 스케줄러/지연 기록을 쓰고 백오프를 짧게"""
+    monkeypatch.setattr(gateway_module, "llm_scheduler", LLMScheduler())
+    monkeypatch.setattr(gateway_module, "latency_tracker", LatencyTracker())
+    monkeypatch.setattr(gateway_module, "GEMINI_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(gateway_module, "GEMINI_BACKOFF_MAX", 0.05)
+
+
+@pytest.fixture
+async def make_gateway():
+    gateways = []
+
+    def make(server: StubServer, **options) -> GeminiGateway:
+        gateway = GeminiGateway(api_key="test", api_base=f"{server.url}/v1beta", **options)
+        gateways.append(gateway)
+        return gateway
+
+    yield make
+    for gateway in gateways:
+        await gateway.aclose()
+
+
+async def test_retries_5xx_then_succeeds(stub, make_gateway):
+    server = stub(fail_first=2, fail_status=503)
+    gateway = make_gateway(server, max_retries=3)
+
+    assert await gateway.generate_text("안녕") == "OK"
+    assert server.requests == 3
+
+
+async def test_gives_up_after_max_retries(stub, make_gateway):
+    server = stub(fail_first=10, fail_status=500)
+    gateway = make_gateway(server, max_retries=2)
+
+    with pytest.raises(GeminiError) as excinfo:
+        await gateway.generate_text("안녕")
+    assert excinfo.value.status_code == 500
+    assert server.requests == 3
+
+
+async def test_client_error_is_not_retried(stub, make_gateway):
+    server = stub(fail_first=1, fail_status=400)
+    gateway = make_gateway(server, max_retries=3)
+
+    with pytest.raises(GeminiError) as excinfo:
+        await gateway.generate_text("안녕")
+    assert excinfo.value.status_code == 400
+    assert server.requests == 1
+
+
+async def test_429_honours_retry_after_and_penalizes(stub, make_gateway, monkeypatch):
+    server = stub(fail_first=1, fail_status=429, retry_after="0.2")
+    gateway = make_gateway(server, max_retries=1)
+    # Retry-After 0.2초가 상한(GEMINI_BACKOFF_MAX)에 잘리지 않도록
+    monkeypatch.setattr(gateway_module, "GEMINI_BACKOFF_MAX", 1.0)
+    penalized = []
+    scheduler = gateway_module.llm_scheduler
+    monkeypatch.setattr(scheduler, "penalize", lambda: penalized.append(True))
+    delays = []
+    backoff = gateway._backoff
+
+    def recording_backoff(attempt, retry_after):
+        delays.append(backoff(attempt, retry_after))
+        return delays[-1]
+
+    monkeypatch.setattr(gateway, "_backoff", recording_backoff)
+
+    start = time.perf_counter()
+    assert await gateway.generate_text("안녕") == "OK"
+    assert time.perf_counter() - start >= 0.2
+    assert delays == [0.2]
+    assert penalized == [True]
+    assert server.requests == 2
+
+
+async def test_stream_retries_before_first_chunk(stub, make_gateway):
+    server = stub(fail_first=1, fail_status=502, chunk_chars=1, chunk_ms=0)
+    gateway = make_gateway(server, max_retries=2)
+    chunks = []
+
+    assert await gateway.stream_text("안녕", chunks.append) == "OK"
+    assert chunks == ["O", "K"]
+    assert server.requests == 2
+
+
+def test_backoff_is_jittered_and_capped(monkeypatch):
+    monkeypatch.setattr(gateway_module, "GEMINI_BACKOFF_BASE", 0.5)
+    monkeypatch.setattr(gateway_module, "GEMINI_BACKOFF_MAX", 8.0)
+    gateway = GeminiGateway(api_key="test")
+
+    for attempt in range(6):
+        bound = min(8.0, 0.5 * 2 ** attempt)
+        delays = [gateway._backoff(attempt, None) for _ in range(200)]
+        assert all(0 <= delay <= bound for delay in delays)
+        # full jitter: 같은 시도 횟수라도 값이 흩어짐
+        assert max(delays) - min(delays) > bound / 4
+    assert gateway._backoff(0, "30") == 8.0
+    assert 0 <= gateway._backoff(0, "Wed, 21 Oct 2026 07:28:00 GMT") <= 0.5
+
+
+async def test_timeout_is_retried_then_fails(stub, make_gateway, monkeypatch):
+    server = stub(latency_ms=1000)
+    gateway = make_gateway(server, max_retries=1)
+    tracker = gateway_module.latency_tracker
+    monkeypatch.setattr(tracker, "timeout_for", lambda prompt_type: 0.1)
+
+    start = time.perf_counter()
+    with pytest.raises(GeminiError, match="ReadTimeout"):
+        await gateway.generate_text("안녕", prompt_type="extraction")
+    assert time.perf_counter() - start < 1.0
+    assert server.requests == 2
+    # 타임아웃도 지연 기록에 남아 다음 적응형 타임아웃에 반영됨
+    assert tracker.snapshot()["extraction"]["count"] == 2
+
+
+async def test_concurrency_limit(stub, make_gateway):
+    server = stub(latency_ms=100)
+    gateway = make_gateway(server, max_concurrency=2)
+
+    results = await asyncio.gather(*(gateway.generate_text(f"안녕 {index}") for index in range(6)))
+    assert results == ["OK"] * 6
+    assert server.app.state.peak_in_flight == 2
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    response_store = LLMResponseStore(root=str(tmp_path / "llm_store"), mode="cache")
+    monkeypatch.setattr(gateway_module, "llm_response_store", response_store)
+    return response_store
+
+
+async def test_store_keeps_only_validated_responses(stub, make_gateway, store):
+    server = stub()
+    gateway = make_gateway(server)
+
+    # 검증 함수가 없거나 거부한 응답은 저장하지 않음
+    assert await gateway.generate_text("안녕") == "OK"
+    assert await gateway.generate_text("안녕", validate=lambda text: text == "NO") == "OK"
+    assert store.writes == 0
+
+    assert await gateway.generate_text("안녕", validate=lambda text: text == "OK") == "OK"
+    assert store.writes == 1
+    assert await gateway.generate_text("안녕") == "OK"
+    assert server.requests == 3
+
+
+async def test_store_refresh_skips_stored_response(stub, make_gateway, store):
+    server = stub()
+    gateway = make_gateway(server)
+
+    await gateway.generate_text("안녕", validate=bool)
+    await gateway.generate_text("안녕", validate=bool, refresh=True)
+    assert server.requests == 2
+    assert store.writes == 2
+
+
+async def test_store_skips_truncated_responses(stub, make_gateway, store):
+    server = stub(finish_reason="MAX_TOKENS", chunk_chars=1, chunk_ms=0)
+    gateway = make_gateway(server)
+    chunks = []
+
+    assert await gateway.generate_text("안녕", validate=bool) == "OK"
+    assert await gateway.stream_text("안녕", chunks.append, validate=bool) == "OK"
+    assert chunks == ["O", "K"]
+    assert store.writes == 0
+
+
+async def test_store_keeps_completed_stream(stub, make_gateway, store):
+    server = stub(chunk_chars=1, chunk_ms=0)
+    gateway = make_gateway(server)
+
+    assert await gateway.stream_text("안녕", lambda text: None, validate=bool) == "OK"
+    chunks = []
+    assert await gateway.stream_text("안녕", chunks.append) == "OK"
+    assert chunks == ["OK"]
+    assert server.requests == 1
+
+
+async def test_generate_json_stores_only_parsed_answers(stub, make_gateway, store):
+    server = stub()
+    gateway = make_gateway(server)
+
+    assert "error" in await gateway.generate_json("안녕")
+    assert store.writes == 0
+
+    goal_prompt = "목표 영양소를 알려주세요"
+    assert (await gateway.generate_json(goal_prompt, validate=lambda answer: "fiber" in answer))["tdee"] == 2300
+    assert store.writes == 0
+    assert (await gateway.generate_json(goal_prompt, validate=lambda answer: "tdee" in answer))["tdee"] == 2300
+    assert store.writes == 1
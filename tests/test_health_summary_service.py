@@ -0,0 +1,106 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.health_summary_service import (
+    ensure_summary_tables, get_member_health_summary, record_food, record_prediction, refresh_member,
+)
+from tests.conftest import insert_food
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def summary_db(source_db):
+    await ensure_summary_tables()
+    return source_db
+
+
+def _summary_row_count(db_path: str, member_id: int) -> int:
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute(
+            "SELECT COUNT(*) FROM tb_member_health_summary WHERE member_id = ?", (member_id,)
+        ).fetchone()[0]
+    finally:
+        connection.close()
+
+
+def _nutrients(calories: float):
+    return {"calories": calories, "protein": calories / 20, "carbohydrates": calories / 8, "fat": calories / 30,
+            "fiber": 1.0, "sugar": 2.0, "water": 100.0, "sodium": calories * 2}
+
+
+async def test_record_food_without_summary_builds_from_source(summary_db):
+    consumed = datetime.now().replace(microsecond=0)
+    insert_food(summary_db, 1, "김밥", consumed, 100.0)
+    assert _summary_row_count(summary_db, 1) == 0
+
+    await record_food(1, consumed, _nutrients(100.0), food_name="김밥", meal_time="DINNER")
+
+    data = await get_member_health_summary(1)
+    # 빈 요약(예측 0, 새 기록 하나)이 아니라 원본 전체에서 구축
+    assert (data["diabetes_proba"], data["hypertension_proba"], data["cvd_proba"]) == (0.3, 0.4, 0.5)
+    assert data["recent_food_counts"] == {"김밥": 3, "라면": 1, "샐러드": 1}
+    assert data["avg_calories"] == pytest.approx((400 + 500 + 400 + 200 + 100) / 3)
+
+    await refresh_member(1)
+    refreshed = await get_member_health_summary(1)
+    assert refreshed["recent_food_counts"] == data["recent_food_counts"]
+    assert refreshed["avg_calories"] == pytest.approx(data["avg_calories"])
+
+
+async def test_record_food_with_summary_adds_to_bucket(summary_db):
+    await refresh_member(1)
+    before = await get_member_health_summary(1)
+
+    consumed = datetime.now().replace(microsecond=0)
+    insert_food(summary_db, 1, "라면", consumed, 300.0)
+    await record_food(1, consumed, _nutrients(300.0), food_name="라면", meal_time="DINNER")
+
+    data = await get_member_health_summary(1)
+    assert data["summary_version"] == before["summary_version"] + 1
+    assert data["recent_food_counts"] == {"김밥": 2, "라면": 2, "샐러드": 1}
+    assert data["avg_calories"] == pytest.approx((400 + 500 + 400 + 200 + 300) / 3)
+    assert _summary_row_count(summary_db, 1) == 1
+
+
+async def test_record_prediction_without_summary_keeps_food_buckets(summary_db):
+    assert _summary_row_count(summary_db, 1) == 0
+
+    await record_prediction(1, 0.7, 0.8, 0.9, datetime.now())
+
+    data = await get_member_health_summary(1)
+    assert (data["diabetes_proba"], data["hypertension_proba"], data["cvd_proba"]) == (0.7, 0.8, 0.9)
+    assert data["recent_food_counts"] == {"김밥": 2, "라면": 1, "샐러드": 1}
+    assert data["avg_calories"] == pytest.approx((400 + 500 + 400 + 200) / 3)
+
+
+async def test_record_prediction_ignores_older_result(summary_db):
+    await refresh_member(1)
+
+    await record_prediction(1, 0.9, 0.9, 0.9, datetime.now() - timedelta(days=5))
+
+    data = await get_member_health_summary(1)
+    assert (data["diabetes_proba"], data["hypertension_proba"], data["cvd_proba"]) == (0.3, 0.4, 0.5)
+
+
+async def test_multiple_ongoing_challenges_do_not_duplicate_buckets(summary_db):
+    end_date = (datetime.now() + timedelta(days=120)).date().isoformat()
+    connection = sqlite3.connect(summary_db)
+    try:
+        connection.execute(
+            "INSERT INTO challenge (member_id, status, goal, target_weight, end_date) VALUES (?, ?, ?, ?, ?)",
+            (1, "ONGOING", "유지", 78.0, end_date),
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    await refresh_member(1)
+
+    data = await get_member_health_summary(1)
+    assert data["recent_food_counts"] == {"김밥": 2, "라면": 1, "샐러드": 1}
+    assert data["avg_calories"] == pytest.approx((400 + 500 + 400 + 200) / 3)
+    # 종료일이 가장 늦은 챌린지
+    assert (data["goal"], data["target_weight"]) == ("유지", 78.0)
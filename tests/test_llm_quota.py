@@ -0,0 +1,49 @@
+"""llm_quota 프로세스 간 쿼터 임대와 서버 쿼터 차감"""
+import pytest
+
+from app.services import llm_quota
+from app.services.llm_quota import QuotaSync, batch_quota, leased_rate, register_lease, release_lease
+from app.services.llm_scheduler import LLMScheduler
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def quota_table(engine, monkeypatch):
+    monkeypatch.setattr(llm_quota, "LLM_RATE_PER_MINUTE", 600)
+    monkeypatch.setattr(llm_quota, "LLM_INTERACTIVE_RESERVE", 0.25)
+    await llm_quota.ensure_quota_table()
+    yield
+    await llm_quota.execute("test_quota_cleanup", (llm_quota.text("DELETE FROM tb_llm_quota_lease"), None))
+
+
+async def test_grant_is_clipped_to_batch_share(quota_table):
+    # interactive 몫 25%를 뺀 450까지만, 두 번째 임대는 남은 만큼만
+    assert await register_lease("precompute", 300) == 300
+    assert await register_lease("backfill", 300) == 150
+    assert await leased_rate() == 450
+    # 같은 임대자가 다시 등록하면 자기 몫은 빼지 않고 계산
+    assert await register_lease("precompute", 300) == 300
+    await release_lease("backfill")
+    assert await leased_rate() == 300
+
+
+async def test_expired_lease_is_ignored(quota_table):
+    await register_lease("crashed", 300, lease_seconds=-1)
+    assert await leased_rate() == 0
+    assert await register_lease("precompute", 450) == 450
+
+
+async def test_quota_sync_subtracts_leases_from_scheduler(quota_table):
+    scheduler = LLMScheduler(rate_per_minute=600)
+    sync = QuotaSync(scheduler)
+
+    async with batch_quota("precompute", 300, settle_seconds=0) as granted:
+        assert granted == 300
+        await sync.refresh()
+        assert scheduler.reserved_per_minute == 300
+        assert scheduler.rate == pytest.approx(300 / 60)
+
+    await sync.refresh()
+    assert scheduler.reserved_per_minute == 0
+    assert scheduler.rate == pytest.approx(600 / 60)
@@ -0,0 +1,42 @@
+"""llm_response_store 만료 항목 자동 삭제"""
+import os
+import time
+
+import pytest
+
+from app.services.llm_response_store import LLMResponseStore
+
+pytestmark = pytest.mark.anyio
+
+RESPONSE = {"candidates": [{"content": {"parts": [{"text": "OK"}]}, "finishReason": "STOP"}]}
+
+
+def _age(path, seconds: float):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+async def test_put_purges_expired_entries(tmp_path):
+    store = LLMResponseStore(root=str(tmp_path), mode="cache", ttl=60, purge_interval=3600)
+    await store.put("aa" + "0" * 62, "model", RESPONSE)
+    expired = store._path("aa" + "0" * 62)
+    _age(expired, 120)
+    writing = expired.with_name(f"{expired.name}.1.1.tmp")
+    writing.write_bytes(b"")
+    abandoned = expired.with_name(f"{expired.name}.2.2.tmp")
+    abandoned.write_bytes(b"")
+    _age(abandoned, 120)
+    store._last_purge = 0.0
+
+    await store.put("bb" + "0" * 62, "model", RESPONSE)
+    await store._purge_task
+
+    assert not expired.exists() and not abandoned.exists()
+    # 다른 워커가 쓰는 중일 수 있는 최근 임시 파일과 새 항목은 유지
+    assert writing.exists()
+    assert await store.get("bb" + "0" * 62) == RESPONSE
+
+    # 다음 삭제는 purge_interval 뒤에
+    _age(store._path("bb" + "0" * 62), 120)
+    await store.put("cc" + "0" * 62, "model", RESPONSE)
+    assert store._path("bb" + "0" * 62).exists()
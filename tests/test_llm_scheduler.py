@@ -0,0 +1,46 @@
+"""LLMScheduler 대기열 정리"""
+import asyncio
+
+import pytest
+
+from app.services.llm_scheduler import LANE_BATCH, LANE_INTERACTIVE, LLMScheduler
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cancelled_waiter_leaves_queue_and_unblocks_lower_lane():
+    scheduler = LLMScheduler(rate_per_minute=600, burst=10,
+                             lane_concurrency={LANE_INTERACTIVE: 1, LANE_BATCH: 1})
+    await scheduler.acquire(LANE_INTERACTIVE)
+
+    waiter = asyncio.create_task(scheduler.acquire(LANE_INTERACTIVE))
+    await asyncio.sleep(0)
+    assert scheduler.get_stats()[LANE_INTERACTIVE]["queued"] == 1
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert scheduler.get_stats()[LANE_INTERACTIVE]["queued"] == 0
+
+    # 취소된 interactive 대기자가 남아 있으면 batch는 배정받지 못함
+    await asyncio.wait_for(scheduler.acquire(LANE_BATCH), 1)
+    stats = scheduler.get_stats()
+    assert stats[LANE_BATCH]["in_flight"] == 1
+    assert stats[LANE_INTERACTIVE]["in_flight"] == 1
+
+
+async def test_cancelled_waiter_while_rate_limited():
+    scheduler = LLMScheduler(rate_per_minute=60, burst=1)
+    await scheduler.acquire(LANE_INTERACTIVE)
+    scheduler.release(LANE_INTERACTIVE)
+
+    waiter = asyncio.create_task(scheduler.acquire(LANE_INTERACTIVE))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    stats = scheduler.get_stats()[LANE_INTERACTIVE]
+    assert stats["queued"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["granted"] == 1
@@ -0,0 +1,103 @@
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers import nutrition_aggregate_router as aggregate_router
+from app.services import nutrition_aggregate_service as service
+from app.services.health_summary_service import ensure_summary_tables, record_food, refresh_member
+from app.services.nutrition_aggregate_service import ClosedDayCache, get_daily_nutrition
+from tests.conftest import insert_food
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def summary_db(source_db, monkeypatch):
+    await ensure_summary_tables()
+    await refresh_member(1)
+    monkeypatch.setattr(service, "closed_day_cache", ClosedDayCache())
+    return source_db
+
+
+def _calories(result, day: date) -> float:
+    return next(entry["total"]["calories"] for entry in result["days"] if entry["date"] == day.isoformat())
+
+
+async def test_closed_days_are_cached(summary_db):
+    today = date.today()
+    first = await get_daily_nutrition(1, today - timedelta(days=2), today)
+    second = await get_daily_nutrition(1, today - timedelta(days=2), today)
+
+    assert first == second
+    assert _calories(first, today - timedelta(days=2)) == 900.0
+    assert service.closed_day_cache.hits == 2
+
+
+async def test_summary_version_change_invalidates_cache(summary_db):
+    """다른 워커가 기록 이벤트를 받아 요약 버전만 오른 경우에도 지난 날짜를 다시 집계"""
+    today = date.today()
+    day = today - timedelta(days=1)
+    assert _calories(await get_daily_nutrition(1, day, today), day) == 400.0
+
+    consumed = datetime.combine(day, datetime.min.time()) + timedelta(hours=19)
+    insert_food(summary_db, 1, "라면", consumed, 500.0)
+    await record_food(1, consumed, {"calories": 500.0}, food_name="라면", meal_time="DINNER")
+
+    assert _calories(await get_daily_nutrition(1, day, today), day) == 900.0
+
+
+async def test_cache_entries_expire(summary_db, monkeypatch):
+    monkeypatch.setattr(service, "closed_day_cache", ClosedDayCache(ttl=0))
+    today = date.today()
+    day = today - timedelta(days=1)
+    assert _calories(await get_daily_nutrition(1, day, today), day) == 400.0
+
+    # 이벤트 없이 원본만 바뀐 경우는 유효 시간이 지나면 반영
+    insert_food(summary_db, 1, "라면", datetime.combine(day, datetime.min.time()) + timedelta(hours=19), 500.0)
+    assert _calories(await get_daily_nutrition(1, day, today), day) == 900.0
+    assert service.closed_day_cache.hits == 0
+
+
+def test_closed_day_cache_bounds():
+    cache = ClosedDayCache(max_days=2)
+    days = [date(2026, 1, day) for day in (1, 2, 3)]
+    for day in days:
+        cache.put(1, day, {}, version=1)
+
+    assert len(cache) == 2
+    assert cache.get(1, days[0], version=1) is None
+    assert cache.get(1, days[2], version=1) == {}
+    assert cache.get(1, days[2], version=2) is None
+    assert len(cache) == 1
+
+
+async def _read_stream(response) -> list:
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    return [json.loads(line) for line in body.splitlines()]
+
+
+async def test_stream_error_after_first_day_ends_with_error_line(monkeypatch):
+    async def failing_days(member_id, start, end, include_empty=False):
+        yield {"date": start.isoformat()}
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(aggregate_router, "iter_daily_nutrition", failing_days)
+    response = await aggregate_router.get_daily_nutrition_summary(
+        1, date(2024, 1, 1), date(2024, 1, 31), includeEmpty=False, stream=True)
+    lines = await _read_stream(response)
+    assert lines[0] == {"date": "2024-01-01"}
+    assert "connection lost" in lines[-1]["error"]
+
+
+async def test_stream_error_before_first_day_is_500(monkeypatch):
+    async def failing_days(member_id, start, end, include_empty=False):
+        raise RuntimeError("connection refused")
+        yield
+
+    monkeypatch.setattr(aggregate_router, "iter_daily_nutrition", failing_days)
+    with pytest.raises(HTTPException) as raised:
+        await aggregate_router.get_daily_nutrition_summary(
+            1, date(2024, 1, 1), date(2024, 1, 31), includeEmpty=False, stream=True)
+    assert raised.value.status_code == 500
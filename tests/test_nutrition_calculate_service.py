@@ -0,0 +1,37 @@
+"""nutrition_calculate_service 묶음 재시도"""
+import pytest
+
+from app.services import nutrition_calculate_service as service
+from app.services.nutrition_profile_service import NutritionProfileStore
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def profile_store(monkeypatch, tmp_path):
+    store = NutritionProfileStore(cache_file=str(tmp_path / "profiles.pkl"))
+    monkeypatch.setattr(service, "nutrition_profile_store", store)
+    return store
+
+
+def _profile(number: int) -> dict:
+    return {"번호": number, **{key: 1.0 for key in service.NUTRIENT_KEYS}}
+
+
+async def test_retry_bypasses_response_store(monkeypatch, profile_store):
+    calls = []
+    answers = [{"profiles": [_profile(0)]}, {"profiles": [_profile(0)]}]
+
+    async def generate_json(prompt, refresh=False, **kwargs):
+        calls.append((prompt, refresh))
+        return answers[len(calls) - 1]
+
+    monkeypatch.setattr(service.gemini_gateway, "generate_json", generate_json)
+    monkeypatch.setattr(service, "NUTRITION_PROFILE_CHUNK_RETRIES", 1)
+
+    learned = await service._learn_chunk([("김밥", "g"), ("라면", "개")])
+
+    assert learned == 2
+    assert [refresh for _, refresh in calls] == [False, True]
+    # 재시도는 빠진 음식만 다시 물음
+    assert "라면" in calls[1][0] and "김밥" not in calls[1][0]
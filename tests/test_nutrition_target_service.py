@@ -0,0 +1,44 @@
+"""nutrition_target_service 배치 계산"""
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.health_summary_service import ensure_summary_tables, get_member_health_summary
+from app.services.nutrition_target_service import compute_ongoing_targets, compute_targets
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def target_db(source_db):
+    await ensure_summary_tables()
+    return source_db
+
+
+async def test_ongoing_targets_match_single_member(target_db):
+    targets = await compute_ongoing_targets()
+
+    health_data = await get_member_health_summary(1)
+    assert list(targets) == [1]
+    assert targets[1] == compute_targets(health_data, health_data["target_weight"], health_data["end_date"])
+    assert targets[1]["calories"] < targets[1]["tdee"]
+
+
+async def test_ongoing_targets_use_latest_challenge(target_db):
+    connection = sqlite3.connect(target_db)
+    try:
+        connection.execute(
+            "INSERT INTO challenge (member_id, status, goal, target_weight, end_date) VALUES (?, ?, ?, ?, ?)",
+            (1, "ONGOING", "증량", 85.0, (date.today() + timedelta(days=120)).isoformat()),
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+    targets = await compute_ongoing_targets()
+    health_data = await get_member_health_summary(1)
+    # 회원 건강 요약과 같은 챌린지(종료일이 가장 늦은 것) 기준
+    assert health_data["target_weight"] == 85.0
+    assert targets[1] == compute_targets(health_data, 85.0, health_data["end_date"])
+    assert targets[1]["calories"] > targets[1]["tdee"]
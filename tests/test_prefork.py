@@ -0,0 +1,165 @@
+"""
+프리포크 실행기: 워커 재시작 백오프/시작 실패 한도, 워커별 쿼터 몫,
+스모크 테스트(워커 2개가 각각 /predict/health를 처리하는지, 모델은 마스터에서 NumPy로 로드해 공유)
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core import prefork
+from app.core.prefork import Arbiter, PreforkOptions, _free_port
+
+ROOT = Path(__file__).resolve().parent.parent
+STARTUP_TIMEOUT = 300
+
+PREDICT_REQUEST = {
+    "memberId": 1, "age": 45, "gender": 1, "height": 172.0, "weight": 78.0,
+    "historyDiabetes": 0, "historyHypertension": 1, "historyCardiovascular": 0,
+    "smokeDaily": 0, "drinkWeekly": 2, "exerciseWeekly": 3,
+    "dailyCarbohydrate": 280.0, "dailySugar": 40.0, "dailyFat": 60.0, "dailySodium": 3200.0,
+    "dailyFibrin": 18.0, "dailyWater": 1500.0,
+}
+
+
+class _FakeSpawnArbiter(Arbiter):
+    """fork 대신 pid만 만들어 기록"""
+
+    def __init__(self, options: PreforkOptions):
+        super().__init__(options)
+        self.spawned = []
+
+    def spawn(self):
+        pid = 1000 + len(self.spawned)
+        self.spawned.append(pid)
+        self.workers[pid] = time.monotonic()
+        self.booting[pid] = time.monotonic() + self.options.startup_timeout
+        return pid, -pid
+
+
+def test_startup_failures_back_off_then_stop_master(monkeypatch):
+    monkeypatch.setattr(prefork, "RESPAWN_BACKOFF_BASE", 10.0)
+    arbiter = _FakeSpawnArbiter(PreforkOptions(workers=1, max_startup_failures=3))
+    arbiter._respawn()
+    assert arbiter.spawned == [1000]
+
+    # lifespan 실패(종료 코드 0)도 준비 전이면 시작 실패
+    arbiter._worker_exited(1000, 0)
+    assert arbiter.respawn_at - time.monotonic() == pytest.approx(10.0, abs=1)
+    arbiter._respawn()
+    assert arbiter.spawned == [1000]
+
+    arbiter.respawn_at = 0.0
+    arbiter._respawn()
+    arbiter._worker_exited(1001, 1)
+    assert arbiter.respawn_at - time.monotonic() == pytest.approx(20.0, abs=1)
+    assert not arbiter.stopping
+
+    arbiter.respawn_at = 0.0
+    arbiter._respawn()
+    arbiter._worker_exited(1002, 1)
+    assert arbiter.stopping and arbiter.exit_code == 1
+
+
+def test_ready_worker_resets_failures(monkeypatch):
+    monkeypatch.setattr(prefork, "RESPAWN_BACKOFF_BASE", 10.0)
+    arbiter = _FakeSpawnArbiter(PreforkOptions(workers=1, max_startup_failures=2))
+    arbiter._respawn()
+    arbiter._worker_exited(1000, 1)
+    arbiter.respawn_at = 0.0
+    arbiter._respawn()
+    arbiter._mark_ready(1001)
+    assert arbiter.failures == 0 and arbiter.startup_failures == 0
+
+    # 준비된 뒤의 비정상 종료는 백오프만 하고 시작 실패로 세지 않음
+    arbiter._worker_exited(1001, -9)
+    assert arbiter.failures == 1 and arbiter.startup_failures == 0
+    assert not arbiter.stopping
+
+    # 정상 재활용은 바로 다시 fork
+    arbiter.respawn_at = 0.0
+    arbiter._respawn()
+    arbiter._mark_ready(1002)
+    arbiter._worker_exited(1002, 0)
+    arbiter._respawn()
+    assert arbiter.spawned[-1] == 1003
+
+
+def test_worker_uses_its_share_of_quota(monkeypatch):
+    from app.services import llm_scheduler as scheduler_module
+    from app.services.llm_scheduler import LLMScheduler
+
+    scheduler = LLMScheduler(rate_per_minute=600)
+    monkeypatch.setattr(scheduler_module, "llm_scheduler", scheduler)
+    class _NoopServer:
+        def __init__(self, config, ready_fd):
+            pass
+
+        def run(self, sockets):
+            pass
+
+    monkeypatch.setattr(prefork, "_WorkerServer", _NoopServer)
+    prefork._run_worker(PreforkOptions(workers=4), None, -1, 0)
+    assert scheduler.rate == pytest.approx(600 / 4 / 60)
+
+    # 배치 임대를 뺀 나머지를 나눠 씀
+    scheduler.configure(reserved_per_minute=200)
+    assert scheduler.rate == pytest.approx(400 / 4 / 60)
+
+
+@pytest.fixture
+def prefork_server(tmp_path):
+    pytest.importorskip("joblib")
+    pytest.importorskip("h5py")
+    pytest.importorskip("httpx")
+    # 워커는 conftest의 DB_URL(테스트 SQLite)을 물려받음
+    port = _free_port()
+    ready_file = tmp_path / "ready.json"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "app.core.prefork", "serve", "--app", "main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "2", "--ready-file", str(ready_file)],
+        cwd=ROOT,
+    )
+    try:
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while not ready_file.exists():
+            if process.poll() is not None:
+                pytest.fail(f"프리포크 실행기가 종료됨 ({process.returncode})")
+            if time.monotonic() > deadline:
+                pytest.fail("프리포크 워커가 준비되지 않음")
+            time.sleep(0.2)
+        yield f"http://127.0.0.1:{port}", json.loads(ready_file.read_text())["workers"]
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def test_each_worker_serves_predictions(prefork_server):
+    import httpx
+
+    url, workers = prefork_server
+    assert len(workers) == 2
+
+    for worker in workers:
+        # 나머지 워커를 멈춰 두면 연결은 이 워커만 받음
+        others = [pid for pid in workers if pid != worker]
+        for pid in others:
+            os.kill(pid, signal.SIGSTOP)
+        try:
+            response = httpx.post(f"{url}/predict/health", json=PREDICT_REQUEST, timeout=60)
+        finally:
+            for pid in others:
+                os.kill(pid, signal.SIGCONT)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert set(body) == {"diabetes", "hypertension", "cardiovascular"}
+        assert all(0.0 <= value <= 1.0 for value in body.values())
@@ -0,0 +1,27 @@
+"""프로파일링 예약: 제외 경로와 경로 필터"""
+from app.core.profiling import ProfilingState
+
+
+def test_armed_profiling_skips_metrics_and_admin_routes():
+    state = ProfilingState()
+    state.arm(1)
+    assert not state.take_armed("/metrics")
+    assert not state.take_armed("/admin/profiling/profiles")
+    assert state.remaining == 1
+    assert state.take_armed("/diet/analysis")
+    assert not state.take_armed("/diet/analysis")
+
+
+def test_armed_profiling_path_filter():
+    state = ProfilingState()
+    state.arm(2, "/predict")
+    assert not state.take_armed("/nutrition/daily")
+    assert not state.take_armed("/predictions")
+    assert state.take_armed("/predict/health")
+    assert state.take_armed("/predict")
+    assert state.remaining == 0
+
+    # 다시 예약하면 이전 필터는 지워짐
+    state.arm(1)
+    assert state.path_prefix is None
+    assert state.take_armed("/nutrition/daily")
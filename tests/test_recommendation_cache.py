@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.services.recommendation_cache import RecommendationCache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_requests_share_one_computation():
+    cache = RecommendationCache()
+    calls = 0
+    release = asyncio.Event()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"menu": "샐러드"}
+
+    tasks = [asyncio.create_task(cache.get_or_compute("recommendation", 1, "v1", compute)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == [{"menu": "샐러드"}] * 3
+    assert calls == 1
+    assert cache.get("recommendation", 1, "v1") == {"menu": "샐러드"}
+
+
+async def test_cancelled_leader_does_not_fail_followers():
+    cache = RecommendationCache()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return {"menu": "비빔밥"}
+
+    leader = asyncio.create_task(cache.get_or_compute("recommendation", 1, "v1", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(cache.get_or_compute("recommendation", 1, "v1", compute))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    release.set()
+
+    assert await follower == {"menu": "비빔밥"}
+    assert cache.get("recommendation", 1, "v1") == {"menu": "비빔밥"}
+
+
+async def test_computation_finishes_after_every_caller_cancels():
+    cache = RecommendationCache()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        return {"menu": "김밥"}
+
+    caller = asyncio.create_task(cache.get_or_compute("recommendation", 1, "v1", compute))
+    await asyncio.sleep(0)
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    release.set()
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+    # 계산 결과는 캐시에 남아 다음 요청이 재사용
+    assert cache.get("recommendation", 1, "v1") == {"menu": "김밥"}
+    assert not cache._inflight
+
+
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    cache = RecommendationCache()
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        raise RuntimeError("gemini down")
+
+    tasks = [asyncio.create_task(cache.get_or_compute("recommendation", 1, "v1", compute)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get("recommendation", 1, "v1") is None
+    assert not cache._inflight